@@ -1,31 +1,61 @@
 import os
+import json
+import time
+import hashlib
 import logging
 import swisseph as swe
 import datetime
 import zoneinfo
 from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
 import calendar
+import functools
+import click
 
 
-from flask import Flask, render_template, request, redirect, url_for, flash, make_response, jsonify
+from flask import Flask, render_template, request, redirect, url_for, flash, make_response, jsonify, Response, stream_with_context, send_file
 from flask_sqlalchemy import SQLAlchemy
-from sqlalchemy.orm import DeclarativeBase
+from sqlalchemy import insert, tuple_
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.orm import DeclarativeBase, load_only
 from werkzeug.middleware.proxy_fix import ProxyFix
 
 from reportlab.lib.pagesizes import A4
-from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle, Image as ReportLabImage
+from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet, ParagraphStyle
 from reportlab.lib.units import inch
 from reportlab.lib import colors
 from reportlab.lib.enums import TA_CENTER, TA_LEFT
 from io import BytesIO
 
-# For PNG generation
-from PIL import Image, ImageDraw, ImageFont
-
 # For automatic timezone detection
 from timezonefinder import TimezoneFinder
 
+# Tithi/Nakshatra calculations and transition search
+from panchang import get_tithi, get_nakshatra, longitudes
+# Precomputed transition lookups (falls back to live search outside the index)
+import transition_index
+from caching import LRUCache
+from migrations import upgrade_schema, pending_changes
+# Database profiles (SQLite WAL and pragmas) and their benchmark
+from db_profile import engine_options, install_sqlite_pragmas, log_profile, benchmark_profile, benchmark_user, benchmark_chart
+# Full-text user search (FTS5)
+from user_search import setup_search_index, has_search_index, search_user_ids
+# Kundali rendering: cached PNG, SVG and ReportLab vector drawing
+from kundali import get_kundali_png, render_svg, chart_drawing, png_cache as kundali_png_cache, RENDERER_VERSION
+# Generated PDF reports on local disk
+from report_cache import report_cache
+# Page-by-page streaming calendar PDF
+from calendar_pdf import iter_calendar_pages, iter_pdf
+# Background export jobs
+from job_queue import JobQueue, QueueFull, PermanentJobError, DONE, utcnow as job_utcnow
+from user_import import detect_format, iter_records, run_import, add_error
+# Sunrise/sunset provider and day-division windows (Raahu/Gulika/Yamaganda Kaal)
+from sun_times import sun_times, quantize, local_midnight_jd, SUN_TIME_MODES, SUN_TIMES_MODE, IST
+import sun_tiles
+from astro_time_windows import get_kaal_range
+from muhurta import get_muhurtas, compute_muhurtas, iter_muhurtas, iter_muhurtas_bulk, SINGLE_WINDOWS
+
 # Configure logging
 logging.basicConfig(level=logging.DEBUG)
 
@@ -33,7 +63,67 @@ logging.basicConfig(level=logging.DEBUG)
 # Use relative path from your project root
 ephe_path = os.path.join(os.path.dirname(__file__), "ephe")
 swe.set_ephe_path(ephe_path)
-swe.set_sid_mode(swe.SIDM_LAHIRI)  # Lahiri (Sidereal) zodiac
+AYANAMSA = swe.SIDM_LAHIRI
+swe.set_sid_mode(AYANAMSA)  # Lahiri (Sidereal) zodiac
+# Sun-times engine for /timings and /choghadiya: "tile" reads the sun_tiles.py
+# grid and falls back to Swiss Ephemeris where no tile covers the request.
+TIMINGS_SUN_MODE = os.environ.get("TIMINGS_SUN_MODE", "tile")
+# In tile mode the results depend on which tile file is loaded ("exact" if none)
+TIMINGS_SUN_SOURCE = sun_tiles.table_identity() if TIMINGS_SUN_MODE == "tile" else TIMINGS_SUN_MODE
+# Bump when the JSON layout or any calculation changes, to invalidate ETags
+CALC_VERSION = f"1|swe-{swe.version}|sidm-{AYANAMSA}|{TIMINGS_SUN_SOURCE}"
+# Stamp on stored BirthChart rows; bump when calculate_birth_chart changes so
+# stale rows are recalculated on their next view (or by `flask backfill-charts`)
+CHART_VERSION = f"1|swe-{swe.version}|sidm-{AYANAMSA}"
+API_PAST_MAX_AGE = int(os.environ.get("API_PAST_MAX_AGE", 365 * 24 * 3600))
+API_MAX_AGE = int(os.environ.get("API_MAX_AGE", 3600))
+BULK_MAX_ROWS = int(os.environ.get("BULK_MAX_ROWS", 100000))
+ICS_MAX_MONTHS = int(os.environ.get("ICS_MAX_MONTHS", 24))
+# Bump when the birth chart PDF layout changes; cached reports are keyed on it
+REPORT_VERSION = 2
+CALENDAR_PDF_MAX_MONTHS = int(os.environ.get("CALENDAR_PDF_MAX_MONTHS", 12))
+JOB_WORKERS = int(os.environ.get("JOB_WORKERS", 2))
+JOB_QUEUE_MAX = int(os.environ.get("JOB_QUEUE_MAX", 100))
+JOB_RETENTION_HOURS = int(os.environ.get("JOB_RETENTION_HOURS", 24))
+JOB_RESULTS_DIR = os.environ.get(
+    "JOB_RESULTS_DIR",
+    os.path.join(os.path.dirname(__file__), "instance", "jobs")
+)
+IMPORT_WORKERS = int(os.environ.get("IMPORT_WORKERS", os.cpu_count() or 1))
+IMPORT_CHUNK_SIZE = int(os.environ.get("IMPORT_CHUNK_SIZE", 500))
+# Files uploaded to /api/users/import wait here for their import job
+IMPORT_UPLOAD_DIR = os.path.join(JOB_RESULTS_DIR, "uploads")
+USERS_PAGE_SIZE = int(os.environ.get("USERS_PAGE_SIZE", 50))
+# "production" enables WAL and the other SQLite settings in db_profile.py and
+# leaves schema changes to `flask migrate-db` instead of running them at startup
+DB_PROFILE = os.environ.get("DB_PROFILE", "default")
+DB_AUTO_MIGRATE = os.environ.get("DB_AUTO_MIGRATE", "0" if DB_PROFILE == "production" else "1") == "1"
+USER_SEARCH_LIMIT = int(os.environ.get("USER_SEARCH_LIMIT", 10))
+# Locations materialized by `flask precompute-panchang`, as "id=lat,lon;id=lat,lon"
+PANCHANG_LOCATIONS = os.environ.get("PANCHANG_LOCATIONS", "delhi=28.6139,77.2090")
+PANCHANG_WORKERS = int(os.environ.get("PANCHANG_WORKERS", os.cpu_count() or 1))
+# Stamp on stored DailyPanchang rows; rows with another stamp are ignored and recomputed
+PANCHANG_VERSION = f"2|swe-{swe.version}|sidm-{AYANAMSA}|{SUN_TIMES_MODE}"
+# Stored rows hold SUN_TIMES_MODE sun times for their grid cell; /timings,
+# /choghadiya and their APIs only read them when TIMINGS_SUN_MODE gives the
+# same values (tile mode interpolates at the exact coordinates instead)
+TIMINGS_USE_STORE = TIMINGS_SUN_MODE == SUN_TIMES_MODE != "tile"
+
+# === CACHES ===
+# Month skeletons (tithi, nakshatra, Raahu Kaal) are identical for every user;
+# only the Tara overlay depends on the user's birth nakshatra.
+month_cache = LRUCache(
+    "month_skeletons",
+    maxsize=int(os.environ.get("MONTH_CACHE_SIZE", 36)),
+    max_age=int(os.environ.get("MONTH_CACHE_MAX_AGE", 24 * 3600)),
+)
+# Daily panchang snapshots per (IST date, location). Today's key changes at
+# local midnight, so each location is recomputed once per day.
+panchang_cache = LRUCache(
+    "panchang_snapshots",
+    maxsize=int(os.environ.get("PANCHANG_CACHE_SIZE", 512)),
+    max_age=int(os.environ.get("PANCHANG_CACHE_MAX_AGE", 24 * 3600)),
+)
 
 # === TIMEZONE ===
 delhi_tz = zoneinfo.ZoneInfo("Asia/Kolkata")
@@ -122,16 +212,22 @@ app.wsgi_app = ProxyFix(app.wsgi_app, x_proto=1, x_host=1)
 
 # Configure the database
 app.config["SQLALCHEMY_DATABASE_URI"] = os.environ.get("DATABASE_URL", "sqlite:///astrology.db")
-app.config["SQLALCHEMY_ENGINE_OPTIONS"] = {
-    "pool_recycle": 300,
-    "pool_pre_ping": True,
-}
+app.config["SQLALCHEMY_ENGINE_OPTIONS"] = engine_options(DB_PROFILE, app.config["SQLALCHEMY_DATABASE_URI"])
 
 # Initialize the app with the extension
 db.init_app(app)
+if DB_PROFILE == "production":
+    with app.app_context():
+        install_sqlite_pragmas(db.engine)
 
 # === DATABASE MODELS ===
+# Planets stored on BirthChart as <name>_position / <name>_house
+CHART_PLANETS = ("Sun", "Moon", "Mercury", "Venus", "Mars", "Jupiter", "Saturn", "Rahu", "Ketu")
+
 class User(db.Model):
+    # Keyset pagination of the home page list, newest first
+    __table_args__ = (db.Index('ix_user_created_at_id', 'created_at', 'id'),)
+    
     id = db.Column(db.Integer, primary_key=True)
     full_name = db.Column(db.String(200), nullable=False)
     birth_date = db.Column(db.DateTime, nullable=False)
@@ -171,9 +267,19 @@ class User(db.Model):
         user_tz = zoneinfo.ZoneInfo(self.birth_timezone)
         return birth_dt.replace(tzinfo=user_tz)
 
+    def get_numerology(self):
+        """Return the stored numerology numbers, or None if any is missing."""
+        numerology = {
+            'pythagorean_expression': self.pythagorean_expression,
+            'chaldean_expression': self.chaldean_expression,
+            'driver_number': self.driver_number,
+            'conductor_number': self.conductor_number
+        }
+        return numerology if None not in numerology.values() else None
+
 class BirthChart(db.Model):
     id = db.Column(db.Integer, primary_key=True)
-    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False)
+    user_id = db.Column(db.Integer, db.ForeignKey('user.id'), nullable=False, index=True)
     
     # Planetary positions (in degrees)
     sun_position = db.Column(db.Float)
@@ -203,7 +309,190 @@ class BirthChart(db.Model):
     house2_sign = db.Column(db.String(20))
     house11_sign = db.Column(db.String(20))
     
+    # Remaining calculate_birth_chart inputs, so views need no ephemeris calls
+    jd_birth = db.Column(db.Float)
+    ascendant_sign_index = db.Column(db.Integer)
+    birth_nakshatra_index = db.Column(db.Integer)
+    birth_tithi_index = db.Column(db.Integer)
+    calc_version = db.Column(db.String(64))
+    
     user = db.relationship('User', backref=db.backref('birth_charts', lazy=True))
+    
+    def is_current(self):
+        """True if the row was calculated with the current CHART_VERSION."""
+        return self.calc_version == CHART_VERSION
+    
+    @staticmethod
+    def chart_columns(chart_data):
+        """Return the column values for a calculate_birth_chart result, stamped with CHART_VERSION."""
+        columns = {}
+        for name in CHART_PLANETS:
+            columns[f"{name.lower()}_position"] = chart_data['planet_positions'][name]
+            columns[f"{name.lower()}_house"] = chart_data['planet_houses'].get(name)
+        columns.update(
+            jd_birth=chart_data['jd_birth'],
+            ascendant_degree=chart_data['ascendant'],
+            ascendant_sign=chart_data['ascendant_sign'],
+            ascendant_sign_index=chart_data['ascendant_sign_index'],
+            house2_sign=chart_data['house2_sign'],
+            house11_sign=chart_data['house11_sign'],
+            birth_nakshatra_index=chart_data['birth_nakshatra_index'],
+            birth_tithi_index=chart_data['birth_tithi_index'],
+            calc_version=CHART_VERSION,
+        )
+        return columns
+    
+    def store_chart_data(self, chart_data):
+        """Copy a calculate_birth_chart result onto this row and stamp it."""
+        for column, value in self.chart_columns(chart_data).items():
+            setattr(self, column, value)
+    
+    def to_chart_data(self, latitude, longitude):
+        """Rebuild the calculate_birth_chart result from this row."""
+        positions = {name: getattr(self, f"{name.lower()}_position") for name in CHART_PLANETS}
+        houses = {}
+        for name in CHART_PLANETS:
+            house = getattr(self, f"{name.lower()}_house")
+            if house is not None:
+                houses[name] = house
+        house2_sign_index = (self.ascendant_sign_index + 1) % 12
+        house11_sign_index = (self.ascendant_sign_index + 10) % 12
+        return {
+            'jd_birth': self.jd_birth,
+            'planet_positions': positions,
+            'planet_houses': houses,
+            'ascendant': self.ascendant_degree,
+            'ascendant_sign': rashis[self.ascendant_sign_index],
+            'ascendant_sign_index': self.ascendant_sign_index,
+            'birth_nakshatra': nakshatras[self.birth_nakshatra_index],
+            'birth_nakshatra_index': self.birth_nakshatra_index,
+            'birth_tithi_index': self.birth_tithi_index,
+            'birth_tithi_name': get_tithi_name(self.birth_tithi_index),
+            'house2_sign': rashis[house2_sign_index],
+            'house2_sign_num': house2_sign_index + 1,
+            'house11_sign': rashis[house11_sign_index],
+            'house11_sign_num': house11_sign_index + 1,
+            'phase_angle': (positions['Moon'] - positions['Sun']) % 360,
+            'latitude': latitude,
+            'longitude': longitude
+        }
+
+class Job(db.Model):
+    """Background export job (see job_queue.py)."""
+    id = db.Column(db.String(32), primary_key=True)
+    kind = db.Column(db.String(50), nullable=False)
+    params = db.Column(db.Text, nullable=False)  # JSON
+    dedupe_key = db.Column(db.String(64), index=True)
+    status = db.Column(db.String(20), nullable=False, index=True)
+    attempts = db.Column(db.Integer, default=0)
+    max_attempts = db.Column(db.Integer, default=3)
+    error = db.Column(db.Text)
+    
+    # Result file metadata
+    result_mimetype = db.Column(db.String(100))
+    result_name = db.Column(db.String(255))
+    result_size = db.Column(db.Integer)
+    
+    created_at = db.Column(db.DateTime, default=job_utcnow)
+    started_at = db.Column(db.DateTime)
+    finished_at = db.Column(db.DateTime)
+
+class DailyPanchang(db.Model):
+    """Precomputed panchang for one day at one location (see `flask precompute-panchang`)."""
+    __tablename__ = 'daily_panchang'
+    
+    # Primary key (location_id, date): a month is one range scan per location
+    location_id = db.Column(db.String(50), primary_key=True)
+    date = db.Column(db.Date, primary_key=True)
+    latitude = db.Column(db.Float, nullable=False)
+    longitude = db.Column(db.Float, nullable=False)
+    
+    # Sun times and kaals, naive IST
+    sunrise = db.Column(db.DateTime)
+    sunset = db.Column(db.DateTime)
+    next_sunrise = db.Column(db.DateTime)
+    raahu_start = db.Column(db.DateTime)
+    raahu_end = db.Column(db.DateTime)
+    gulika_start = db.Column(db.DateTime)
+    gulika_end = db.Column(db.DateTime)
+    yamaganda_start = db.Column(db.DateTime)
+    yamaganda_end = db.Column(db.DateTime)
+    
+    # The day's Tithi / Nakshatra entries in its month skeleton, JSON [[start, end, name(, index)], ...]
+    tithi_spans = db.Column(db.Text, nullable=False)
+    nakshatra_spans = db.Column(db.Text, nullable=False)
+    # Last day of a month only: the following days its skeleton spills into,
+    # JSON {date: {"tithi": [...], "nakshatra": [...], "raahu_kaal": [start, end] or null}}
+    spill_days = db.Column(db.Text)
+    
+    # Values at sunrise (noon IST if the Sun does not rise), as on the panchang page
+    sunrise_tithi_index = db.Column(db.Integer)
+    sunrise_nakshatra_index = db.Column(db.Integer)
+    sun_longitude = db.Column(db.Float)
+    moon_longitude = db.Column(db.Float)
+    
+    calc_version = db.Column(db.String(64))
+    
+    @staticmethod
+    def _ist(value):
+        return value.replace(tzinfo=IST) if value is not None else None
+    
+    def sun_triple(self):
+        """(sunrise, sunset, next_sunrise) as IST datetimes."""
+        return self._ist(self.sunrise), self._ist(self.sunset), self._ist(self.next_sunrise)
+    
+    @classmethod
+    def _entries(cls, spans):
+        return [(cls._ist(datetime.datetime.fromisoformat(start)), cls._ist(datetime.datetime.fromisoformat(end)), *rest)
+                for start, end, *rest in spans]
+    
+    @classmethod
+    def _raahu_kaal(cls, day, start, end):
+        if not (start and end):
+            return None
+        return {'start': cls._ist(start), 'end': cls._ist(end), 'weekday': day.strftime('%A')}
+    
+    def tithi_entries(self):
+        """[(start, end, name)] as in a month skeleton."""
+        return self._entries(json.loads(self.tithi_spans))
+    
+    def nakshatra_entries(self):
+        """[(start, end, name, index)] as in a month skeleton."""
+        return self._entries(json.loads(self.nakshatra_spans))
+    
+    def muhurtas(self):
+        """compute_muhurtas for the day from the stored sun times (no ephemeris calls)."""
+        return compute_muhurtas(self.date, *self.sun_triple())
+    
+    def skeleton_entry(self):
+        """Month skeleton entry (see AstrologyEngine.build_month_skeleton)."""
+        return {"tithi": self.tithi_entries(), "nakshatra": self.nakshatra_entries(),
+                "raahu_kaal": self._raahu_kaal(self.date, self.raahu_start, self.raahu_end)}
+    
+    def spill_entries(self):
+        """{date: skeleton entry} for the days after the month in its skeleton (stored on the last day)."""
+        entries = {}
+        for day, spill in json.loads(self.spill_days or '{}').items():
+            day = datetime.date.fromisoformat(day)
+            raahu_start, raahu_end = [datetime.datetime.fromisoformat(value)
+                                      for value in spill['raahu_kaal'] or ()] or (None, None)
+            entries[day] = {"tithi": self._entries(spill['tithi']), "nakshatra": self._entries(spill['nakshatra']),
+                            "raahu_kaal": self._raahu_kaal(day, raahu_start, raahu_end)}
+        return entries
+    
+    def snapshot(self):
+        """Daily snapshot (see AstrologyEngine.build_daily_panchang)."""
+        sunrise, sunset, _ = self.sun_triple()
+        return {
+            'date': self.date,
+            'lat': self.latitude,
+            'lon': self.longitude,
+            'sun_times': {'sunrise': sunrise, 'sunset': sunset},
+            'raahu_kaal': {'start': self._ist(self.raahu_start), 'end': self._ist(self.raahu_end)},
+            'tithi': {'name': get_tithi_name(self.sunrise_tithi_index), 'index': self.sunrise_tithi_index},
+            'nakshatra': {'name': nakshatras[self.sunrise_nakshatra_index], 'index': self.sunrise_nakshatra_index},
+            'planetary_positions': {'sun': self.sun_longitude, 'moon': self.moon_longitude},
+        }
 
 # === UTILITY FUNCTIONS ===
 def digital_root(n: int) -> int:
@@ -244,13 +533,6 @@ def jd_to_datetime(jd):
     )
     return dt.astimezone(delhi_tz)
 
-def get_tithi(jd):
-    """Return the 0-based tithi index at a given Julian Day."""
-    sun_long = swe.calc_ut(jd, swe.SUN, swe.FLG_SIDEREAL)[0][0]
-    moon_long = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL)[0][0]
-    angle = (moon_long - sun_long) % 360
-    return int(angle // 12)
-
 def get_tithi_name(tithi_index):
     """Get proper tithi name with paksha."""
     if tithi_index < 15:
@@ -271,24 +553,6 @@ def get_tithi_name(tithi_index):
     
     return f"{paksha} {tithi_name}"
 
-def get_nakshatra(jd):
-    """Return the 0-based nakshatra index (0..26) at a given Julian Day."""
-    moon_long = swe.calc_ut(jd, swe.MOON, swe.FLG_SIDEREAL)[0][0]
-    return int(moon_long // (360 / 27))
-
-def find_transition_jd(jd_start, get_value_func):
-    """Binary-search for JD when get_value_func transitions to new value."""
-    current_val = get_value_func(jd_start)
-    lower = jd_start
-    upper = jd_start + 2  # search window of up to 2 days
-    while upper - lower > 1 / 86400:  # precision of 1 second
-        mid = (lower + upper) / 2
-        if get_value_func(mid) != current_val:
-            upper = mid
-        else:
-            lower = mid
-    return upper
-
 def get_timezone_from_coordinates(latitude, longitude):
     """Get timezone string from latitude and longitude coordinates."""
     try:
@@ -304,150 +568,8 @@ def get_timezone_from_coordinates(latitude, longitude):
         return "UTC"
 
 def generate_kundali_png(birth_chart_data, user_name=""):
-    """Generate PNG image of South Indian style Kundali chart and return as BytesIO."""
-    
-    planet_abbr = {'Sun': 'Su', 'Moon': 'Mo', 'Mercury': 'Me', 'Venus': 'Ve', 'Mars': 'Ma', 'Jupiter': 'Ju', 'Saturn': 'Sa', 'Rahu': 'Ra', 'Ketu': 'Ke'}
-    
-    # Image dimensions
-    width = 600
-    height = 650
-    cell_size = 120
-    start_x = 60
-    start_y = 100
-    
-    # Create image
-    img = Image.new('RGB', (width, height), 'white')
-    draw = ImageDraw.Draw(img)
-    
-    # Try to use a default font, fallback to basic if not available
-    try:
-        title_font = ImageFont.truetype("arial.ttf", 20)
-        house_font = ImageFont.truetype("arial.ttf", 12)
-        sign_font = ImageFont.truetype("arial.ttf", 14)
-        planet_font = ImageFont.truetype("arial.ttf", 16)
-    except:
-        title_font = ImageFont.load_default()
-        house_font = ImageFont.load_default()
-        sign_font = ImageFont.load_default()
-        planet_font = ImageFont.load_default()
-    
-    # Title
-    title_text = f"Kundali Chart (South Indian Style)"
-    try:
-        title_bbox = draw.textbbox((0, 0), title_text, font=title_font)
-        title_width = title_bbox[2] - title_bbox[0]
-    except:
-        title_width = len(title_text) * 10  # Fallback estimation
-    draw.text(((width - title_width) // 2, 20), title_text, fill='black', font=title_font)
-    
-    # User name
-    if user_name:
-        try:
-            name_bbox = draw.textbbox((0, 0), user_name, font=house_font)
-            name_width = name_bbox[2] - name_bbox[0]
-        except:
-            name_width = len(user_name) * 8  # Fallback estimation
-        draw.text(((width - name_width) // 2, 50), user_name, fill='gray', font=house_font)
-    
-    # Define the 4x4 grid layout
-    house_layout = [
-        [12, 1, 2, 3],      # Row 1
-        [11, -1, -1, 4],    # Row 2 (-1 means empty center cell)
-        [10, -1, -1, 5],    # Row 3
-        [9, 8, 7, 6]        # Row 4
-    ]
-    
-    # Group planets by house
-    houses_with_planets = {}
-    for planet, house_num in birth_chart_data['planet_houses'].items():
-        if house_num not in houses_with_planets:
-            houses_with_planets[house_num] = []
-        houses_with_planets[house_num].append(planet)
-    
-    # Draw the 4x4 grid
-    for row in range(4):
-        for col in range(4):
-            x = start_x + col * cell_size
-            y = start_y + row * cell_size
-            house_num = house_layout[row][col]
-            
-            if house_num == -1:  # Center empty cells
-                # Light gray background for center
-                draw.rectangle([x, y, x + cell_size, y + cell_size], outline='black', fill='#e9ecef', width=2)
-                continue
-            
-            # Draw house cell
-            draw.rectangle([x, y, x + cell_size, y + cell_size], outline='black', fill='#f8f9fa', width=2)
-            
-            # House number (top-left, lighter)
-            draw.text((x + 5, y + 5), str(house_num), fill='#aaa', font=house_font)
-            
-            # Sign number (top-right, blue)
-            sign_num = (birth_chart_data['ascendant_sign_index'] + house_num - 1) % 12 + 1
-            sign_text = str(sign_num)
-            try:
-                sign_bbox = draw.textbbox((0, 0), sign_text, font=sign_font)
-                sign_width = sign_bbox[2] - sign_bbox[0]
-            except:
-                sign_width = len(sign_text) * 10  # Fallback estimation
-            draw.text((x + cell_size - sign_width - 5, y + 5), sign_text, fill='#0066cc', font=sign_font)
-            
-            # Planets (center, red)
-            if house_num in houses_with_planets:
-                planets = houses_with_planets[house_num]
-                planet_texts = [planet_abbr.get(p, p[:2]) for p in planets]
-                
-                if len(planet_texts) == 1:
-                    planet_text = planet_texts[0]
-                    try:
-                        planet_bbox = draw.textbbox((0, 0), planet_text, font=planet_font)
-                        planet_width = planet_bbox[2] - planet_bbox[0]
-                        planet_height = planet_bbox[3] - planet_bbox[1]
-                    except:
-                        planet_width = len(planet_text) * 12
-                        planet_height = 16
-                    draw.text((x + (cell_size - planet_width) // 2, y + (cell_size - planet_height) // 2), 
-                             planet_text, fill='#d63384', font=planet_font)
-                elif len(planet_texts) == 2:
-                    # Two planets - stack vertically
-                    for i, planet_text in enumerate(planet_texts):
-                        try:
-                            planet_bbox = draw.textbbox((0, 0), planet_text, font=planet_font)
-                            planet_width = planet_bbox[2] - planet_bbox[0]
-                        except:
-                            planet_width = len(planet_text) * 12
-                        y_offset = y + 35 + (i * 25)
-                        draw.text((x + (cell_size - planet_width) // 2, y_offset), 
-                                 planet_text, fill='#d63384', font=planet_font)
-                else:
-                    # Multiple planets - stack them
-                    for i, planet_text in enumerate(planet_texts[:3]):
-                        try:
-                            planet_bbox = draw.textbbox((0, 0), planet_text, font=planet_font)
-                            planet_width = planet_bbox[2] - planet_bbox[0]
-                        except:
-                            planet_width = len(planet_text) * 12
-                        y_offset = y + 25 + (i * 20)
-                        draw.text((x + (cell_size - planet_width) // 2, y_offset), 
-                                 planet_text, fill='#d63384', font=planet_font)
-    
-    # Add legend
-    legend_y = start_y + 4 * cell_size + 20
-    legend_texts = [
-        "Chart Layout: House numbers (light gray) in top-left, Sign numbers (blue) in top-right, Planets (red) in center",
-        "Sign Numbers: 1=Aries, 2=Taurus, 3=Gemini, 4=Cancer, 5=Leo, 6=Virgo, 7=Libra, 8=Scorpio, 9=Sagittarius, 10=Capricorn, 11=Aquarius, 12=Pisces",
-        f"Lagna (Ascendant): House 1 = Sign {(birth_chart_data['ascendant_sign_index'] + 1)} ({birth_chart_data['ascendant_sign']})"
-    ]
-    
-    for i, legend_text in enumerate(legend_texts):
-        draw.text((10, legend_y + i * 15), legend_text, fill='gray', font=house_font)
-    
-    # Convert to BytesIO
-    img_buffer = BytesIO()
-    img.save(img_buffer, format='PNG')
-    img_buffer.seek(0)
-    
-    return img_buffer
+    """Return the South Indian style Kundali chart PNG as BytesIO (cached in kundali.png_cache)."""
+    return BytesIO(get_kundali_png(birth_chart_data, user_name))
 
 # === ASTROLOGY ENGINE ===
 class AstrologyEngine:
@@ -554,6 +676,79 @@ class AstrologyEngine:
 
     def generate_monthly_calendar(self, year, month, birth_nakshatra_index):
         """Generate monthly calendar with Tithi, Nakshatra and Tara."""
+        skeleton = stored_month_skeleton(year, month) or self.get_month_skeleton(year, month)
+        return self.apply_tara_overlay(skeleton, birth_nakshatra_index)
+
+    def iter_calendar_days(self, year, month, months, birth_nakshatra_index):
+        """Yield (date, calendar entry) for `months` consecutive months, one month computed at a time."""
+        for i in range(months):
+            y, m = divmod(year * 12 + month - 1 + i, 12)
+            calendar_data = self.generate_monthly_calendar(y, m + 1, birth_nakshatra_index)
+            for day in sorted(calendar_data):
+                # Month data also holds the days its first and last periods spill into
+                if (day.year, day.month) == (y, m + 1):
+                    yield day, calendar_data[day]
+
+    def get_month_skeleton(self, year, month):
+        """Return the cached, user-independent month data for (year, month)."""
+        return month_cache.get_or_compute(
+            (year, month, AYANAMSA), lambda: self.build_month_skeleton(year, month)
+        )
+
+    def apply_tara_overlay(self, skeleton, birth_nakshatra_index):
+        """Apply the Tara relation for a birth nakshatra to a month skeleton."""
+        calendar_data = {}
+        for day, entry in skeleton.items():
+            calendar_data[day] = {
+                "tithi": list(entry["tithi"]),
+                "nakshatra": [
+                    (start_dt_obj, end_dt_obj, name, *get_tara_relation(birth_nakshatra_index, n_index))
+                    for start_dt_obj, end_dt_obj, name, n_index in entry["nakshatra"]
+                ],
+                "raahu_kaal": dict(entry["raahu_kaal"]) if entry["raahu_kaal"] else None,
+            }
+        return calendar_data
+
+    def get_daily_panchang(self, date_obj, latitude, longitude):
+        """Return the cached, user-independent panchang snapshot for a date and location."""
+        lat, lon = quantize(latitude), quantize(longitude)
+        return panchang_cache.get_or_compute(
+            (date_obj, lat, lon, AYANAMSA), lambda: self.build_daily_panchang(date_obj, lat, lon)
+        )
+
+    def build_daily_panchang(self, date_obj, latitude, longitude):
+        """Compute sun times, Raahu Kaal, Tithi, Nakshatra and Sun/Moon positions for one day (no Tara)."""
+        muhurtas = get_muhurtas(date_obj, latitude, longitude)
+        # Tithi, Nakshatra and positions are taken at sunrise (noon IST if the Sun does not rise)
+        sunrise_jd = sun_times.get_jd(date_obj, latitude, longitude)[0]
+        jd = sunrise_jd if sunrise_jd is not None else local_midnight_jd(date_obj) + 0.5
+        tithi_index = get_tithi(jd)
+        nakshatra_index = get_nakshatra(jd)
+        raahu_start, raahu_end = muhurtas["raahu_kaal"]
+        return {
+            'date': date_obj,
+            'lat': latitude,
+            'lon': longitude,
+            'sun_times': {'sunrise': muhurtas["sunrise"], 'sunset': muhurtas["sunset"]},
+            'raahu_kaal': {'start': raahu_start, 'end': raahu_end},
+            'tithi': {'name': get_tithi_name(tithi_index), 'index': tithi_index},
+            'nakshatra': {'name': nakshatras[nakshatra_index], 'index': nakshatra_index},
+            'planetary_positions': {
+                'sun': longitudes.longitude(jd, swe.SUN),
+                'moon': longitudes.longitude(jd, swe.MOON),
+            },
+        }
+
+    def apply_daily_tara(self, snapshot, birth_nakshatra_index):
+        """Return a copy of a daily snapshot with the Tara relation for a birth nakshatra (or None)."""
+        panchang_data = dict(snapshot, tara=None)
+        if birth_nakshatra_index is not None:
+            tara, meaning = get_tara_relation(birth_nakshatra_index, snapshot['nakshatra']['index'])
+            panchang_data['tara'] = {'name': tara, 'meaning': meaning}
+        return panchang_data
+
+    def build_month_spans(self, year, month):
+        """Compute the Tithi and Nakshatra entries of a month skeleton by date (Raahu Kaal left unset)."""
 
         ephe_path = os.path.join(os.path.dirname(__file__), "ephe")
         swe.set_ephe_path(ephe_path)
@@ -564,29 +759,30 @@ class AstrologyEngine:
         next_month = (start_dt + datetime.timedelta(days=32)).replace(day=1)
         jd_end = swe.julday(next_month.year, next_month.month, next_month.day, 0)
 
+        memo_before = longitudes.stats()
+
         # === TITHI ===
         tithi_transitions = []
-        curr_jd = jd_start
-        while curr_jd < jd_end:
-            t_index = get_tithi(curr_jd)
+        for seg_start, seg_end, t_index in transition_index.iter_segments("tithi", jd_start, jd_end):
             t_name = get_tithi_name(t_index)  # Use the proper function
-            next_change = find_transition_jd(curr_jd + 1e-6, get_tithi)
-            tithi_start_dt = jd_to_datetime(curr_jd)
-            tithi_end_dt = jd_to_datetime(next_change)
+            tithi_start_dt = jd_to_datetime(seg_start)
+            tithi_end_dt = jd_to_datetime(seg_end)
             tithi_transitions.append((tithi_start_dt, tithi_end_dt, t_name))
-            curr_jd = next_change + 1e-6
 
         # === NAKSHATRA ===
         nakshatra_transitions = []
-        curr_jd = jd_start
-        while curr_jd < jd_end:
-            n_index = get_nakshatra(curr_jd)
+        for seg_start, seg_end, n_index in transition_index.iter_segments("nakshatra", jd_start, jd_end):
             n_name = nakshatras[n_index]
-            next_change = find_transition_jd(curr_jd + 1e-6, get_nakshatra)
-            nak_start_dt = jd_to_datetime(curr_jd)
-            nak_end_dt = jd_to_datetime(next_change)
+            nak_start_dt = jd_to_datetime(seg_start)
+            nak_end_dt = jd_to_datetime(seg_end)
             nakshatra_transitions.append((nak_start_dt, nak_end_dt, n_name, n_index))
-            curr_jd = next_change + 1e-6
+
+        memo_after = longitudes.stats()
+        logging.debug(
+            f"[CALENDAR] {year}-{month:02d}: "
+            f"{memo_after['misses'] - memo_before['misses']} ephemeris calls, "
+            f"{memo_after['hits'] - memo_before['hits']} longitude memo hits"
+        )
 
         # === ORGANIZE BY DATE ===
         calendar_data = defaultdict(lambda: {"tithi": [], "nakshatra": [], "raahu_kaal": None})
@@ -607,16 +803,23 @@ class AstrologyEngine:
             while current.date() <= end_dt_obj.date():
                 day = current.date()
                 if day not in recorded:
-                    tara_name, tara_meaning = get_tara_relation(birth_nakshatra_index, n_index)
-                    calendar_data[day]["nakshatra"].append((
-                        start_dt_obj, end_dt_obj, name, tara_name, tara_meaning
-                    ))
+                    calendar_data[day]["nakshatra"].append((start_dt_obj, end_dt_obj, name, n_index))
                     recorded.add(day)
                 current += datetime.timedelta(days=1)
 
+        return dict(calendar_data)
+
+    def build_month_skeleton(self, year, month):
+        """Compute Tithi, Nakshatra and Raahu Kaal for a month (no Tara; shared by all users)."""
+        calendar_data = self.build_month_spans(year, month)
+
         # --- RAAHU KAAL ---
-        for day in calendar_data:
-            raahu_start, raahu_end = get_raahu_kaal(day)
+        # One chained sunrise/sunset walk over the (contiguous) calendar days
+        first_day, last_day = min(calendar_data), max(calendar_data)
+        raahu_days = get_kaal_range(first_day, (last_day - first_day).days + 1)
+        for day, raahu_start, raahu_end in raahu_days:
+            if day not in calendar_data:
+                continue
             if raahu_start and raahu_end:
                 calendar_data[day]["raahu_kaal"] = {
                     'start': raahu_start,
@@ -646,159 +849,6 @@ class AstrologyEngine:
 
         return matches
     
-    # Helper: Julian Day to IST datetime
-UTC = datetime.timezone.utc
-IST = zoneinfo.ZoneInfo("Asia/Kolkata")
-def jd_to_ist(jd: float) -> datetime.datetime:
-    y, m, d, h = swe.revjul(jd)
-    hr = int(h)
-    mn = int((h - hr) * 60)
-    sec = int((((h - hr) * 60) - mn) * 60)
-    dt_utc = datetime.datetime(y, m, d, hr, mn, sec, tzinfo=UTC)
-    return dt_utc.astimezone(IST)
-
-# Raahu Kaal constants
-RAAHU_INDEX = {
-    0: 1,  # Mon → 2nd segment (index 1)
-    1: 6,  # Tue → 7th segment (index 6)
-    2: 4,  # Wed → 5th segment (index 4)
-    3: 5,  # Thu → 6th segment (index 5)
-    4: 3,  # Fri → 4th segment (index 3)
-    5: 2,  # Sat → 3rd segment (index 2)
-    6: 7   # Sun → 8th segment (index 7)
-}
-def get_raahu_kaal(date_obj: datetime.date, latitude=28.6139, longitude=77.2090):
-    """
-    Calculate Raahu Kaal timing for a given date and location.
-    Default location is Delhi.
-    """
-    jd0 = swe.julday(date_obj.year, date_obj.month, date_obj.day, 0.0)
-    flags_rise = swe.CALC_RISE | swe.BIT_DISC_CENTER
-    flags_set = swe.CALC_SET | swe.BIT_DISC_CENTER
-    geopos = (longitude, latitude, 0)
-    try:
-        # Find sunrise and sunset for the IST civil date
-        _, rise_t = swe.rise_trans(jd0, swe.SUN, flags_rise, geopos=geopos)
-        _, set_t = swe.rise_trans(jd0, swe.SUN, flags_set, geopos=geopos)
-        rise_jd = rise_t[0]
-        set_jd = set_t[0]
-        sunrise = jd_to_ist(rise_jd)
-        sunset = jd_to_ist(set_jd)
-        # If sunset is before sunrise, get sunset for next day
-        if sunset < sunrise:
-            jd1 = swe.julday(date_obj.year, date_obj.month, date_obj.day + 1, 0.0)
-            _, set_t = swe.rise_trans(jd1, swe.SUN, flags_set, geopos=geopos)
-            set_jd = set_t[0]
-            sunset = jd_to_ist(set_jd)
-        part = (sunset - sunrise) / 8
-        idx = RAAHU_INDEX[date_obj.weekday()]
-        start = sunrise + idx * part
-        end = start + part
-        if end > sunset:
-            end = sunset
-        if end <= start:
-            return None, None
-        return start, end
-    except Exception as e:
-        logging.error(f"Error calculating Raahu Kaal for {date_obj}: {e}")
-        return None, None
-
-def get_gulika_kaal(date_obj, latitude=28.6139, longitude=77.2090):
-    """
-    Calculate Gulika Kaal timing for a given date and location.
-    Default location is Delhi.
-    """
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
-    logging.debug(f"[GULIKA] For {date_obj}: sunrise={sunrise}, sunset={sunset}")
-    if not sunrise or not sunset:
-        return None, None
-    part = (sunset - sunrise) / 8
-    GULIKA_INDEX = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1, 5: 0, 6: 6}
-    idx = GULIKA_INDEX[date_obj.weekday()]
-    start = sunrise + idx * part
-    end = start + part
-    logging.debug(f"[GULIKA] idx={idx}, start={start}, end={end}")
-    if end > sunset:
-        end = sunset
-    if end <= start:
-        return None, None
-    return start, end
-
-def get_yamaganda_kaal(date_obj, latitude=28.6139, longitude=77.2090):
-    """
-    Calculate Yamaganda Kaal timing for a given date and location.
-    Default location is Delhi.
-    """
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
-    logging.debug(f"[YAMAGANDA] For {date_obj}: sunrise={sunrise}, sunset={sunset}")
-    if not sunrise or not sunset:
-        return None, None
-    part = (sunset - sunrise) / 8
-    YAMAGANDA_INDEX = {0: 3, 1: 2, 2: 1, 3: 0, 4: 6, 5: 5, 6: 4}
-    idx = YAMAGANDA_INDEX[date_obj.weekday()]
-    start = sunrise + idx * part
-    end = start + part
-    logging.debug(f"[YAMAGANDA] idx={idx}, start={start}, end={end}")
-    if end > sunset:
-        end = sunset
-    if end <= start:
-        return None, None
-    return start, end
-
-def get_sunrise_sunset(date_obj: datetime.date, latitude=28.6139, longitude=77.2090):
-    """
-    Get sunrise and sunset times for a given date and location.
-    Returns IST datetime objects for the same civil date.
-    """
-    jd = swe.julday(date_obj.year, date_obj.month, date_obj.day, 0.0)
-    flags = swe.CALC_RISE | swe.BIT_DISC_CENTER
-    geopos = (longitude, latitude, 0)
-    try:
-        # Find sunrise for the given date
-        _, rise_t = swe.rise_trans(jd, swe.SUN, flags, geopos=geopos)
-        sunrise = jd_to_ist(rise_t[0])
-        # If sunrise is not on the same civil date, try previous/next day
-        if sunrise.date() != date_obj:
-            # Try previous day
-            jd_prev = swe.julday(date_obj.year, date_obj.month, date_obj.day - 1, 0.0)
-            _, rise_t_prev = swe.rise_trans(jd_prev, swe.SUN, flags, geopos=geopos)
-            sunrise_prev = jd_to_ist(rise_t_prev[0])
-            if sunrise_prev.date() == date_obj:
-                sunrise = sunrise_prev
-            else:
-                # Try next day
-                jd_next = swe.julday(date_obj.year, date_obj.month, date_obj.day + 1, 0.0)
-                _, rise_t_next = swe.rise_trans(jd_next, swe.SUN, flags, geopos=geopos)
-                sunrise_next = jd_to_ist(rise_t_next[0])
-                if sunrise_next.date() == date_obj:
-                    sunrise = sunrise_next
-        # Find sunset for the given date
-        _, set_t = swe.rise_trans(jd, swe.SUN, flags | swe.CALC_SET, geopos=geopos)
-        sunset = jd_to_ist(set_t[0])
-        if sunset.date() != date_obj:
-            # Try previous day
-            jd_prev = swe.julday(date_obj.year, date_obj.month, date_obj.day - 1, 0.0)
-            _, set_t_prev = swe.rise_trans(jd_prev, swe.SUN, flags | swe.CALC_SET, geopos=geopos)
-            sunset_prev = jd_to_ist(set_t_prev[0])
-            if sunset_prev.date() == date_obj:
-                sunset = sunset_prev
-            else:
-                # Try next day
-                jd_next = swe.julday(date_obj.year, date_obj.month, date_obj.day + 1, 0.0)
-                _, set_t_next = swe.rise_trans(jd_next, swe.SUN, flags | swe.CALC_SET, geopos=geopos)
-                sunset_next = jd_to_ist(set_t_next[0])
-                if sunset_next.date() == date_obj:
-                    sunset = sunset_next
-        # Final check: both must be on the same date
-        if sunrise.date() == sunset.date() == date_obj:
-            return sunrise, sunset
-        else:
-            logging.error(f"Sunrise or sunset not found for {date_obj} at {latitude},{longitude}")
-            return None, None
-    except Exception as e:
-        logging.error(f"Error getting sunrise/sunset for {date_obj}: {e}")
-        return None, None
-
 # === INITIALIZE INSTANCES ===
 astro_engine = AstrologyEngine()
 
@@ -837,7 +887,9 @@ class AstrologyPDFGenerator:
     def generate_birth_chart_pdf(self, user, numerology, birth_chart_data, auspicious_matches):
         """Generate birth chart PDF report with embedded PNG chart."""
         buffer = BytesIO()
-        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch)
+        # Reports are cached and served under a hash of their inputs (report_key),
+        # so the bytes must depend on nothing else: no build time, fixed PDF metadata
+        doc = SimpleDocTemplate(buffer, pagesize=A4, topMargin=0.5*inch, invariant=True)
         story = []
         
         # Title
@@ -865,14 +917,12 @@ class AstrologyPDFGenerator:
         story.append(personal_table)
         story.append(Spacer(1, 20))
         
-        # Add Kundali Chart PNG
+        # Add Kundali Chart (vector drawing, no rasterization)
         try:
             story.append(Paragraph("Kundali Chart", self.section_style))
-            chart_img_buffer = generate_kundali_png(birth_chart_data, user.full_name)
-            chart_image = ReportLabImage(chart_img_buffer, width=4*inch, height=4.3*inch)
-            story.append(chart_image)
+            story.append(chart_drawing(birth_chart_data, user.full_name, width=4*inch))
         except Exception as e:
-            logging.error(f"Error adding PNG chart to PDF: {str(e)}")
+            logging.error(f"Error adding Kundali chart to PDF: {str(e)}")
             story.append(Paragraph("Chart visualization not available", self.normal_style))
         
         story.append(Spacer(1, 20))
@@ -978,26 +1028,552 @@ class AstrologyPDFGenerator:
             story.append(Paragraph(remarks_text, self.normal_style))
             story.append(Spacer(1, 20))
         
-        # Footer
-        footer = Paragraph(
-            f"Report generated on {datetime.datetime.now().strftime('%B %d, %Y at %I:%M %p')}",
-            ParagraphStyle('Footer', parent=self.styles['Normal'], fontSize=8, alignment=TA_CENTER)
-        )
-        story.append(footer)
-        
         doc.build(story)
         buffer.seek(0)
         return buffer
+    
+    def stream_calendar_pdf(self, user, year, month, months=1):
+        """Yield the calendar PDF for `months` months from year/month, page by page (see calendar_pdf.py)."""
+        birth_nakshatra_index = nakshatras.index(user.birth_nakshatra)
+        days = astro_engine.iter_calendar_days(year, month, months, birth_nakshatra_index)
+        pages = iter_calendar_pages(days, user.full_name, user.birth_nakshatra)
+        return iter_pdf(pages, title=f"Panchang Calendar - {user.full_name}")
 
 # === INITIALIZE PDF GENERATOR ===
 pdf_generator = AstrologyPDFGenerator()
 
+# === BIRTH CHART STORE ===
+def calculate_profile(full_name, birth_date, birth_time, birth_latitude, birth_longitude, birth_timezone, **details):
+    """
+    Resolve the birth timezone and calculate numerology and the birth chart
+    for a new profile (birth_time is HH:MM:SS). Returns (user_columns,
+    birth_chart_data); used by create_user and the bulk import.
+    """
+    # Auto-detect timezone from coordinates if not manually set
+    if birth_latitude and birth_longitude:
+        auto_timezone = get_timezone_from_coordinates(birth_latitude, birth_longitude)
+        if auto_timezone and auto_timezone != 'UTC':
+            birth_timezone = auto_timezone
+    birth_datetime = datetime.datetime.combine(birth_date, datetime.datetime.strptime(birth_time, '%H:%M:%S').time())
+    birth_datetime_local = birth_datetime.replace(tzinfo=zoneinfo.ZoneInfo(birth_timezone))
+    numerology = astro_engine.calculate_numerology(full_name, birth_datetime_local)
+    birth_chart_data = astro_engine.calculate_birth_chart(
+        birth_datetime_local, lat=birth_latitude, lon=birth_longitude
+    )
+    user_columns = dict(
+        details,
+        full_name=full_name,
+        birth_date=datetime.datetime.combine(birth_date, datetime.time()),
+        birth_time=birth_time,
+        birth_latitude=birth_latitude,
+        birth_longitude=birth_longitude,
+        birth_timezone=birth_timezone,
+        sun_longitude=birth_chart_data['planet_positions']['Sun'],
+        moon_longitude=birth_chart_data['planet_positions']['Moon'],
+        ascendant=birth_chart_data['ascendant'],
+        birth_nakshatra=birth_chart_data['birth_nakshatra'],
+        birth_tithi=birth_chart_data['birth_tithi_name'],
+        **numerology
+    )
+    return user_columns, birth_chart_data
+
+def get_user_numerology(user):
+    """Return the user's stored numerology numbers, calculating them if missing."""
+    return user.get_numerology() or astro_engine.calculate_numerology(
+        user.full_name, user.get_birth_datetime_local()
+    )
+
+def get_birth_chart_data(user, birth_chart_record):
+    """
+    Return the calculate_birth_chart result for user from its BirthChart row,
+    recalculating (and updating the row) only when its stamp is stale.
+    """
+    if birth_chart_record.is_current():
+        return birth_chart_record.to_chart_data(user.birth_latitude, user.birth_longitude)
+    app.logger.info(f"Recalculating stale birth chart for user {user.id} ({birth_chart_record.calc_version})")
+    birth_chart_data = astro_engine.calculate_birth_chart(
+        user.get_birth_datetime_local(), lat=user.birth_latitude, lon=user.birth_longitude
+    )
+    birth_chart_record.store_chart_data(birth_chart_data)
+    db.session.commit()
+    return birth_chart_data
+
+def get_user_chart_data(user):
+    """Return the user's chart from the stored row, or calculate it if the user has none."""
+    birth_chart_record = BirthChart.query.filter_by(user_id=user.id).first()
+    if birth_chart_record:
+        return get_birth_chart_data(user, birth_chart_record)
+    return astro_engine.calculate_birth_chart(
+        user.get_birth_datetime_local(), lat=user.birth_latitude, lon=user.birth_longitude
+    )
+
+def backfill_birth_charts(batch_size=500):
+    """
+    Calculate and store charts for users whose BirthChart row is missing or
+    stale, committing every batch_size users. Returns the number updated.
+    """
+    updated = 0
+    last_id = 0
+    while True:
+        users = (User.query.filter(User.id > last_id)
+                 .order_by(User.id).limit(batch_size).all())
+        if not users:
+            break
+        records = {
+            record.user_id: record
+            for record in BirthChart.query.filter(BirthChart.user_id.in_([u.id for u in users]))
+        }
+        for user in users:
+            record = records.get(user.id)
+            if record is not None and record.is_current():
+                continue
+            if record is None:
+                record = BirthChart(user_id=user.id)
+                db.session.add(record)
+            record.store_chart_data(astro_engine.calculate_birth_chart(
+                user.get_birth_datetime_local(), lat=user.birth_latitude, lon=user.birth_longitude
+            ))
+            updated += 1
+        db.session.commit()
+        last_id = users[-1].id
+    return updated
+
+@app.cli.command("backfill-charts")
+def backfill_charts_command():
+    """Store current birth charts for every user (run after upgrading)."""
+    started = time.time()
+    updated = backfill_birth_charts()
+    click.echo(f"Updated {updated} birth charts in {time.time() - started:.1f}s")
+
+# === PDF REPORT CACHE ===
+def report_key(user):
+    """Content hash of everything the birth chart PDF shows for user."""
+    parts = (
+        REPORT_VERSION, RENDERER_VERSION, CHART_VERSION,
+        user.full_name, user.birth_date.date().isoformat(), user.birth_time,
+        user.birth_city, user.birth_country, user.birth_latitude, user.birth_longitude,
+        user.birth_timezone, user.pythagorean_expression, user.chaldean_expression,
+        user.driver_number, user.conductor_number, user.remarks,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()[:32]
+
+def build_birth_chart_report(user_id):
+    """Render the birth chart PDF for user_id from its stored chart and return the bytes."""
+    with app.app_context():
+        user = db.session.get(User, user_id)
+        birth_chart_record = BirthChart.query.filter_by(user_id=user_id).first()
+        numerology = get_user_numerology(user)
+        birth_chart_data = get_birth_chart_data(user, birth_chart_record)
+        auspicious_matches = astro_engine.check_auspicious_matches(
+            numerology,
+            birth_chart_data['house2_sign_num'],
+            birth_chart_data['house11_sign_num']
+        )
+        return pdf_generator.generate_birth_chart_pdf(
+            user, numerology, birth_chart_data, auspicious_matches
+        ).getvalue()
+
+def prefetch_birth_chart_report(user):
+    """Queue a background build of the user's current report."""
+    report_cache.prefetch(user.id, report_key(user), functools.partial(build_birth_chart_report, user.id))
+
+# === BULK USER IMPORT ===
+def _init_pool_worker():
+    """Pool initializer (imports, panchang precompute): reopen file-backed state a forked worker shares with its parent."""
+    global tf
+    swe.close()
+    swe.set_ephe_path(ephe_path)
+    swe.set_sid_mode(AYANAMSA)
+    tf = TimezoneFinder()
+
+def _compute_import_chunk(rows):
+    """
+    Pool worker: return [(row_number, (user_columns, chart_columns) or error)]
+    for validated (row_number, row) pairs, using create_user's rules.
+    """
+    results = []
+    for number, row in rows:
+        try:
+            user_columns, birth_chart_data = calculate_profile(**row)
+            results.append((number, (user_columns, BirthChart.chart_columns(birth_chart_data))))
+        except (ValueError, KeyError, swe.Error, zoneinfo.ZoneInfoNotFoundError) as e:
+            results.append((number, e))
+    return results
+
+def _write_import_chunk(results, report):
+    """Insert one computed chunk of users and birth charts in a single transaction."""
+    rows = []
+    for number, result in results:
+        if isinstance(result, Exception):
+            add_error(report, number, result)
+        else:
+            rows.append((number, result))
+    if not rows:
+        return
+    try:
+        user_ids = db.session.execute(
+            insert(User).returning(User.id, sort_by_parameter_order=True),
+            [user_columns for _, (user_columns, _) in rows]
+        ).scalars().all()
+        db.session.execute(insert(BirthChart), [
+            dict(chart_columns, user_id=user_id)
+            for user_id, (_, (_, chart_columns)) in zip(user_ids, rows)
+        ])
+        db.session.commit()
+        report['imported'] += len(rows)
+    except SQLAlchemyError as e:
+        db.session.rollback()
+        app.logger.error(f"Import chunk failed: {e}")
+        for number, _ in rows:
+            add_error(report, number, f"Database error: {e.__class__.__name__}")
+    except Exception:
+        db.session.rollback()
+        raise
+
+def import_users(stream, fmt, workers=IMPORT_WORKERS, chunk_size=IMPORT_CHUNK_SIZE):
+    """Import users from a CSV/JSON/NDJSON text stream. Returns the user_import report."""
+    report = run_import(iter_records(stream, fmt), _compute_import_chunk, _write_import_chunk,
+                        workers=workers, chunk_size=chunk_size, initializer=_init_pool_worker)
+    app.logger.info(f"Imported {report['imported']}/{report['rows']} users in {report['seconds']}s "
+                    f"({report['rows_per_second']} rows/s, {report['failed']} failed)")
+    return report
+
+@app.cli.command("import-users")
+@click.argument("path", type=click.Path(exists=True, dir_okay=False))
+@click.option("--format", "fmt", type=click.Choice(["csv", "json", "ndjson"]), help="Defaults to the file extension.")
+@click.option("--workers", type=int, default=IMPORT_WORKERS, show_default=True)
+@click.option("--chunk-size", type=int, default=IMPORT_CHUNK_SIZE, show_default=True)
+def import_users_command(path, fmt, workers, chunk_size):
+    """Bulk import users (with birth charts) from a CSV, JSON or NDJSON file."""
+    fmt = detect_format(path, fmt)
+    with open(path, encoding="utf-8-sig", newline="") as fh:
+        report = import_users(fh, fmt, workers, chunk_size)
+    for error in report['errors']:
+        click.echo(f"row {error['row']}: {error['error']}")
+    if report['input_error']:
+        click.echo(report['input_error'])
+    click.echo(f"Imported {report['imported']} of {report['rows']} rows in {report['seconds']}s "
+               f"({report['rows_per_second']} rows/s); {report['failed']} failed")
+
+# === DAILY PANCHANG STORE ===
+def parse_panchang_locations(spec):
+    """{location_id: (lat, lon)} from "id=lat,lon;..."; coordinates are snapped to the sun-times grid."""
+    locations = {}
+    for item in filter(None, (part.strip() for part in spec.split(';'))):
+        location_id, coords = item.split('=', 1)
+        lat, lon = (float(value) for value in coords.split(','))
+        locations[location_id.strip()] = (quantize(lat), quantize(lon))
+    return locations
+
+panchang_locations = parse_panchang_locations(PANCHANG_LOCATIONS)
+_panchang_location_ids = {coords: location_id for location_id, coords in panchang_locations.items()}
+
+def panchang_location_id(lat, lon):
+    """Id of the configured location on the same sun-times grid cell as (lat, lon), or None."""
+    return _panchang_location_ids.get((quantize(lat), quantize(lon)))
+
+def load_daily_panchang(lat, lon, start_date, end_date):
+    """Current stored rows for a location as {date: DailyPanchang}, start_date..end_date inclusive."""
+    location_id = panchang_location_id(lat, lon)
+    if location_id is None:
+        return {}
+    rows = DailyPanchang.query.filter(
+        DailyPanchang.location_id == location_id,
+        DailyPanchang.date.between(start_date, end_date),
+        DailyPanchang.calc_version == PANCHANG_VERSION,
+    )
+    return {row.date: row for row in rows}
+
+def stored_daily_panchang(date_obj, lat, lon):
+    """The stored row for one day and location, or None."""
+    return load_daily_panchang(lat, lon, date_obj, date_obj).get(date_obj)
+
+def stored_month_skeleton(year, month):
+    """
+    Month skeleton from the stored rows of the calendar's location (Delhi),
+    or None unless every day of the month is stored. The rows hold the
+    entries of the live skeleton, so the result equals get_month_skeleton,
+    including the days after the month that its last periods spill into.
+    """
+    first_day = datetime.date(year, month, 1)
+    last_day = datetime.date(year, month, calendar.monthrange(year, month)[1])
+    rows = load_daily_panchang(astro_engine.default_lat, astro_engine.default_lon, first_day, last_day)
+    if len(rows) < last_day.day:
+        return None
+    skeleton = {day: rows[day].skeleton_entry() for day in sorted(rows)}
+    skeleton.update(rows[last_day].spill_entries())
+    return skeleton
+
+def get_day_muhurtas(date_obj, lat, lon):
+    """get_muhurtas in TIMINGS_SUN_MODE for the timings pages and API, from the store when it holds the same values."""
+    if TIMINGS_USE_STORE:
+        row = stored_daily_panchang(date_obj, lat, lon)
+        if row is not None:
+            return row.muhurtas()
+    return get_muhurtas(date_obj, lat, lon, TIMINGS_SUN_MODE)
+
+def _naive_ist(value):
+    return value.astimezone(IST).replace(tzinfo=None) if value is not None else None
+
+def _spans_json(entries):
+    """JSON form of month skeleton Tithi / Nakshatra entries (naive IST times)."""
+    return [[_naive_ist(start).isoformat(), _naive_ist(end).isoformat(), *rest] for start, end, *rest in entries]
+
+def build_daily_panchang_rows(location_id, lat, lon, year, month):
+    """
+    DailyPanchang column dicts for every day of a month. Tithi and Nakshatra
+    entries come from the same walk as the live month skeleton (the first
+    period starts at the month's start), and the last day also stores the
+    entries of the days after the month that the skeleton spills into.
+    """
+    spans = astro_engine.build_month_spans(year, month)
+    dates = [datetime.date(year, month, day) for day in range(1, calendar.monthrange(year, month)[1] + 1)]
+
+    spill_days = {}
+    for day in sorted(spans):
+        if day > dates[-1]:
+            raahu_start, raahu_end = get_muhurtas(day, lat, lon)['raahu_kaal']
+            spill_days[day.isoformat()] = {
+                'tithi': _spans_json(spans[day]["tithi"]),
+                'nakshatra': _spans_json(spans[day]["nakshatra"]),
+                'raahu_kaal': ([_naive_ist(raahu_start).isoformat(), _naive_ist(raahu_end).isoformat()]
+                               if raahu_start and raahu_end else None),
+            }
+
+    rows = []
+    for date_obj in dates:
+        muhurtas = get_muhurtas(date_obj, lat, lon)
+        snapshot = astro_engine.build_daily_panchang(date_obj, lat, lon)
+        rows.append({
+            'location_id': location_id,
+            'date': date_obj,
+            'latitude': lat,
+            'longitude': lon,
+            'sunrise': _naive_ist(muhurtas['sunrise']),
+            'sunset': _naive_ist(muhurtas['sunset']),
+            'next_sunrise': _naive_ist(muhurtas['next_sunrise']),
+            'raahu_start': _naive_ist(muhurtas['raahu_kaal'][0]),
+            'raahu_end': _naive_ist(muhurtas['raahu_kaal'][1]),
+            'gulika_start': _naive_ist(muhurtas['gulika_kaal'][0]),
+            'gulika_end': _naive_ist(muhurtas['gulika_kaal'][1]),
+            'yamaganda_start': _naive_ist(muhurtas['yamaganda_kaal'][0]),
+            'yamaganda_end': _naive_ist(muhurtas['yamaganda_kaal'][1]),
+            'tithi_spans': json.dumps(_spans_json(spans[date_obj]["tithi"])),
+            'nakshatra_spans': json.dumps(_spans_json(spans[date_obj]["nakshatra"])),
+            'spill_days': json.dumps(spill_days) if date_obj == dates[-1] else None,
+            'sunrise_tithi_index': snapshot['tithi']['index'],
+            'sunrise_nakshatra_index': snapshot['nakshatra']['index'],
+            'sun_longitude': snapshot['planetary_positions']['sun'],
+            'moon_longitude': snapshot['planetary_positions']['moon'],
+            'calc_version': PANCHANG_VERSION,
+        })
+    return rows
+
+def _compute_panchang_month(task):
+    """Pool worker: the rows of one (location_id, lat, lon, year, month) task."""
+    return build_daily_panchang_rows(*task)
+
+def _stored_month_complete(location_id, year, month):
+    days = calendar.monthrange(year, month)[1]
+    stored = DailyPanchang.query.filter(
+        DailyPanchang.location_id == location_id,
+        DailyPanchang.date.between(datetime.date(year, month, 1), datetime.date(year, month, days)),
+        DailyPanchang.calc_version == PANCHANG_VERSION,
+    ).count()
+    return stored == days
+
+def _write_panchang_month(rows):
+    """Replace the stored rows of one location and month in a single transaction."""
+    DailyPanchang.query.filter(
+        DailyPanchang.location_id == rows[0]['location_id'],
+        DailyPanchang.date.between(rows[0]['date'], rows[-1]['date']),
+    ).delete(synchronize_session=False)
+    db.session.execute(insert(DailyPanchang), rows)
+    db.session.commit()
+
+def precompute_daily_panchang(location_ids, years, workers=PANCHANG_WORKERS, force=False):
+    """
+    Fill DailyPanchang for the locations and years, one month per task and
+    transaction. Months already stored at the current PANCHANG_VERSION are
+    skipped unless force, so an interrupted run resumes where it stopped.
+    Returns (months written, months skipped).
+    """
+    tasks, skipped = [], 0
+    for location_id in location_ids:
+        lat, lon = panchang_locations[location_id]
+        for year in years:
+            for month in range(1, 13):
+                if not force and _stored_month_complete(location_id, year, month):
+                    skipped += 1
+                else:
+                    tasks.append((location_id, lat, lon, year, month))
+    written = 0
+    pool = ProcessPoolExecutor(max_workers=workers, initializer=_init_pool_worker) if workers > 1 else None
+    try:
+        for rows in (pool.map if pool else map)(_compute_panchang_month, tasks):
+            _write_panchang_month(rows)
+            written += 1
+            app.logger.info(f"Stored panchang {rows[0]['location_id']} {rows[0]['date']:%Y-%m} ({written}/{len(tasks)})")
+    finally:
+        if pool:
+            pool.shutdown(cancel_futures=True)
+    return written, skipped
+
+@app.cli.command("precompute-panchang")
+@click.option("--year", "years", type=int, multiple=True, required=True, help="Repeat for several years.")
+@click.option("--location", "locations", multiple=True,
+              help="Location id from PANCHANG_LOCATIONS; repeat for several. Defaults to all.")
+@click.option("--workers", type=int, default=PANCHANG_WORKERS, show_default=True)
+@click.option("--force", is_flag=True, help="Recompute months that are already stored.")
+def precompute_panchang_command(years, locations, workers, force):
+    """Materialize daily panchang rows for configured locations and years."""
+    unknown = [location_id for location_id in locations if location_id not in panchang_locations]
+    if unknown:
+        raise click.BadParameter(f"{', '.join(unknown)} not in PANCHANG_LOCATIONS "
+                                 f"({', '.join(panchang_locations)})", param_hint="--location")
+    started = time.time()
+    written, skipped = precompute_daily_panchang(locations or list(panchang_locations), sorted(set(years)),
+                                                 workers=workers, force=force)
+    click.echo(f"Stored {written} months, skipped {skipped} already current, in {time.time() - started:.1f}s.")
+
+# === USER LIST ===
+# Columns shown in the home page list
+USER_LIST_COLUMNS = (User.id, User.full_name, User.birth_date, User.birth_time,
+                     User.birth_city, User.birth_nakshatra, User.created_at)
+
+def encode_user_cursor(user):
+    """Keyset cursor pointing just past a user in the newest-first list."""
+    return f"{user.created_at.isoformat()}_{user.id}"
+
+def decode_user_cursor(cursor):
+    """(created_at, id) from a cursor; raises ValueError if malformed."""
+    created_at, user_id = cursor.rsplit('_', 1)
+    return datetime.datetime.fromisoformat(created_at), int(user_id)
+
+def list_users_page(cursor=None, limit=USERS_PAGE_SIZE):
+    """
+    One page of users, newest first, and the cursor of the next page (None
+    on the last). Each page is an index range scan on (created_at, id), so
+    its cost does not depend on how many users exist.
+    """
+    query = User.query.options(load_only(*USER_LIST_COLUMNS))
+    if cursor:
+        query = query.filter(tuple_(User.created_at, User.id) < decode_user_cursor(cursor))
+    users = query.order_by(User.created_at.desc(), User.id.desc()).limit(limit + 1).all()
+    next_cursor = encode_user_cursor(users[limit - 1]) if len(users) > limit else None
+    return users[:limit], next_cursor
+
+def search_users(query, limit=USER_SEARCH_LIMIT):
+    """Users whose name or birth city match the typed text, best match first."""
+    user_ids = search_user_ids(db.session, query, limit, use_fts=user_search_fts)
+    if not user_ids:
+        return []
+    users = {user.id: user for user in
+             User.query.options(load_only(*USER_LIST_COLUMNS)).filter(User.id.in_(user_ids))}
+    return [users[user_id] for user_id in user_ids if user_id in users]
+
+# === BACKGROUND JOBS ===
+def _export_filename(user, prefix, ext, suffix=""):
+    return f'{prefix}_{user.full_name.replace(" ", "_")}{suffix}.{ext}'
+
+def _job_user(user_id):
+    """The user a job exports; a deleted user fails the job without retries."""
+    user = db.session.get(User, user_id)
+    if user is None:
+        raise PermanentJobError(f"User {user_id} not found")
+    return user
+
+def _birth_chart_pdf_job(user_id):
+    """Job handler: the cached birth chart PDF report."""
+    user = _job_user(user_id)
+    def read(path):
+        with open(path, 'rb') as fh:
+            return fh.read()
+    data = report_cache.use_or_build(
+        user.id, report_key(user), functools.partial(build_birth_chart_report, user.id), read
+    )
+    return data, 'application/pdf', _export_filename(user, 'birth_chart', 'pdf')
+
+def _calendar_pdf_job(user_id, year, month, months=1):
+    """Job handler: the calendar PDF for `months` months."""
+    user = _job_user(user_id)
+    data = b''.join(pdf_generator.stream_calendar_pdf(user, year, month, months))
+    return data, 'application/pdf', _export_filename(user, 'calendar', 'pdf', f'_{year}_{month}_{months}m')
+
+def _kundali_png_job(user_id):
+    """Job handler: the Kundali chart PNG."""
+    user = _job_user(user_id)
+    return (get_kundali_png(get_user_chart_data(user), user.full_name), 'image/png',
+            _export_filename(user, 'kundali_chart', 'png'))
+
+job_queue = JobQueue(app, db, Job, JOB_RESULTS_DIR, workers=JOB_WORKERS,
+                     max_depth=JOB_QUEUE_MAX, retention_hours=JOB_RETENTION_HOURS)
+job_queue.register('birth_chart_pdf', _birth_chart_pdf_job)
+job_queue.register('calendar_pdf', _calendar_pdf_job)
+job_queue.register('kundali_png', _kundali_png_job)
+
+def _import_users_job(path, fmt):
+    """
+    Job handler: bulk import an uploaded file; the result is the JSON import
+    report. Runs on the job worker thread without a process pool, so nothing
+    is forked from the server process. Not retried: chunks already stored
+    would be imported twice. For the same reason an import interrupted by a
+    restart fails instead of running again (see JobQueue.start).
+    """
+    try:
+        with open(path, encoding="utf-8-sig", newline="") as fh:
+            report = import_users(fh, fmt, workers=1)
+    finally:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+    return json.dumps(report).encode(), 'application/json', 'import_report.json'
+
+job_queue.register('user_import', _import_users_job, max_attempts=1)
+
+def _job_json(job):
+    payload = job_queue.to_json(job)
+    payload['status_url'] = url_for('job_status', job_id=job.id)
+    if job.status == DONE:
+        payload['result_url'] = url_for('job_result', job_id=job.id)
+    return payload
+
+def _submit_export_job(kind, **params):
+    """Queue an export and answer 202 with its status URL (or 503 if the queue is full)."""
+    try:
+        job = job_queue.submit(kind, params)
+    except QueueFull as e:
+        response = jsonify({'error': f'Export queue is full: {e}'})
+        response.headers['Retry-After'] = '30'
+        return response, 503
+    response = jsonify(_job_json(job))
+    response.headers['Location'] = url_for('job_status', job_id=job.id)
+    return response, 202
+
 # === FLASK ROUTES ===
+@app.before_request
+def reset_request_counters():
+    sun_times.start_request()
+
+@app.after_request
+def report_request_counters(response):
+    """Log and expose how many rise_trans calls this request made."""
+    calls = sun_times.request_calls()
+    if calls:
+        logging.debug(f"[SUN_TIMES] {request.path}: {calls} rise_trans calls")
+    response.headers['X-Sun-Times-Calls'] = str(calls)
+    return response
+
 @app.route('/')
 def index():
     """Home page with user selection and new user form."""
-    users = User.query.order_by(User.created_at.desc()).all()
-    return render_template('index.html', users=users)
+    cursor = request.args.get('cursor')
+    try:
+        users, next_cursor = list_users_page(cursor)
+    except ValueError:
+        return redirect(url_for('index'))
+    return render_template('index.html', users=users, next_cursor=next_cursor, paged=bool(cursor))
 
 @app.route('/create_user', methods=['POST'])
 def create_user():
@@ -1020,83 +1596,30 @@ def create_user():
             flash('All required fields must be filled.', 'error')
             return redirect(url_for('index'))
         
-        # Auto-detect timezone from coordinates if not manually set
-        if birth_latitude and birth_longitude:
-            auto_timezone = get_timezone_from_coordinates(birth_latitude, birth_longitude)
-            if auto_timezone and auto_timezone != 'UTC':
-                birth_timezone = auto_timezone
-                app.logger.info(f"Auto-detected timezone: {birth_timezone}")
-        
         # Parse birth date and time
         birth_date = datetime.datetime.strptime(birth_date_str, '%Y-%m-%d').date()
-        birth_time = datetime.datetime.strptime(birth_time_str, '%H:%M').time()
+        birth_time = datetime.datetime.strptime(birth_time_str, '%H:%M').strftime('%H:%M:%S')
         
-        # Create birth datetime in specified timezone
-        birth_datetime = datetime.datetime.combine(birth_date, birth_time)
-        local_tz = zoneinfo.ZoneInfo(birth_timezone)
-        birth_datetime_local = birth_datetime.replace(tzinfo=local_tz)
-        
-        app.logger.info("Calculating numerology")
-        # Calculate numerology
-        numerology = astro_engine.calculate_numerology(full_name, birth_datetime_local)
-        
-        app.logger.info("Calculating birth chart")
-        # Calculate birth chart with location
-        birth_chart_data = astro_engine.calculate_birth_chart(
-            birth_datetime_local, lat=birth_latitude, lon=birth_longitude
+        app.logger.info("Calculating numerology and birth chart")
+        # Timezone auto-detection, numerology and birth chart with location
+        user_columns, birth_chart_data = calculate_profile(
+            full_name, birth_date, birth_time, birth_latitude, birth_longitude, birth_timezone,
+            birth_city=birth_city, birth_country=birth_country
         )
         
         # Create user
-        user = User()
-        user.full_name = full_name
-        user.birth_date = birth_date
-        user.birth_time = birth_time_str + ":00"
-        user.birth_city = birth_city
-        user.birth_country = birth_country
-        user.birth_latitude = birth_latitude
-        user.birth_longitude = birth_longitude
-        user.birth_timezone = birth_timezone
-        user.pythagorean_expression = numerology['pythagorean_expression']
-        user.chaldean_expression = numerology['chaldean_expression']
-        user.driver_number = numerology['driver_number']
-        user.conductor_number = numerology['conductor_number']
-        user.sun_longitude = birth_chart_data['planet_positions']['Sun']
-        user.moon_longitude = birth_chart_data['planet_positions']['Moon']
-        user.ascendant = birth_chart_data['ascendant']
-        user.birth_nakshatra = birth_chart_data['birth_nakshatra']
-        user.birth_tithi = birth_chart_data['birth_tithi_name']  # Use proper name
-        
+        user = User(**user_columns)
         db.session.add(user)
         db.session.flush()  # Get user ID
         
         # Create birth chart record
         birth_chart = BirthChart()
         birth_chart.user_id = user.id
-        birth_chart.sun_position = birth_chart_data['planet_positions']['Sun']
-        birth_chart.moon_position = birth_chart_data['planet_positions']['Moon']
-        birth_chart.mercury_position = birth_chart_data['planet_positions']['Mercury']
-        birth_chart.venus_position = birth_chart_data['planet_positions']['Venus']
-        birth_chart.mars_position = birth_chart_data['planet_positions']['Mars']
-        birth_chart.jupiter_position = birth_chart_data['planet_positions']['Jupiter']
-        birth_chart.saturn_position = birth_chart_data['planet_positions']['Saturn']
-        birth_chart.rahu_position = birth_chart_data['planet_positions']['Rahu']
-        birth_chart.ketu_position = birth_chart_data['planet_positions']['Ketu']
-        birth_chart.sun_house = birth_chart_data['planet_houses']['Sun']
-        birth_chart.moon_house = birth_chart_data['planet_houses']['Moon']
-        birth_chart.mercury_house = birth_chart_data['planet_houses']['Mercury']
-        birth_chart.venus_house = birth_chart_data['planet_houses']['Venus']
-        birth_chart.mars_house = birth_chart_data['planet_houses']['Mars']
-        birth_chart.jupiter_house = birth_chart_data['planet_houses']['Jupiter']
-        birth_chart.saturn_house = birth_chart_data['planet_houses']['Saturn']
-        birth_chart.rahu_house = birth_chart_data['planet_houses']['Rahu']
-        birth_chart.ketu_house = birth_chart_data['planet_houses']['Ketu']
-        birth_chart.ascendant_degree = birth_chart_data['ascendant']
-        birth_chart.ascendant_sign = birth_chart_data['ascendant_sign']
-        birth_chart.house2_sign = birth_chart_data['house2_sign']
-        birth_chart.house11_sign = birth_chart_data['house11_sign']
+        birth_chart.store_chart_data(birth_chart_data)
         
         db.session.add(birth_chart)
         db.session.commit()
+        prefetch_birth_chart_report(user)
         
         flash(f'User {full_name} created successfully!', 'success')
         return redirect(url_for('birth_chart', user_id=user.id))
@@ -1126,12 +1649,8 @@ def birth_chart(user_id):
             flash('Birth chart not found. Please recalculate.', 'error')
             return redirect(url_for('index'))
         
-        # Recalculate for display
-        birth_datetime_local = user.get_birth_datetime_local()
-        numerology = astro_engine.calculate_numerology(user.full_name, birth_datetime_local)
-        birth_chart_data = astro_engine.calculate_birth_chart(
-            birth_datetime_local, lat=user.birth_latitude, lon=user.birth_longitude
-        )
+        numerology = get_user_numerology(user)
+        birth_chart_data = get_birth_chart_data(user, birth_chart_record)
         
         # Check auspicious matches
         auspicious_matches = astro_engine.check_auspicious_matches(
@@ -1144,6 +1663,7 @@ def birth_chart(user_id):
                              user=user, 
                              numerology=numerology,
                              birth_chart_data=birth_chart_data,
+                             kundali_svg=render_svg(birth_chart_data, frame_text=False),
                              auspicious_matches=auspicious_matches,
                              birth_chart_record=birth_chart_record)
     except Exception as e:
@@ -1156,12 +1676,9 @@ def download_chart_png(user_id):
     """Download Kundali chart as PNG image."""
     try:
         user = User.query.get_or_404(user_id)
-        
-        # Recalculate birth chart data
-        birth_datetime_local = user.get_birth_datetime_local()
-        birth_chart_data = astro_engine.calculate_birth_chart(
-            birth_datetime_local, lat=user.birth_latitude, lon=user.birth_longitude
-        )
+        if request.args.get('async'):
+            return _submit_export_job('kundali_png', user_id=user.id)
+        birth_chart_data = get_user_chart_data(user)
         
         # Generate PNG image
         chart_img_buffer = generate_kundali_png(birth_chart_data, user.full_name)
@@ -1177,6 +1694,24 @@ def download_chart_png(user_id):
         flash(f'Error generating PNG chart: {str(e)}', 'error')
         return redirect(url_for('birth_chart', user_id=user_id))
 
+@app.route('/download_chart_svg/<int:user_id>')
+def download_chart_svg(user_id):
+    """Download Kundali chart as SVG."""
+    try:
+        user = User.query.get_or_404(user_id)
+        birth_chart_data = get_user_chart_data(user)
+        
+        response = make_response(render_svg(birth_chart_data, user.full_name))
+        response.headers['Content-Type'] = 'image/svg+xml; charset=utf-8'
+        response.headers['Content-Disposition'] = f'attachment; filename=kundali_chart_{user.full_name.replace(" ", "_")}.svg'
+        
+        return response
+        
+    except Exception as e:
+        app.logger.error(f"SVG generation error for user {user_id}: {str(e)}")
+        flash(f'Error generating SVG chart: {str(e)}', 'error')
+        return redirect(url_for('birth_chart', user_id=user_id))
+
 @app.route('/calendar/<int:user_id>')
 def calendar_view(user_id):
     user = User.query.get_or_404(user_id)
@@ -1228,13 +1763,19 @@ def update_remarks(user_id):
     
     user.remarks = remarks
     db.session.commit()
+    report_cache.invalidate_user(user_id)
+    prefetch_birth_chart_report(user)
     
     flash('Remarks updated successfully!', 'success')
     return redirect(url_for('birth_chart', user_id=user_id))
 
 @app.route('/download_birth_chart/<int:user_id>')
 def download_birth_chart(user_id):
-    """Download birth chart as PDF."""
+    """
+    Download birth chart as PDF. Reports are cached on disk under a hash of
+    their inputs, which is also the ETag; repeat downloads are answered with
+    304 and resumed downloads with 206 (Range) without re-rendering.
+    """
     user = User.query.get_or_404(user_id)
     birth_chart_record = BirthChart.query.filter_by(user_id=user_id).first()
     
@@ -1242,44 +1783,59 @@ def download_birth_chart(user_id):
         flash('Birth chart not found.', 'error')
         return redirect(url_for('index'))
     
-    # Recalculate data for PDF
-    birth_datetime_local = user.get_birth_datetime_local()
-    numerology = astro_engine.calculate_numerology(user.full_name, birth_datetime_local)
-    birth_chart_data = astro_engine.calculate_birth_chart(
-        birth_datetime_local, lat=user.birth_latitude, lon=user.birth_longitude
-    )
+    if request.args.get('async'):
+        return _submit_export_job('birth_chart_pdf', user_id=user.id)
     
-    auspicious_matches = astro_engine.check_auspicious_matches(
-        numerology, 
-        birth_chart_data['house2_sign_num'], 
-        birth_chart_data['house11_sign_num']
-    )
+    etag = report_key(user)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = 'private, no-cache'
+        return response
     
-    # Generate PDF
-    pdf_buffer = pdf_generator.generate_birth_chart_pdf(
-        user, numerology, birth_chart_data, auspicious_matches
+    # send_file opens the file before returning, so a later eviction cannot cut the download short
+    response = report_cache.use_or_build(
+        user.id, etag, functools.partial(build_birth_chart_report, user.id),
+        functools.partial(
+            send_file, mimetype='application/pdf', as_attachment=True,
+            download_name=f'birth_chart_{user.full_name.replace(" ", "_")}.pdf',
+            etag=etag, conditional=True
+        )
     )
-    
-    response = make_response(pdf_buffer.read())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=birth_chart_{user.full_name.replace(" ", "_")}.pdf'
-    
+    response.headers['Cache-Control'] = 'private, no-cache'
     return response
 
 @app.route('/download_calendar/<int:user_id>')
 def download_calendar(user_id):
-    """Download monthly calendar as PDF."""
+    """
+    Download the calendar as PDF, for `months` months (1 to
+    CALENDAR_PDF_MAX_MONTHS) from year/month. Pages are streamed as they
+    are drawn.
+    """
     user = User.query.get_or_404(user_id)
     # Get year and month from query params, default to current
     year = request.args.get('year', type=int) or datetime.datetime.now().year
     month = request.args.get('month', type=int) or datetime.datetime.now().month
-    birth_nakshatra_index = nakshatras.index(user.birth_nakshatra)
-    calendar_data = astro_engine.generate_monthly_calendar(year, month, birth_nakshatra_index)
-    pdf_buffer = pdf_generator.generate_calendar_pdf(user, year, month, calendar_data)
-    response = make_response(pdf_buffer.read())
-    response.headers['Content-Type'] = 'application/pdf'
-    response.headers['Content-Disposition'] = f'attachment; filename=calendar_{user.full_name.replace(" ", "_")}_{year}_{month}.pdf'
-    return response
+    months = request.args.get('months', type=int, default=1)
+    # Checked before streaming starts: an error mid-stream would send a truncated PDF with status 200.
+    # A month's skeleton reaches into the next month, so the last month drawn must be before December 9999.
+    last_month = year * 12 + month - 1 + months - 1
+    if not (1 <= month <= 12 and 1 <= months <= CALENDAR_PDF_MAX_MONTHS
+            and datetime.MINYEAR <= year and last_month < datetime.MAXYEAR * 12 + 11):
+        flash(f'Choose months from January {datetime.MINYEAR} to November {datetime.MAXYEAR}, '
+              f'between 1 and {CALENDAR_PDF_MAX_MONTHS} at a time.', 'error')
+        return redirect(url_for('calendar_view', user_id=user_id))
+    
+    if request.args.get('async'):
+        return _submit_export_job('calendar_pdf', user_id=user.id, year=year, month=month, months=months)
+    
+    chunks = pdf_generator.stream_calendar_pdf(user, year, month, months)
+    span = f"{year}_{month}" if months == 1 else f"{year}_{month}_{months}m"
+    return Response(
+        stream_with_context(chunks),
+        mimetype='application/pdf',
+        headers={'Content-Disposition': f'attachment; filename=calendar_{user.full_name.replace(" ", "_")}_{span}.pdf'}
+    )
 
 @app.route('/delete_user/<int:user_id>', methods=['POST'])
 def delete_user(user_id):
@@ -1289,6 +1845,7 @@ def delete_user(user_id):
     BirthChart.query.filter_by(user_id=user.id).delete()
     db.session.delete(user)
     db.session.commit()
+    report_cache.invalidate_user(user_id)
     flash('User deleted successfully!', 'success')
     return redirect(url_for('index'))
 
@@ -1302,6 +1859,377 @@ def api_timezone():
     tz = get_timezone_from_coordinates(lat, lon)
     return jsonify({'timezone': tz})
 
+@app.route('/api/users/search')
+def api_search_users():
+    """Type-ahead user search on name and birth city as JSON."""
+    query = request.args.get('q', '')
+    limit = min(request.args.get('limit', USER_SEARCH_LIMIT, type=int), 50)
+    return jsonify({'results': [{
+        'id': user.id,
+        'full_name': user.full_name,
+        'birth_city': user.birth_city,
+        'birth_date': user.birth_date.strftime('%Y-%m-%d'),
+        'birth_nakshatra': user.birth_nakshatra,
+        'url': url_for('user_profile', user_id=user.id),
+    } for user in search_users(query, max(limit, 1))]})
+
+@app.route('/api/users/import', methods=['POST'])
+def api_import_users():
+    """
+    Bulk import users from an uploaded file (multipart field "file"; CSV,
+    JSON array or NDJSON, detected from the filename or a "format" field).
+    The import runs as a background job: answers 202 with the job's status
+    URL, and the job result is the import report with per-row errors.
+    """
+    upload = request.files.get('file')
+    if upload is None:
+        return jsonify({'error': 'Missing file upload'}), 400
+    try:
+        fmt = detect_format(upload.filename, request.form.get('format'))
+    except ValueError as e:
+        return jsonify({'error': f'Invalid import file: {e}'}), 400
+    os.makedirs(IMPORT_UPLOAD_DIR, exist_ok=True)
+    upload_path = os.path.join(IMPORT_UPLOAD_DIR, f"{os.urandom(16).hex()}.{fmt}")
+    upload.save(upload_path)
+    response, status = _submit_export_job('user_import', path=upload_path, fmt=fmt)
+    if status != 202:
+        os.remove(upload_path)
+    return response, status
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Status of a background export job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    return jsonify(_job_json(job))
+
+@app.route('/jobs/<job_id>/result')
+def job_result(job_id):
+    """Download the result of a finished export job."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found'}), 404
+    if job.status != DONE:
+        return jsonify(_job_json(job)), 409
+    return send_file(
+        job_queue.result_path(job), mimetype=job.result_mimetype, as_attachment=True,
+        download_name=job.result_name, etag=job.id, conditional=True
+    )
+
+@app.route('/api/cache_stats')
+def api_cache_stats():
+    """Return hit/miss statistics for the shared calculation caches as JSON."""
+    return jsonify({
+        'month_skeletons': month_cache.stats(),
+        'panchang_snapshots': panchang_cache.stats(),
+        'kundali_png': kundali_png_cache.stats(),
+        'pdf_reports': report_cache.stats(),
+        'jobs': job_queue.stats(),
+        'longitudes': longitudes.stats(),
+        'sun_times': sun_times.stats(),
+    })
+
+def _iso(value):
+    return value.isoformat() if value else None
+
+def _window_json(window):
+    return {'start': _iso(window[0]), 'end': _iso(window[1])}
+
+def parse_query_date(value):
+    """
+    Parse a YYYY-MM-DD query date. The first and last representable dates
+    are rejected too: sun times need the neighbouring days, which overflow.
+    """
+    date_obj = datetime.datetime.strptime(value, '%Y-%m-%d').date()
+    if not datetime.date.min < date_obj < datetime.date.max:
+        raise ValueError(f"date must be between {datetime.date.min + datetime.timedelta(days=1)} "
+                         f"and {datetime.date.max - datetime.timedelta(days=1)}")
+    return date_obj
+
+def _calc_etag(*parts):
+    """Deterministic ETag for a result that depends only on parts and CALC_VERSION."""
+    key = "|".join(str(part) for part in parts + (CALC_VERSION,))
+    return hashlib.sha256(key.encode()).hexdigest()[:32]
+
+def _cached_json_response(kind, build_payload):
+    """
+    Serve a timings-style JSON endpoint whose result depends only on
+    (date, lat, lon). The ETag is derived from those inputs and
+    CALC_VERSION, so conditional requests are answered with 304 before
+    anything is computed. Past dates are cacheable for a long time.
+    """
+    try:
+        date_obj = parse_query_date(request.args['date'])
+    except KeyError:
+        date_obj = datetime.datetime.now(delhi_tz).date()
+    except ValueError as e:
+        return jsonify({'error': f'Invalid date ({e}). Use YYYY-MM-DD.'}), 400
+    lat = request.args.get('lat', type=float, default=28.6139)
+    lon = request.args.get('lon', type=float, default=77.2090)
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': 'lat/lon out of range'}), 400
+
+    etag = _calc_etag(kind, date_obj.isoformat(), f"{lat:.6f}", f"{lon:.6f}")
+    past = date_obj < datetime.datetime.now(delhi_tz).date()
+    cache_control = (f"public, max-age={API_PAST_MAX_AGE}, immutable" if past
+                     else f"public, max-age={API_MAX_AGE}")
+
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        payload = {'date': date_obj.isoformat(), 'lat': lat, 'lon': lon, 'timezone': 'Asia/Kolkata'}
+        payload.update(build_payload(date_obj, lat, lon))
+        response = jsonify(payload)
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = cache_control
+    return response
+
+def _timings_json(muhurtas):
+    """JSON form of the sun times, kaals, muhurtas and Horas from get_muhurtas."""
+    payload = {key: _iso(muhurtas[key]) for key in ('sunrise', 'sunset', 'next_sunrise')}
+    for key in ('raahu_kaal', 'gulika_kaal', 'yamaganda_kaal', 'abhijit', 'brahma_muhurta'):
+        payload[key] = _window_json(muhurtas[key])
+    payload['hora'] = [
+        {'type': h['type'], 'index': h['index'], 'lord': h['lord'],
+         'start': _iso(h['start']), 'end': _iso(h['end'])}
+        for h in muhurtas['hora']
+    ]
+    return payload
+
+def _choghadiya_json(periods):
+    """JSON form of the Choghadiya periods from get_muhurtas."""
+    return [
+        {'type': p['type'], 'index': p['index'], 'name': p['name'], 'quality': p['quality'],
+         'start': _iso(p['start']), 'end': _iso(p['end'])}
+        for p in periods
+    ]
+
+@app.route('/api/timings')
+def api_timings():
+    """Return sunrise/sunset, kaals, muhurtas and Horas for a date and location as cacheable JSON."""
+    def build(date_obj, lat, lon):
+        return _timings_json(get_day_muhurtas(date_obj, lat, lon))
+    return _cached_json_response('timings', build)
+
+@app.route('/api/choghadiya')
+def api_choghadiya():
+    """Return the day and night Choghadiya for a date and location as cacheable JSON."""
+    def build(date_obj, lat, lon):
+        return {'periods': _choghadiya_json(get_day_muhurtas(date_obj, lat, lon)['choghadiya'])}
+    return _cached_json_response('choghadiya', build)
+
+def _parse_location(item):
+    """Return (lat, lon) from a bulk request item, raising ValueError if invalid."""
+    lat, lon = float(item['lat']), float(item['lon'])
+    if not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        raise ValueError('lat/lon out of range')
+    return lat, lon
+
+@app.route('/api/timings/bulk', methods=['POST'])
+def api_timings_bulk():
+    """
+    Stream timings for many (date, lat, lon) queries as newline-delimited JSON.
+
+    Body: {"rows": [{"date": "YYYY-MM-DD", "lat": .., "lon": ..}, ...]}
+      or  {"start": "YYYY-MM-DD", "days": N, "cities": [{"name": .., "lat": .., "lon": ..}, ...]}
+    plus optional "choghadiya": true and "mode" (a sun-times mode). Emits one
+    record per query, tagged with its row index "i" or city "name" and
+    grouped by location, then a trailer record with batch statistics.
+    """
+    body = request.get_json(silent=True)
+    if not isinstance(body, dict):
+        return jsonify({'error': 'Expected a JSON object body'}), 400
+    mode = body.get('mode', TIMINGS_SUN_MODE)
+    if mode not in SUN_TIME_MODES:
+        return jsonify({'error': f'mode must be one of {", ".join(SUN_TIME_MODES)}'}), 400
+    with_choghadiya = bool(body.get('choghadiya'))
+
+    errors = []
+    if 'rows' in body:
+        rows = body['rows']
+        if not isinstance(rows, list) or len(rows) > BULK_MAX_ROWS:
+            return jsonify({'error': f'rows must be a list of at most {BULK_MAX_ROWS} items'}), 400
+        queries = []
+        for i, row in enumerate(rows):
+            try:
+                date_obj = parse_query_date(row['date'])
+                queries.append(({'i': i}, date_obj, *_parse_location(row)))
+            except (KeyError, TypeError, ValueError) as e:
+                errors.append({'i': i, 'error': f'Invalid row: {e}'})
+        results = iter_muhurtas_bulk(queries, mode)
+        locations = len({sun_times.location_key(q[2], q[3], mode) for q in queries})
+    elif 'cities' in body:
+        try:
+            start = parse_query_date(body['start'])
+            days = int(body['days'])
+            if start + datetime.timedelta(days=days) > datetime.date.max:
+                raise ValueError('range ends after the last supported date')
+            cities = [({'name': city.get('name', str(i))}, *_parse_location(city))
+                      for i, city in enumerate(body['cities'])]
+        except (KeyError, TypeError, ValueError, AttributeError, OverflowError) as e:
+            return jsonify({'error': f'Invalid range request: {e}'}), 400
+        if days < 1 or days * len(cities) > BULK_MAX_ROWS:
+            return jsonify({'error': f'days × cities must be between 1 and {BULK_MAX_ROWS}'}), 400
+        # One chained walk per city, generated lazily
+        results = (
+            (tag, date_obj, muhurtas)
+            for tag, lat, lon in cities
+            for date_obj, muhurtas in iter_muhurtas(start, days, lat, lon, mode)
+        )
+        locations = len(cities)
+    else:
+        return jsonify({'error': 'Body needs "rows" or "start"/"days"/"cities"'}), 400
+
+    def generate():
+        started = time.perf_counter()
+        calls_before = sun_times.request_calls()
+        records = 0
+        for error in errors:
+            yield json.dumps(error) + '\n'
+        for tag, date_obj, muhurtas in results:
+            record = dict(tag, date=date_obj.isoformat(), **_timings_json(muhurtas))
+            if with_choghadiya:
+                record['choghadiya'] = _choghadiya_json(muhurtas['choghadiya'])
+            records += 1
+            yield json.dumps(record) + '\n'
+        yield json.dumps({
+            'trailer': True,
+            'records': records,
+            'errors': len(errors),
+            'locations': locations,
+            'mode': mode,
+            'sun_times_calls': sun_times.request_calls() - calls_before,
+            'elapsed_ms': round((time.perf_counter() - started) * 1000, 1),
+        }) + '\n'
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+ICS_TITLES = {
+    'raahu_kaal': 'Raahu Kaal',
+    'gulika_kaal': 'Gulika Kaal',
+    'yamaganda_kaal': 'Yamaganda Kaal',
+    'abhijit': 'Abhijit Muhurta',
+    'brahma_muhurta': 'Brahma Muhurta',
+}
+
+ICS_LINE_OCTETS = 75
+
+def _ics_time(value):
+    return value.astimezone(datetime.timezone.utc).strftime('%Y%m%dT%H%M%SZ')
+
+def _ics_lines(*lines):
+    """Content lines folded at 75 octets (RFC 5545 §3.1), each ended with CRLF."""
+    out = []
+    for line in lines:
+        data = line.encode()
+        start, limit = 0, ICS_LINE_OCTETS
+        while len(data) - start > limit:
+            end = start + limit
+            while data[end] & 0xC0 == 0x80:  # never split a UTF-8 sequence
+                end -= 1
+            out.append(data[start:end].decode() + '\r\n ')
+            # Continuation lines begin with a space, which counts towards their 75 octets
+            start, limit = end, ICS_LINE_OCTETS - 1
+        out.append(data[start:].decode() + '\r\n')
+    return ''.join(out)
+
+@app.route('/feeds/kaal.ics')
+def kaal_ics_feed():
+    """
+    Subscribable iCalendar feed of kaal/muhurta windows for one location.
+    Query: lat, lon, kinds (comma-separated, default raahu_kaal), months
+    (horizon, default 12) and start (default today). Events are generated
+    day by day from one chained sun-times walk while the response streams.
+    """
+    lat = request.args.get('lat', type=float, default=28.6139)
+    lon = request.args.get('lon', type=float, default=77.2090)
+    # Each kind once, in the order given: repeats would emit events with the same UID
+    kinds = list(dict.fromkeys(k for k in request.args.get('kinds', 'raahu_kaal').split(',') if k))
+    months = request.args.get('months', type=int, default=12)
+    try:
+        start_str = request.args.get('start')
+        start = (parse_query_date(start_str) if start_str
+                 else datetime.datetime.now(delhi_tz).date())
+    except ValueError as e:
+        return jsonify({'error': f'Invalid start date ({e}). Use YYYY-MM-DD.'}), 400
+    if not kinds or any(k not in SINGLE_WINDOWS for k in kinds):
+        return jsonify({'error': f'kinds must be from {", ".join(SINGLE_WINDOWS)}'}), 400
+    if not (1 <= months <= ICS_MAX_MONTHS) or not (-90 <= lat <= 90 and -180 <= lon <= 180):
+        return jsonify({'error': f'months must be 1-{ICS_MAX_MONTHS} and lat/lon in range'}), 400
+
+    # Same ETag all day for the same feed, so hourly polls are 304s
+    etag = _calc_etag('ics', start.isoformat(), f"{lat:.6f}", f"{lon:.6f}", ','.join(kinds), months)
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+        response.set_etag(etag)
+        response.headers['Cache-Control'] = f"public, max-age={API_MAX_AGE}"
+        return response
+
+    years, month_index = divmod(start.month - 1 + months, 12)
+    end_year, end_month = start.year + years, month_index + 1
+    if end_year > datetime.MAXYEAR:
+        return jsonify({'error': 'Feed would end after the last supported date'}), 400
+    end = datetime.date(end_year, end_month, min(start.day, calendar.monthrange(end_year, end_month)[1]))
+    stamp = start.strftime('%Y%m%dT000000Z')
+    location = f"{lat:.4f},{lon:.4f}"
+
+    def generate():
+        yield _ics_lines('BEGIN:VCALENDAR', 'VERSION:2.0', 'PRODID:-//Astrology App//Kaal Feed//EN',
+                         'CALSCALE:GREGORIAN', 'METHOD:PUBLISH',
+                         f'X-WR-CALNAME:{" & ".join(ICS_TITLES[k] for k in kinds)} ({location})')
+        for date_obj, muhurtas in iter_muhurtas(start, (end - start).days, lat, lon, TIMINGS_SUN_MODE):
+            for kind in kinds:
+                window_start, window_end = muhurtas[kind]
+                if window_start is None:
+                    continue
+                yield _ics_lines('BEGIN:VEVENT',
+                                 f'UID:{kind}-{date_obj.isoformat()}-{location}@astrology-app',
+                                 f'DTSTAMP:{stamp}',
+                                 f'DTSTART:{_ics_time(window_start)}',
+                                 f'DTEND:{_ics_time(window_end)}',
+                                 f'SUMMARY:{ICS_TITLES[kind]}',
+                                 f'GEO:{lat:.6f};{lon:.6f}',
+                                 'TRANSP:TRANSPARENT',
+                                 'END:VEVENT')
+        yield _ics_lines('END:VCALENDAR')
+
+    response = Response(stream_with_context(generate()), mimetype='text/calendar')
+    response.set_etag(etag)
+    response.headers['Cache-Control'] = f"public, max-age={API_MAX_AGE}"
+    response.headers['Content-Disposition'] = 'inline; filename="kaal.ics"'
+    return response
+
+@app.route('/todays_panchang')
+@app.route('/todays_panchang/<int:user_id>')
+def todays_panchang(user_id=None):
+    """
+    Show today's panchang for a location, with the Tara relation for a
+    selected user. The location is the lat/lon query (default Delhi) for
+    every user too: today's times are for where the reader is, not for the
+    user's birth place. Without a user, one page of profiles is offered.
+    """
+    user = User.query.get_or_404(user_id) if user_id is not None else None
+    lat = request.args.get('lat', type=float, default=28.6139)
+    lon = request.args.get('lon', type=float, default=77.2090)
+    today = datetime.datetime.now(delhi_tz).date()
+
+    row = stored_daily_panchang(today, lat, lon)
+    snapshot = row.snapshot() if row is not None else astro_engine.get_daily_panchang(today, lat, lon)
+    birth_nakshatra_index = None
+    if user and user.birth_nakshatra in nakshatras:
+        birth_nakshatra_index = nakshatras.index(user.birth_nakshatra)
+    panchang_data = astro_engine.apply_daily_tara(snapshot, birth_nakshatra_index)
+
+    users = next_cursor = None
+    if user is None:
+        try:
+            users, next_cursor = list_users_page(request.args.get('cursor'))
+        except ValueError:
+            return redirect(url_for('todays_panchang', lat=lat, lon=lon))
+    return render_template('todays_panchang.html', panchang_data=panchang_data, user=user, users=users,
+                           next_cursor=next_cursor)
+
 @app.route('/timings')
 def timings():
     """Show Raahu Kaal, Gulika Kaal, and Yamaganda Kaal for a given date and location (default: today, Delhi)."""
@@ -1311,16 +2239,17 @@ def timings():
     lon = request.args.get('lon', type=float, default=77.2090)
     if date_str:
         try:
-            date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+            date_obj = parse_query_date(date_str)
         except ValueError:
             flash('Invalid date format. Use YYYY-MM-DD.', 'error')
             date_obj = datetime.date.today()
     else:
         date_obj = datetime.date.today()
 
-    raahu_start, raahu_end = get_raahu_kaal(date_obj, lat, lon)
-    gulika_start, gulika_end = get_gulika_kaal(date_obj, lat, lon)
-    yamaganda_start, yamaganda_end = get_yamaganda_kaal(date_obj, lat, lon)
+    muhurtas = get_day_muhurtas(date_obj, lat, lon)
+    raahu_start, raahu_end = muhurtas["raahu_kaal"]
+    gulika_start, gulika_end = muhurtas["gulika_kaal"]
+    yamaganda_start, yamaganda_end = muhurtas["yamaganda_kaal"]
 
     # Debug logging for diagnosis
     logging.debug(f"[TIMINGS] Date: {date_obj}, Lat: {lat}, Lon: {lon}")
@@ -1338,26 +2267,28 @@ def timings():
         gulika_start=gulika_start,
         gulika_end=gulika_end,
         yamaganda_start=yamaganda_start,
-        yamaganda_end=yamaganda_end
+        yamaganda_end=yamaganda_end,
+        abhijit=muhurtas["abhijit"],
+        brahma_muhurta=muhurtas["brahma_muhurta"],
+        horas=muhurtas["hora"]
     )
 
 @app.route('/choghadiya')
 def choghadiya_page():
     """Show Choghadiya periods for a given date and location (default: today, Delhi)."""
-    from astro_time_windows import get_choghadiya
     date_str = request.args.get('date')
     lat = request.args.get('lat', type=float, default=28.6139)
     lon = request.args.get('lon', type=float, default=77.2090)
     if date_str:
         try:
-            date_obj = datetime.datetime.strptime(date_str, '%Y-%m-%d').date()
+            date_obj = parse_query_date(date_str)
         except ValueError:
             flash('Invalid date format. Use YYYY-MM-DD.', 'error')
             date_obj = datetime.date.today()
     else:
         date_obj = datetime.date.today()
 
-    choghadiya_periods = get_choghadiya(date_obj, lat, lon)
+    choghadiya_periods = get_day_muhurtas(date_obj, lat, lon)["choghadiya"]
     return render_template(
         'choghadiya.html',
         date=date_obj,
@@ -1376,8 +2307,48 @@ def internal_error(e):
     return render_template('500.html'), 500
 
 # === INITIALIZE DATABASE ===
+MODELS = (User, BirthChart, Job, DailyPanchang)
+
+def migrate_database():
+    """Bring the schema and the search index up to date. Returns the changes that were pending."""
+    pending = upgrade_schema(db.engine, db.metadata, MODELS)
+    setup_search_index(db.engine)
+    return pending
+
+@app.cli.command("migrate-db")
+def migrate_db_command():
+    """Create missing tables, columns, indexes and the search index."""
+    pending = migrate_database()
+    click.echo(f"Applied: {', '.join(pending)}" if pending else "Schema is up to date.")
+
+@app.cli.command("benchmark-db")
+@click.option("--rows", type=int, default=20000, show_default=True, help="Users to seed before timing.")
+@click.option("--ops", type=int, default=500, show_default=True, help="Timed operations per measurement.")
+def benchmark_db_command(rows, ops):
+    """Compare read/write latency of the default and production profiles on scratch databases."""
+    runs = [
+        ("default, before migration", "default", ("ix_birth_chart_user_id", "ix_user_created_at_id")),
+        ("default", "default", ()),
+        ("production", "production", ()),
+    ]
+    for label, profile, drop_indexes in runs:
+        result = benchmark_profile(profile, db.metadata, benchmark_user, benchmark_chart,
+                                   rows=rows, ops=ops, drop_indexes=drop_indexes)
+        click.echo(f"{label}: {result['settings']}")
+        for name in ("write", "read_chart", "read_page", "read_under_write"):
+            stats = result[name]
+            click.echo(f"  {name:<17} p50 {stats['p50_ms']:>8.3f} ms   p95 {stats['p95_ms']:>8.3f} ms   "
+                       f"max {stats['max_ms']:>8.3f} ms" + (f"   errors {stats['errors']}" if 'errors' in stats else ""))
+
 with app.app_context():
-    db.create_all()
+    if DB_AUTO_MIGRATE:
+        migrate_database()
+    else:
+        pending = pending_changes(db.engine, MODELS)
+        if pending:
+            app.logger.warning(f"Database schema is behind the models ({', '.join(pending)}); run `flask migrate-db`")
+    user_search_fts = has_search_index(db.engine)
+    log_profile(DB_PROFILE, db.engine)
 
 if __name__ == '__main__':
     app.run(debug=True)
\ No newline at end of file
@@ -1,19 +1,19 @@
 """
 Astrology Time Windows Module
-- Choghadiya
+- Choghadiya (single day, or streamed over a date range)
 - Raahu Kaal
 - Gulika Kaal
 - Yamaganda Kaal
 
-All functions use Swiss Ephemeris-based sunrise/sunset logic as in raahu_kaal.py/app.py.
+All functions take sunrise/sunset from the shared provider in sun_times.py.
+Pages that need several windows for one date use muhurta.get_muhurtas, which
+derives all of them (plus Hora, Abhijit and Brahma Muhurta) from one lookup.
+`mode` selects its engine per call ("exact", "fast", "refine" or "tile"; None uses
+sun_times.SUN_TIMES_MODE); see sun_times.py for the accuracy of each.
 """
 import datetime
-import logging
-import swisseph as swe
-import zoneinfo
 
-IST = zoneinfo.ZoneInfo("Asia/Kolkata")
-UTC = datetime.timezone.utc
+from sun_times import sun_times, get_sunrise_sunset, jd_to_ist
 
 # Traditional Choghadiya tables (fixed for each weekday)
 CHOGHADIYA_DAY_TABLE = {
@@ -44,45 +44,31 @@ CHOGHADIYA_QUALITY = {
     "Udveg": "Bad",
 }
 
+# Codes used by the compact Choghadiya form: indices into these tuples
+CHOGHADIYA_NAMES = ("Amrit", "Shubh", "Labh", "Char", "Rog", "Kaal", "Udveg")
+CHOGHADIYA_QUALITIES = ("Good", "Neutral", "Bad")
+# Weekday (Sun=0) → (name code, quality code) for the 7 day then 7 night periods
+CHOGHADIYA_CODES = {
+    weekday: tuple(
+        (CHOGHADIYA_NAMES.index(name), CHOGHADIYA_QUALITIES.index(CHOGHADIYA_QUALITY[name]))
+        for name in CHOGHADIYA_DAY_TABLE[weekday] + CHOGHADIYA_NIGHT_TABLE[weekday]
+    )
+    for weekday in CHOGHADIYA_DAY_TABLE
+}
+UNIX_EPOCH_JD = 2440587.5
+
 # Raahu, Gulika, Yamaganda segment indices for each weekday (0=Monday, 6=Sunday)
 RAAHU_INDEX = {0: 1, 1: 6, 2: 4, 3: 5, 4: 3, 5: 2, 6: 7}
 GULIKA_INDEX = {0: 5, 1: 4, 2: 3, 3: 2, 4: 1, 5: 0, 6: 6}
 YAMAGANDA_INDEX = {0: 3, 1: 2, 2: 1, 3: 0, 4: 6, 5: 5, 6: 4}
 
 
-def jd_to_ist(jd: float) -> datetime.datetime:
-    y, m, d, h = swe.revjul(jd)
-    hr = int(h)
-    mn = int((h - hr) * 60)
-    sec = int((((h - hr) * 60) - mn) * 60)
-    dt_utc = datetime.datetime(y, m, d, hr, mn, sec, tzinfo=UTC)
-    return dt_utc.astimezone(IST)
-
-def get_sunrise_sunset(date_obj, latitude, longitude):
-    jd0 = swe.julday(date_obj.year, date_obj.month, date_obj.day, 0.0)
-    flags_rise = swe.CALC_RISE | swe.BIT_DISC_CENTER
-    flags_set = swe.CALC_SET | swe.BIT_DISC_CENTER
-    geopos = (longitude, latitude, 0)
-    try:
-        _, rise_t = swe.rise_trans(jd0, swe.SUN, flags_rise, geopos=geopos)
-        _, set_t = swe.rise_trans(jd0, swe.SUN, flags_set, geopos=geopos)
-        sunrise = jd_to_ist(rise_t[0])
-        sunset = jd_to_ist(set_t[0])
-        if sunset < sunrise:
-            jd1 = swe.julday(date_obj.year, date_obj.month, date_obj.day + 1, 0.0)
-            _, set_t = swe.rise_trans(jd1, swe.SUN, flags_set, geopos=geopos)
-            sunset = jd_to_ist(set_t[0])
-        return sunrise, sunset
-    except Exception as e:
-        logging.error(f"Error in get_sunrise_sunset: {e}")
-        return None, None
-
-def get_raahu_kaal(date_obj, latitude=28.6139, longitude=77.2090):
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
+def _day_eighth(date_obj, sunrise, sunset, index_table):
+    """Return (start, end) of the weekday's eighth of the daytime, or (None, None)."""
     if not sunrise or not sunset:
         return None, None
     part = (sunset - sunrise) / 8
-    idx = RAAHU_INDEX[date_obj.weekday()]
+    idx = index_table[date_obj.weekday()]
     start = sunrise + idx * part
     end = start + part
     if end > sunset:
@@ -91,45 +77,32 @@ def get_raahu_kaal(date_obj, latitude=28.6139, longitude=77.2090):
         return None, None
     return start, end
 
-def get_gulika_kaal(date_obj, latitude=28.6139, longitude=77.2090):
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
-    if not sunrise or not sunset:
-        return None, None
-    part = (sunset - sunrise) / 8
-    idx = GULIKA_INDEX[date_obj.weekday()]
-    start = sunrise + idx * part
-    end = start + part
-    if end > sunset:
-        end = sunset
-    if end <= start:
-        return None, None
-    return start, end
+def _kaal_window(date_obj, latitude, longitude, index_table, mode=None):
+    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude, mode)
+    return _day_eighth(date_obj, sunrise, sunset, index_table)
 
-def get_yamaganda_kaal(date_obj, latitude=28.6139, longitude=77.2090):
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
-    if not sunrise or not sunset:
-        return None, None
-    part = (sunset - sunrise) / 8
-    idx = YAMAGANDA_INDEX[date_obj.weekday()]
-    start = sunrise + idx * part
-    end = start + part
-    if end > sunset:
-        end = sunset
-    if end <= start:
-        return None, None
-    return start, end
+def get_raahu_kaal(date_obj, latitude=28.6139, longitude=77.2090, mode=None):
+    return _kaal_window(date_obj, latitude, longitude, RAAHU_INDEX, mode)
 
-def get_choghadiya(date_obj, latitude=28.6139, longitude=77.2090):
-    """Return Choghadiya periods for day and night using traditional fixed table, with correct weekday mapping."""
-    sunrise, sunset = get_sunrise_sunset(date_obj, latitude, longitude)
-    if not sunrise or not sunset:
-        return []
-    next_sunrise, _ = get_sunrise_sunset(date_obj + datetime.timedelta(days=1), latitude, longitude)
+def get_gulika_kaal(date_obj, latitude=28.6139, longitude=77.2090, mode=None):
+    return _kaal_window(date_obj, latitude, longitude, GULIKA_INDEX, mode)
+
+def get_yamaganda_kaal(date_obj, latitude=28.6139, longitude=77.2090, mode=None):
+    return _kaal_window(date_obj, latitude, longitude, YAMAGANDA_INDEX, mode)
+
+def get_kaal_range(start_date, days, latitude=28.6139, longitude=77.2090, index_table=RAAHU_INDEX, mode=None):
+    """Return [(date, start, end), ...] for consecutive days from one chained sun-times walk."""
+    sun = sun_times.get_range(start_date, days, latitude, longitude, mode)
+    return [
+        (date_obj, *_day_eighth(date_obj, sunrise, sunset, index_table))
+        for date_obj, sunrise, sunset in zip(sun.dates, sun.sunrises, sun.sunsets)
+    ]
+
+def _choghadiya_dicts(sunrise, sunset, next_sunrise, weekday):
+    """Return the 14 Choghadiya dicts for one day from IST datetimes."""
     day_len = (sunset - sunrise).total_seconds()
     night_len = (next_sunrise - sunset).total_seconds()
     choghadiya = []
-    # Map Python weekday (Mon=0..Sun=6) to Choghadiya table (Sun=0..Sat=6)
-    weekday = (date_obj.weekday() + 1) % 7
     # Day Choghadiya (fixed sequence)
     for i in range(7):
         start = sunrise + datetime.timedelta(seconds=i * day_len / 7)
@@ -160,6 +133,44 @@ def get_choghadiya(date_obj, latitude=28.6139, longitude=77.2090):
         })
     return choghadiya
 
+def _choghadiya_tuples(rise_jd, set_jd, next_rise_jd, weekday):
+    """Yield the 14 compact (start_epoch, end_epoch, name_code, quality_code) tuples for one day."""
+    codes = CHOGHADIYA_CODES[weekday]
+    # Whole seconds, as displayed (jd_to_ist truncates too)
+    sunrise = int((rise_jd - UNIX_EPOCH_JD) * 86400)
+    sunset = int((set_jd - UNIX_EPOCH_JD) * 86400)
+    next_sunrise = int((next_rise_jd - UNIX_EPOCH_JD) * 86400)
+    for i, (span_start, span_end) in enumerate(((sunrise, sunset), (sunset, next_sunrise))):
+        part = (span_end - span_start) / 7
+        for k in range(7):
+            yield (int(span_start + k * part), int(span_start + (k + 1) * part)) + codes[7 * i + k]
+
+def iter_choghadiya(start_date, days, latitude=28.6139, longitude=77.2090, compact=False, mode=None):
+    """
+    Yield Choghadiya periods for `days` consecutive dates from one chained
+    sun-times walk: each night ends at the next day's sunrise, which is
+    computed once and reused as that day's start.
+
+    Yields the dicts of get_choghadiya, or with compact=True tuples of
+    (start_epoch, end_epoch, name_code, quality_code) in Unix seconds, with
+    codes indexing CHOGHADIYA_NAMES and CHOGHADIYA_QUALITIES. Days without a
+    sunrise, sunset or next sunrise yield nothing.
+    """
+    for date_obj, rise_jd, set_jd, next_rise_jd in sun_times.iter_range_jd(
+            start_date, days, latitude, longitude, mode):
+        if rise_jd is None or set_jd is None or next_rise_jd is None:
+            continue
+        # Map Python weekday (Mon=0..Sun=6) to Choghadiya table (Sun=0..Sat=6)
+        weekday = (date_obj.weekday() + 1) % 7
+        if compact:
+            yield from _choghadiya_tuples(rise_jd, set_jd, next_rise_jd, weekday)
+        else:
+            yield from _choghadiya_dicts(jd_to_ist(rise_jd), jd_to_ist(set_jd), jd_to_ist(next_rise_jd), weekday)
+
+def get_choghadiya(date_obj, latitude=28.6139, longitude=77.2090, mode=None):
+    """Return Choghadiya periods for day and night using traditional fixed table, with correct weekday mapping."""
+    return list(iter_choghadiya(date_obj, 1, latitude, longitude, mode=mode))
+
 def print_kaal(label, start, end):
     if start is None or end is None:
         print(f"{label}: Not found or does not occur after sunset.")
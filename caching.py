@@ -0,0 +1,86 @@
+"""
+Caching Module
+- Thread-safe LRU cache with optional age-based expiry
+- Hit/miss/eviction counters for monitoring
+
+Used for location-independent results (month skeletons, sun times, rendered
+charts) that are identical for every user and expensive to recompute.
+"""
+import time
+import threading
+from collections import OrderedDict
+
+
+class LRUCache:
+    """Bounded LRU mapping whose entries also expire after max_age seconds."""
+
+    def __init__(self, name, maxsize=128, max_age=None):
+        self.name = name
+        self.maxsize = maxsize
+        self.max_age = max_age
+        self._data = OrderedDict()  # key → (stored_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, key, default=None):
+        """Return the cached value for key, or default if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is not None:
+                stored_at, value = entry
+                if self.max_age is None or time.monotonic() - stored_at <= self.max_age:
+                    self._data.move_to_end(key)
+                    self.hits += 1
+                    return value
+                del self._data[key]
+                self.evictions += 1
+            self.misses += 1
+            return default
+
+    def set(self, key, value):
+        """Store value under key, evicting the least recently used entries if full."""
+        with self._lock:
+            self._data[key] = (time.monotonic(), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute):
+        """Return the cached value for key, calling compute() and caching it on a miss."""
+        sentinel = object()
+        value = self.get(key, sentinel)
+        if value is sentinel:
+            value = compute()
+            self.set(key, value)
+        return value
+
+    def invalidate(self, key):
+        """Drop a single entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self):
+        """Drop all entries (counters are kept)."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+    def stats(self):
+        """Return counters and size for monitoring."""
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "name": self.name,
+                "size": len(self._data),
+                "maxsize": self.maxsize,
+                "max_age": self.max_age,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            }
@@ -0,0 +1,230 @@
+"""
+Calendar PDF Module
+- Incremental PDF writer: each page is emitted as soon as it is drawn
+- Minimal page canvas (text, filled rectangles, lines) in the standard fonts
+- Monthly calendar layout that consumes calendar days from a generator
+
+ReportLab's canvas keeps the whole document until save(), so a year of pages
+would be held in memory and nothing could be sent before the last page. The
+writer here emits the header and fonts first, then each page's compressed
+content stream and page object as soon as the page is finished. The page
+tree, catalog and cross-reference table come last. Only the byte offsets
+of the objects are kept, so memory stays flat however many months are drawn.
+
+Text uses the built-in Helvetica fonts with WinAnsi encoding (no embedding);
+characters outside Windows-1252 are replaced with "?". Widths come from
+ReportLab's font metrics.
+"""
+import zlib
+import datetime
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+PAGE_WIDTH, PAGE_HEIGHT = 595.28, 841.89  # A4 portrait, points
+MARGIN = 36
+FONTS = {"F1": "Helvetica", "F2": "Helvetica-Bold"}
+
+# Object numbers reserved before any page is written
+CATALOG_OBJ, PAGES_OBJ, FIRST_FONT_OBJ = 1, 2, 3
+
+# Tara colouring, as in calendar.html
+GOOD_TARAS = ("Sadhaka Tara", "Sampat Tara", "Atimitra Tara")
+BAD_TARAS = ("Vipat Tara", "Pratyari Tara", "Vadha Tara")
+
+BLACK = (0, 0, 0)
+GRAY = (0.4, 0.4, 0.4)
+LIGHT = (0.93, 0.94, 0.96)
+BLUE = (0.05, 0.35, 0.7)
+GREEN = (0.1, 0.5, 0.2)
+RED = (0.75, 0.1, 0.1)
+
+
+def _pdf_string(text):
+    """Encode text as a PDF literal string in WinAnsi."""
+    raw = str(text).encode("cp1252", errors="replace")
+    return b"(" + raw.replace(b"\\", b"\\\\").replace(b"(", b"\\(").replace(b")", b"\\)") + b")"
+
+
+class PageCanvas:
+    """Drawing operations for one page; y grows upwards from the bottom edge."""
+
+    def __init__(self):
+        self._ops = []
+
+    def text(self, x, y, text, size=8, bold=False, color=BLACK, align="left"):
+        """Draw one line of text with its baseline at y."""
+        font = "F2" if bold else "F1"
+        if align != "left":
+            width = stringWidth(str(text), FONTS[font], size)
+            x -= width if align == "right" else width / 2
+        self._ops.append(b"BT /%s %g Tf %g %g %g rg %.2f %.2f Td %s Tj ET" % (
+            font.encode(), size, *color, x, y, _pdf_string(text)))
+
+    def rect(self, x, y, width, height, fill):
+        """Fill a rectangle whose lower-left corner is (x, y)."""
+        self._ops.append(b"%g %g %g rg %.2f %.2f %.2f %.2f re f" % (*fill, x, y, width, height))
+
+    def line(self, x1, y1, x2, y2, width=0.5, gray=0.7):
+        """Stroke a straight line."""
+        self._ops.append(b"%g G %g w %.2f %.2f m %.2f %.2f l S" % (gray, width, x1, y1, x2, y2))
+
+    def content(self):
+        return b"\n".join(self._ops)
+
+
+class StreamingPDFWriter:
+    """Writes a PDF as a sequence of byte chunks, one page at a time."""
+
+    def __init__(self):
+        self._offsets = {}
+        self._position = 0
+        self._next_obj = FIRST_FONT_OBJ + len(FONTS)
+        self._page_objs = []
+
+    def _object(self, number, body):
+        """Serialize one indirect object, recording its byte offset."""
+        self._offsets[number] = self._position
+        chunk = b"%d 0 obj\n" % number + body + b"\nendobj\n"
+        self._position += len(chunk)
+        return chunk
+
+    def start(self):
+        """Header and font objects."""
+        header = b"%PDF-1.4\n%\xe2\xe3\xcf\xd3\n"
+        self._position = len(header)
+        chunks = [header]
+        for i, base_font in enumerate(FONTS.values()):
+            chunks.append(self._object(FIRST_FONT_OBJ + i, (
+                b"<< /Type /Font /Subtype /Type1 /BaseFont /%s /Encoding /WinAnsiEncoding >>"
+                % base_font.encode())))
+        return b"".join(chunks)
+
+    def add_page(self, canvas):
+        """Content stream and page object for one finished page."""
+        stream = zlib.compress(canvas.content())
+        content_obj, page_obj = self._next_obj, self._next_obj + 1
+        self._next_obj += 2
+        self._page_objs.append(page_obj)
+        fonts = b" ".join(b"/%s %d 0 R" % (name.encode(), FIRST_FONT_OBJ + i)
+                          for i, name in enumerate(FONTS))
+        return (
+            self._object(content_obj, b"<< /Length %d /Filter /FlateDecode >>\nstream\n" % len(stream)
+                         + stream + b"\nendstream")
+            + self._object(page_obj, (
+                b"<< /Type /Page /Parent %d 0 R /MediaBox [0 0 %g %g] "
+                b"/Resources << /Font << %s >> >> /Contents %d 0 R >>"
+                % (PAGES_OBJ, PAGE_WIDTH, PAGE_HEIGHT, fonts, content_obj)))
+        )
+
+    def finish(self, title=""):
+        """Page tree, catalog, info, cross-reference table and trailer."""
+        info_obj = self._next_obj
+        kids = b" ".join(b"%d 0 R" % n for n in self._page_objs)
+        chunks = [
+            self._object(PAGES_OBJ, b"<< /Type /Pages /Kids [%s] /Count %d >>" % (kids, len(self._page_objs))),
+            self._object(CATALOG_OBJ, b"<< /Type /Catalog /Pages %d 0 R >>" % PAGES_OBJ),
+            self._object(info_obj, b"<< /Title %s /CreationDate (D:%s) >>" % (
+                _pdf_string(title), datetime.datetime.now(datetime.timezone.utc).strftime("%Y%m%d%H%M%SZ").encode())),
+        ]
+        xref_offset = self._position
+        size = info_obj + 1
+        xref = [b"xref\n0 %d\n0000000000 65535 f \n" % size]
+        for number in range(1, size):
+            xref.append(b"%010d 00000 n \n" % self._offsets[number])
+        chunks.append(b"".join(xref))
+        chunks.append(b"trailer\n<< /Size %d /Root %d 0 R /Info %d 0 R >>\nstartxref\n%d\n%%%%EOF\n"
+                      % (size, CATALOG_OBJ, info_obj, xref_offset))
+        return b"".join(chunks)
+
+
+def iter_pdf(pages, title=""):
+    """Yield the bytes of a PDF whose pages come from a generator of PageCanvas."""
+    writer = StreamingPDFWriter()
+    yield writer.start()
+    for page in pages:
+        yield writer.add_page(page)
+    yield writer.finish(title)
+
+
+# === CALENDAR LAYOUT ===
+LINE = 9            # text line height
+FONT_SIZE = 7
+# Column headings and left edges
+COLUMNS = (
+    ("Date", MARGIN),
+    ("Tithi", MARGIN + 48),
+    ("Nakshatra", MARGIN + 213),
+    ("Tara", MARGIN + 378),
+    ("Raahu Kaal", MARGIN + 458),
+)
+
+def _time_range(start, end):
+    """Format a period as calendar.html does."""
+    if start.date() == end.date():
+        return f"{start:%I:%M %p} – {end:%I:%M %p}"
+    return f"{start:%b %d %I:%M %p} – {end:%b %d %I:%M %p}"
+
+def _tara_color(tara_name):
+    if tara_name in GOOD_TARAS:
+        return GREEN
+    if tara_name in BAD_TARAS:
+        return RED
+    return GRAY
+
+def _start_page(title, subtitle, page_number):
+    """New page with the title block, page number and column headings; returns (canvas, y)."""
+    canvas = PageCanvas()
+    y = PAGE_HEIGHT - MARGIN - 14
+    canvas.text(MARGIN, y, title, size=14, bold=True)
+    canvas.text(PAGE_WIDTH - MARGIN, y, f"Page {page_number}", size=8, color=GRAY, align="right")
+    y -= 14
+    canvas.text(MARGIN, y, subtitle, size=9, color=GRAY)
+    y -= 20
+    canvas.rect(MARGIN, y - 4, PAGE_WIDTH - 2 * MARGIN, LINE + 6, LIGHT)
+    for heading, x in COLUMNS:
+        canvas.text(x + 3, y, heading, size=8, bold=True, color=BLUE)
+    return canvas, y - LINE - 4
+
+def _day_lines(date_obj, entry):
+    """Per-column lists of (text, bold, color) lines for one day."""
+    tithi, nakshatra, tara, raahu = [], [], [], []
+    for start, end, name in entry["tithi"]:
+        tithi += [(name, True, BLACK), (_time_range(start, end), False, GRAY)]
+    for start, end, name, tara_name, _ in entry["nakshatra"]:
+        nakshatra += [(name, True, BLACK), (_time_range(start, end), False, GRAY)]
+        tara += [(tara_name, True, _tara_color(tara_name)), ("", False, GRAY)]
+    if entry["raahu_kaal"]:
+        raahu = [(f"{entry['raahu_kaal']['start']:%I:%M %p} –", False, RED),
+                 (f"{entry['raahu_kaal']['end']:%I:%M %p}", False, RED)]
+    date_lines = [(f"{date_obj:%d} {date_obj:%a}", True, BLACK)]
+    return [date_lines, tithi, nakshatra, tara, raahu]
+
+def iter_calendar_pages(days, user_name, birth_nakshatra):
+    """
+    Yield a PageCanvas per page for (date, calendar entry) pairs in date
+    order. Each month starts on a new page; long months continue on the next.
+    """
+    canvas = None
+    month = None
+    page_number = 0
+    subtitle = f"{user_name} · Birth Nakshatra: {birth_nakshatra} · Times in IST"
+    for date_obj, entry in days:
+        columns = _day_lines(date_obj, entry)
+        height = max(len(lines) for lines in columns) * LINE + 6
+        if (date_obj.year, date_obj.month) != month or y - height < MARGIN:
+            if canvas is not None:
+                yield canvas
+            page_number += 1
+            month_title = f"{date_obj:%B %Y}"
+            if (date_obj.year, date_obj.month) == month:
+                month_title += " (continued)"
+            month = (date_obj.year, date_obj.month)
+            canvas, y = _start_page(f"Panchang Calendar — {month_title}", subtitle, page_number)
+        for lines, (_, x) in zip(columns, COLUMNS):
+            for i, (text, bold, color) in enumerate(lines):
+                if text:
+                    canvas.text(x + 3, y - i * LINE, text, size=FONT_SIZE, bold=bold, color=color)
+        y -= height
+        canvas.line(MARGIN, y + LINE - 1, PAGE_WIDTH - MARGIN, y + LINE - 1)
+    if canvas is not None:
+        yield canvas
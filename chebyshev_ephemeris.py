@@ -0,0 +1,167 @@
+"""
+Chebyshev Ephemeris Module
+- Piecewise Chebyshev fits of sidereal (Lahiri) Sun and Moon longitudes
+- Vectorized NumPy evaluation over arrays of Julian Days
+- Vectorized tithi/nakshatra indices for grid workloads
+
+Segments lie on a fixed grid anchored at J2000 and are fitted lazily from
+Swiss Ephemeris on first use, so repeated grids over the same span reuse the
+same coefficients. Fits use the global sidereal mode at fit time
+(swe.set_sid_mode(swe.SIDM_LAHIRI) in app.py).
+
+Accuracy versus swe.calc_ut(..., swe.FLG_SIDEREAL), measured over random
+segments between 1900 and 2100 with `python chebyshev_ephemeris.py verify`:
+- Moon: 4-day segments, degree 8   → max error < 0.01 arcsec
+- Sun:  16-day segments, degree 6  → max error < 0.01 arcsec
+The Moon moves 1 arcsec in about 2 seconds of time, so tithi/nakshatra
+indices from these fits only disagree with Swiss Ephemeris within a fraction
+of a second of a boundary.
+
+Usage:
+    python chebyshev_ephemeris.py verify [--samples 20000]
+"""
+import os
+import time
+import argparse
+import threading
+
+import numpy as np
+from numpy.polynomial import chebyshev
+import swisseph as swe
+
+J2000 = 2451545.0
+
+# body → (segment length in days, polynomial degree)
+SEGMENT_CONFIG = {
+    swe.MOON: (4.0, 8),
+    swe.SUN: (16.0, 6),
+}
+
+
+class ChebyshevEphemeris:
+    """Lazily fitted piecewise Chebyshev model of one body's sidereal longitude."""
+
+    def __init__(self, body, segment_days=None, degree=None):
+        default_days, default_degree = SEGMENT_CONFIG[body]
+        self.body = body
+        self.segment_days = segment_days or default_days
+        self.degree = degree or default_degree
+        # Dense coefficient table covering segments [_first_seg, _first_seg + len)
+        self._first_seg = 0
+        self._table = np.zeros((0, self.degree + 1))
+        self._fitted = np.zeros(0, dtype=bool)
+        self._lock = threading.Lock()
+        nodes = self.degree + 1
+        self._nodes = np.cos(np.pi * (np.arange(nodes) + 0.5) / nodes)
+
+    def _fit_segment(self, seg):
+        """Fit one segment from Swiss Ephemeris at Chebyshev nodes."""
+        seg_start = J2000 + seg * self.segment_days
+        jds = seg_start + (self._nodes + 1) * self.segment_days / 2
+        lons = [swe.calc_ut(jd, self.body, swe.FLG_SIDEREAL)[0][0] for jd in jds]
+        # Unwrap across 360° so the fitted curve is continuous within the segment
+        unwrapped = np.degrees(np.unwrap(np.radians(lons)))
+        return chebyshev.chebfit(self._nodes, unwrapped, self.degree)
+
+    def _grow(self, seg_lo, seg_hi):
+        """Extend the dense table so it covers segments seg_lo..seg_hi."""
+        first = min(seg_lo, self._first_seg) if len(self._fitted) else seg_lo
+        last = max(seg_hi, self._first_seg + len(self._fitted) - 1) if len(self._fitted) else seg_hi
+        table = np.zeros((last - first + 1, self.degree + 1))
+        fitted = np.zeros(last - first + 1, dtype=bool)
+        if len(self._fitted):
+            offset = self._first_seg - first
+            table[offset:offset + len(self._fitted)] = self._table
+            fitted[offset:offset + len(self._fitted)] = self._fitted
+        self._first_seg, self._table, self._fitted = first, table, fitted
+
+    def _coefficients(self, segs):
+        """Return a (len(segs), degree + 1) coefficient matrix, fitting missing segments."""
+        seg_lo, seg_hi = int(segs.min()), int(segs.max())
+        with self._lock:
+            if (not len(self._fitted) or seg_lo < self._first_seg
+                    or seg_hi >= self._first_seg + len(self._fitted)):
+                self._grow(seg_lo, seg_hi)
+            rows = segs - self._first_seg
+            missing = ~self._fitted[rows]
+            if missing.any():
+                for row in np.unique(rows[missing]):
+                    self._table[row] = self._fit_segment(int(row) + self._first_seg)
+                    self._fitted[row] = True
+            return self._table[rows]
+
+    def longitudes(self, jds):
+        """Return sidereal longitudes (0..360) for an array of Julian Days."""
+        jds = np.asarray(jds, dtype=float)
+        offset = (jds - J2000) / self.segment_days
+        segs = np.floor(offset).astype(np.int64)
+        x = 2 * (offset - segs) - 1
+        if not jds.size:
+            return np.zeros(jds.shape)
+        coeffs = self._coefficients(segs.ravel())
+        # Clenshaw recurrence, vectorized over all points
+        x_flat = x.ravel()
+        b1 = np.zeros_like(x_flat)
+        b2 = np.zeros_like(x_flat)
+        for k in range(self.degree, 0, -1):
+            b1, b2 = 2 * x_flat * b1 - b2 + coeffs[:, k], b1
+        values = x_flat * b1 - b2 + coeffs[:, 0]
+        return np.mod(values, 360).reshape(jds.shape)
+
+    def segment_count(self):
+        """Number of segments fitted so far."""
+        return int(self._fitted.sum())
+
+
+moon = ChebyshevEphemeris(swe.MOON)
+sun = ChebyshevEphemeris(swe.SUN)
+
+def moon_longitudes(jds):
+    """Vectorized sidereal Moon longitudes for an array of Julian Days."""
+    return moon.longitudes(jds)
+
+def sun_longitudes(jds):
+    """Vectorized sidereal Sun longitudes for an array of Julian Days."""
+    return sun.longitudes(jds)
+
+def tithi_indices(jds):
+    """Vectorized 0-based tithi indices (0..29), as panchang.get_tithi."""
+    angle = np.mod(moon.longitudes(jds) - sun.longitudes(jds), 360)
+    return (angle // 12).astype(np.int64)
+
+def nakshatra_indices(jds):
+    """Vectorized 0-based nakshatra indices (0..26), as panchang.get_nakshatra."""
+    return (moon.longitudes(jds) // (360 / 27)).astype(np.int64)
+
+
+def verify(samples, jd_start, jd_end, seed=0):
+    """Compare against swe.calc_ut at random JDs and print max errors in arcseconds."""
+    rng = np.random.default_rng(seed)
+    jds = rng.uniform(jd_start, jd_end, samples)
+    for name, engine in (("Moon", moon), ("Sun", sun)):
+        started = time.time()
+        approx = engine.longitudes(jds)
+        fit_time = time.time() - started
+        started = time.time()
+        approx = engine.longitudes(jds)
+        eval_time = time.time() - started
+        started = time.time()
+        exact = np.array([swe.calc_ut(jd, engine.body, swe.FLG_SIDEREAL)[0][0] for jd in jds])
+        swe_time = time.time() - started
+        error = np.abs((approx - exact + 180) % 360 - 180) * 3600
+        print(f"{name}: max error {error.max():.4f}\" mean {error.mean():.4f}\" over {samples} points; "
+              f"fit {fit_time:.2f}s ({engine.segment_count()} segments), "
+              f"vectorized {eval_time * 1000:.1f}ms vs calc_ut {swe_time * 1000:.1f}ms")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Check Chebyshev longitudes against Swiss Ephemeris.")
+    parser.add_argument("command", choices=["verify"])
+    parser.add_argument("--samples", type=int, default=20000)
+    parser.add_argument("--start-jd", type=float, default=swe.julday(1900, 1, 1, 0.0))
+    parser.add_argument("--end-jd", type=float, default=swe.julday(2100, 1, 1, 0.0))
+    args = parser.parse_args()
+
+    swe.set_ephe_path(os.path.join(os.path.dirname(__file__), "ephe"))
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+    verify(args.samples, args.start_jd, args.end_jd)
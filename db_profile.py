@@ -0,0 +1,213 @@
+"""
+Database Profile Module
+- Engine options for the "default" and "production" database profiles
+- Per-connection SQLite pragmas: WAL journal, busy timeout, cache and sync level
+- Micro-benchmark comparing read and write latency between profiles
+
+The default profile keeps the original settings. Those are pool recycling
+and pre-ping, which are meant for server databases; they do nothing useful
+for a local SQLite file but also cost little. The production profile is
+opt-in (DB_PROFILE=production) and only changes SQLite databases:
+
+- journal_mode=WAL: readers no longer block the writer, nor it them, so page
+  views keep working while a bulk import or a background job commits.
+- synchronous=NORMAL: in WAL mode a commit no longer fsyncs, only
+  checkpoints do. A power loss can drop the last few commits but never
+  corrupts the file.
+- busy_timeout: a writer waits for the lock instead of failing at once with
+  "database is locked".
+- cache_size, temp_store and mmap_size: keep hot pages and sort scratch
+  space in memory.
+
+Connections come from a fixed-size QueuePool, so the pragmas run once per
+connection rather than once per request.
+"""
+import os
+import time
+import random
+import logging
+import tempfile
+import datetime
+import threading
+import statistics
+
+from sqlalchemy import create_engine, event, select, insert, text
+
+DB_PROFILES = ("default", "production")
+DB_BUSY_TIMEOUT_MS = int(os.environ.get("DB_BUSY_TIMEOUT_MS", 5000))
+DB_POOL_SIZE = int(os.environ.get("DB_POOL_SIZE", 8))
+
+# Applied to every new connection in the production profile, in this order
+PRODUCTION_PRAGMAS = (
+    ("journal_mode", "WAL"),
+    ("synchronous", "NORMAL"),
+    ("busy_timeout", DB_BUSY_TIMEOUT_MS),
+    ("cache_size", -32000),      # KiB, i.e. 32 MB per connection
+    ("temp_store", "MEMORY"),
+    ("mmap_size", 256 * 1024 * 1024),
+)
+
+
+def is_sqlite(database_uri):
+    return database_uri.startswith("sqlite")
+
+def engine_options(profile, database_uri):
+    """SQLAlchemy engine options for a profile."""
+    if profile not in DB_PROFILES:
+        raise ValueError(f"DB_PROFILE must be one of {', '.join(DB_PROFILES)}")
+    if profile == "production" and is_sqlite(database_uri):
+        return {
+            "pool_size": DB_POOL_SIZE,
+            "max_overflow": 0,
+            "pool_timeout": 30,
+            "connect_args": {"timeout": DB_BUSY_TIMEOUT_MS / 1000, "check_same_thread": False},
+        }
+    return {
+        "pool_recycle": 300,
+        "pool_pre_ping": True,
+    }
+
+def install_sqlite_pragmas(engine, pragmas=PRODUCTION_PRAGMAS):
+    """Run the pragmas on every new connection of a SQLite engine."""
+    if engine.dialect.name != "sqlite":
+        return
+
+    @event.listens_for(engine, "connect")
+    def _set_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for name, value in pragmas:
+            cursor.execute(f"PRAGMA {name}={value}")
+        cursor.close()
+
+def sqlite_settings(engine):
+    """Current values of the profile pragmas on one connection, for logging and the benchmark."""
+    if engine.dialect.name != "sqlite":
+        return {}
+    with engine.connect() as conn:
+        return {name: conn.execute(text(f"PRAGMA {name}")).scalar() for name, _ in PRODUCTION_PRAGMAS}
+
+
+# === BENCHMARK ===
+def _latency(samples):
+    """Summary of a list of durations in seconds, reported in milliseconds."""
+    samples = sorted(samples)
+    return {
+        "ops": len(samples),
+        "p50_ms": round(statistics.median(samples) * 1000, 3),
+        "p95_ms": round(samples[int(0.95 * (len(samples) - 1))] * 1000, 3),
+        "max_ms": round(samples[-1] * 1000, 3),
+    }
+
+def _timed(operation, count):
+    samples = []
+    for i in range(count):
+        started = time.perf_counter()
+        operation(i)
+        samples.append(time.perf_counter() - started)
+    return _latency(samples)
+
+def benchmark_profile(profile, metadata, make_user, make_chart, rows=5000, ops=500, drop_indexes=()):
+    """
+    Time typical operations against a fresh temporary SQLite database in one
+    profile. The database is seeded with `rows` users and birth charts
+    (make_user(i) / make_chart(i) return column dicts), then measures:
+
+    - write: insert one user and chart, committed on its own
+    - read_chart: birth chart by user_id (birth_chart, downloads, delete)
+    - read_page: first page of the home page user list
+    - read_under_write: read_chart while another thread commits writes
+
+    drop_indexes names indexes to remove after creating the schema, to
+    measure a database that has not been migrated.
+    """
+    directory = tempfile.mkdtemp(prefix="db-benchmark-")
+    database_uri = f"sqlite:///{os.path.join(directory, 'bench.db')}"
+    engine = create_engine(database_uri, **engine_options(profile, database_uri))
+    if profile == "production":
+        install_sqlite_pragmas(engine)
+    try:
+        metadata.create_all(engine)
+        with engine.begin() as conn:
+            for name in drop_indexes:
+                conn.execute(text(f"DROP INDEX IF EXISTS {name}"))
+        users, charts = metadata.tables["user"], metadata.tables["birth_chart"]
+        with engine.begin() as conn:
+            user_ids = conn.execute(insert(users).returning(users.c.id, sort_by_parameter_order=True),
+                                    [make_user(i) for i in range(rows)]).scalars().all()
+            conn.execute(insert(charts), [dict(make_chart(i), user_id=user_id)
+                                          for i, user_id in enumerate(user_ids)])
+        rng = random.Random(42)
+
+        def write(i):
+            with engine.begin() as conn:
+                user_id = conn.execute(insert(users).returning(users.c.id), make_user(rows + i)).scalar()
+                conn.execute(insert(charts), dict(make_chart(rows + i), user_id=user_id))
+
+        def read_chart(i):
+            with engine.connect() as conn:
+                conn.execute(select(charts).where(charts.c.user_id == rng.choice(user_ids))).first()
+
+        def read_page(i):
+            with engine.connect() as conn:
+                conn.execute(select(users.c.id, users.c.full_name)
+                             .order_by(users.c.created_at.desc(), users.c.id.desc()).limit(50)).all()
+
+        result = {
+            "profile": profile,
+            "settings": sqlite_settings(engine),
+            "indexes_dropped": list(drop_indexes),
+            "write": _timed(write, ops),
+            "read_chart": _timed(read_chart, ops),
+            "read_page": _timed(read_page, ops),
+        }
+
+        stop = threading.Event()
+        write_errors = []
+
+        def writer():
+            i = 0
+            while not stop.is_set():
+                try:
+                    write(ops + i)
+                except Exception as e:
+                    write_errors.append(e)
+                i += 1
+
+        thread = threading.Thread(target=writer, daemon=True)
+        thread.start()
+        try:
+            read_errors = []
+
+            def read_tolerant(i):
+                try:
+                    read_chart(i)
+                except Exception as e:
+                    read_errors.append(e)
+
+            result["read_under_write"] = _timed(read_tolerant, ops)
+        finally:
+            stop.set()
+            thread.join()
+        result["read_under_write"]["errors"] = len(read_errors) + len(write_errors)
+        return result
+    finally:
+        engine.dispose()
+        for name in os.listdir(directory):
+            os.remove(os.path.join(directory, name))
+        os.rmdir(directory)
+
+def benchmark_user(i):
+    """Synthetic user row for benchmark_profile."""
+    return {
+        "full_name": f"Benchmark User {i}",
+        "birth_date": datetime.datetime(1970, 1, 1) + datetime.timedelta(days=i % 20000),
+        "birth_time": "12:00:00",
+        "created_at": datetime.datetime(2024, 1, 1) + datetime.timedelta(seconds=i),
+    }
+
+def benchmark_chart(i):
+    """Synthetic birth chart row for benchmark_profile."""
+    return {"sun_position": (i * 0.9856) % 360, "moon_position": (i * 13.176) % 360}
+
+def log_profile(profile, engine):
+    logging.info(f"Database profile {profile}: {sqlite_settings(engine) or engine.dialect.name}")
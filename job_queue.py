@@ -0,0 +1,256 @@
+"""
+Job Queue Module
+- In-process background jobs with a bounded worker thread pool
+- Persistent job rows in the app database (no external broker)
+- Deduplication of identical queued/running jobs
+- Retries with exponential backoff, except for permanent failures
+- Queue depth, wait-time and outcome metrics
+
+A job is a registered handler kind plus JSON parameters. Handlers run
+inside an app context and return (data, mimetype, filename). The bytes are
+written to result_dir/<job id> and served by the /jobs/<id>/result route.
+Rows are the source of truth for status; the in-memory queue only holds ids.
+Workers start on first use in each process, and at that point jobs left
+queued or running by a previous process are queued again, unless a running
+job was interrupted during its last attempt, which fails it. Finished jobs
+older than the retention period are pruned at startup and then at most once
+per PRUNE_INTERVAL, after a worker finishes a job. The queue assumes
+one application process per database, like the rest of the SQLite setup.
+"""
+import os
+import json
+import queue
+import hashlib
+import logging
+import datetime
+import threading
+from collections import deque
+
+QUEUED, RUNNING, DONE, FAILED = "queued", "running", "done", "failed"
+ACTIVE_STATES = (QUEUED, RUNNING)
+PRUNE_INTERVAL = datetime.timedelta(minutes=int(os.environ.get("JOB_PRUNE_INTERVAL_MINUTES", 15)))
+
+
+def utcnow():
+    """Current UTC time as a naive datetime, the form stored in the job table's DateTime columns."""
+    return datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+
+
+class QueueFull(Exception):
+    """Raised by submit when max_depth jobs are already waiting."""
+
+class PermanentJobError(Exception):
+    """Raised by a handler when retrying cannot succeed (e.g. the record is gone); the job fails at once."""
+
+
+class JobQueue:
+    """Bounded pool of worker threads fed from a persistent job table."""
+
+    def __init__(self, app, db, model, result_dir, workers=2, max_depth=100, retention_hours=24):
+        self.app = app
+        self.db = db
+        self.model = model
+        self.result_dir = result_dir
+        self.workers = workers
+        self.max_depth = max_depth
+        self.retention = datetime.timedelta(hours=retention_hours)
+        self._handlers = {}  # kind → (handler, max_attempts)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._started = False
+        self._running = 0
+        self._last_prune = None
+        self._wait_times = deque(maxlen=500)
+        self.completed = 0
+        self.failed = 0
+        self.retried = 0
+        self.deduplicated = 0
+
+    def register(self, kind, handler, max_attempts=3):
+        """Register handler(**params) → (bytes, mimetype, filename) for a job kind."""
+        self._handlers[kind] = (handler, max_attempts)
+
+    @staticmethod
+    def dedupe_key(kind, params):
+        """Hash identifying identical jobs."""
+        return hashlib.sha256(f"{kind}|{json.dumps(params, sort_keys=True)}".encode()).hexdigest()
+
+    # === SUBMISSION ===
+    def submit(self, kind, params):
+        """
+        Queue a job and return its row, or the row of an identical job that is
+        still queued or running. Raises QueueFull when max_depth jobs are waiting.
+        """
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind {kind!r}")
+        self.start()
+        Job = self.model
+        key = self.dedupe_key(kind, params)
+        with self._lock:
+            existing = Job.query.filter(Job.dedupe_key == key, Job.status.in_(ACTIVE_STATES)).first()
+            if existing is not None:
+                self.deduplicated += 1
+                return existing
+            if self._queue.qsize() >= self.max_depth:
+                raise QueueFull(f"{self._queue.qsize()} jobs already queued")
+            job = Job(
+                id=os.urandom(16).hex(), kind=kind, params=json.dumps(params, sort_keys=True),
+                dedupe_key=key, status=QUEUED, attempts=0,
+                max_attempts=self._handlers[kind][1], created_at=utcnow(),
+            )
+            self.db.session.add(job)
+            self.db.session.commit()
+            self._queue.put(job.id)
+        return job
+
+    def get(self, job_id):
+        """Return the job row or None."""
+        return self.db.session.get(self.model, job_id)
+
+    def result_path(self, job):
+        """Path of a finished job's result file."""
+        return os.path.join(self.result_dir, job.id)
+
+    # === WORKERS ===
+    def start(self):
+        """Start the worker threads once per process, re-queueing unfinished jobs."""
+        if self._started:
+            return
+        with self._lock:
+            if self._started:
+                return
+            os.makedirs(self.result_dir, exist_ok=True)
+            with self.app.app_context():
+                self._prune()
+                self._last_prune = utcnow()
+                Job = self.model
+                for job in Job.query.filter(Job.status.in_(ACTIVE_STATES)).order_by(Job.created_at):
+                    if job.status == RUNNING and job.attempts >= job.max_attempts:
+                        # Interrupted during its last attempt: running it again would exceed max_attempts
+                        job.status, job.finished_at = FAILED, utcnow()
+                        job.error = f"Interrupted during attempt {job.attempts} of {job.max_attempts}"
+                        continue
+                    job.status = QUEUED
+                    self._queue.put(job.id)
+                self.db.session.commit()
+            for i in range(self.workers):
+                threading.Thread(target=self._work, name=f"job-worker-{i}", daemon=True).start()
+            self._started = True
+
+    def _work(self):
+        while True:
+            job_id = self._queue.get()
+            with self._lock:
+                self._running += 1
+            try:
+                with self.app.app_context():
+                    self._run(job_id)
+                    self._maybe_prune()
+            except Exception as e:
+                logging.error(f"Job worker error for {job_id}: {e}")
+            finally:
+                with self._lock:
+                    self._running -= 1
+
+    def _run(self, job_id):
+        """Run one attempt of a job and record the outcome."""
+        job = self.get(job_id)
+        if job is None or job.status != QUEUED:
+            return
+        if job.attempts >= job.max_attempts:
+            job.status, job.finished_at = FAILED, utcnow()
+            job.error = job.error or f"No attempts left ({job.attempts} of {job.max_attempts})"
+            self.db.session.commit()
+            self.failed += 1
+            return
+        now = utcnow()
+        job.status, job.started_at, job.attempts = RUNNING, now, job.attempts + 1
+        self.db.session.commit()
+        self._wait_times.append((now - job.created_at).total_seconds())
+        handler, _ = self._handlers[job.kind]
+        try:
+            data, mimetype, filename = handler(**json.loads(job.params))
+            tmp_path = self.result_path(job) + ".tmp"
+            with open(tmp_path, "wb") as fh:
+                fh.write(data)
+            os.replace(tmp_path, self.result_path(job))
+        except Exception as e:
+            self.db.session.rollback()
+            job = self.get(job_id)
+            job.error = f"{e.__class__.__name__}: {e}"
+            if job.attempts < job.max_attempts and not isinstance(e, PermanentJobError):
+                job.status = QUEUED
+                self.db.session.commit()
+                self.retried += 1
+                delay = 2 ** job.attempts
+                logging.warning(f"Job {job_id} ({job.kind}) failed, retrying in {delay}s: {job.error}")
+                threading.Timer(delay, self._queue.put, args=(job_id,)).start()
+            else:
+                job.status, job.finished_at = FAILED, utcnow()
+                self.db.session.commit()
+                self.failed += 1
+                logging.error(f"Job {job_id} ({job.kind}) failed after {job.attempts} attempts: {job.error}")
+            return
+        job.status, job.finished_at = DONE, utcnow()
+        job.result_mimetype, job.result_name, job.result_size = mimetype, filename, len(data)
+        job.error = None
+        self.db.session.commit()
+        self.completed += 1
+
+    def _maybe_prune(self):
+        """Prune if PRUNE_INTERVAL has passed since the last prune (in any worker)."""
+        now = utcnow()
+        with self._lock:
+            if self._last_prune is not None and now - self._last_prune < PRUNE_INTERVAL:
+                return
+            self._last_prune = now
+        self._prune()
+
+    def _prune(self):
+        """Delete finished jobs (and their results) older than the retention period."""
+        Job = self.model
+        cutoff = utcnow() - self.retention
+        old = Job.query.filter(Job.status.in_((DONE, FAILED)), Job.finished_at < cutoff).all()
+        for job in old:
+            try:
+                os.remove(self.result_path(job))
+            except FileNotFoundError:
+                pass
+            self.db.session.delete(job)
+        self.db.session.commit()
+
+    # === METRICS ===
+    def stats(self):
+        """Return queue depth, wait times and outcome counters for monitoring."""
+        with self._lock:
+            waits = sorted(self._wait_times)
+            return {
+                "name": "jobs",
+                "workers": self.workers if self._started else 0,
+                "queued": self._queue.qsize(),
+                "running": self._running,
+                "max_depth": self.max_depth,
+                "completed": self.completed,
+                "failed": self.failed,
+                "retried": self.retried,
+                "deduplicated": self.deduplicated,
+                "wait_seconds": {
+                    "mean": round(sum(waits) / len(waits), 3),
+                    "p95": round(waits[int(0.95 * (len(waits) - 1))], 3),
+                    "max": round(waits[-1], 3),
+                } if waits else None,
+            }
+
+    def to_json(self, job):
+        """Public status of a job."""
+        return {
+            "id": job.id,
+            "kind": job.kind,
+            "status": job.status,
+            "attempts": job.attempts,
+            "error": job.error,
+            "created_at": job.created_at.isoformat() + "Z",
+            "started_at": job.started_at.isoformat() + "Z" if job.started_at else None,
+            "finished_at": job.finished_at.isoformat() + "Z" if job.finished_at else None,
+            "result_size": job.result_size,
+        }
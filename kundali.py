@@ -0,0 +1,308 @@
+"""
+Kundali Chart Rendering
+- South Indian style chart as PNG
+- Static frame (title, grid, house numbers, fixed legend) drawn once per process
+- Fonts loaded and text measured once per process
+- Content-addressed LRU cache of encoded PNG bytes
+- The same layout as an SVG string or a ReportLab vector Drawing
+
+A chart's pixels depend only on the ascendant sign, the planet → house map
+(in drawing order) and the name, so the PNG for the same inputs is rendered
+once and then served from the cache. Bump RENDERER_VERSION whenever the
+drawing changes so stale bytes are never served.
+
+The vector renderers share one list of rectangles and text baselines
+(chart_layout) in PNG pixel coordinates. They need no rasterization and no
+cache: an SVG is about 4 KB and renders in about 0.2 ms.
+"""
+import io
+import os
+import hashlib
+import threading
+from functools import lru_cache
+from xml.sax.saxutils import escape
+
+from PIL import Image, ImageDraw, ImageFont
+from reportlab.graphics.shapes import Drawing, Rect, String
+from reportlab.lib import colors
+
+from caching import LRUCache
+
+RENDERER_VERSION = 2
+
+PLANET_ABBR = {'Sun': 'Su', 'Moon': 'Mo', 'Mercury': 'Me', 'Venus': 'Ve', 'Mars': 'Ma',
+               'Jupiter': 'Ju', 'Saturn': 'Sa', 'Rahu': 'Ra', 'Ketu': 'Ke'}
+
+# Image geometry
+WIDTH = 600
+HEIGHT = 650
+CELL_SIZE = 120
+START_X = 60
+START_Y = 100
+
+# House number in each cell of the 4x4 grid (-1 = empty centre)
+HOUSE_LAYOUT = [
+    [12, 1, 2, 3],
+    [11, -1, -1, 4],
+    [10, -1, -1, 5],
+    [9, 8, 7, 6],
+]
+
+TITLE = "Kundali Chart (South Indian Style)"
+STATIC_LEGEND = [
+    "Chart Layout: House numbers (light gray) in top-left, Sign numbers (blue) in top-right, Planets (red) in center",
+    "Sign Numbers: 1=Aries, 2=Taurus, 3=Gemini, 4=Cancer, 5=Leo, 6=Virgo, 7=Libra, 8=Scorpio, 9=Sagittarius, 10=Capricorn, 11=Aquarius, 12=Pisces",
+]
+LEGEND_Y = START_Y + 4 * CELL_SIZE + 20
+
+# Planets in one house: up to three stacked in the centre, more (at most
+# nine) in two columns of a smaller font inside this band of the cell
+PLANET_BAND_TOP = 24
+PLANET_BAND_HEIGHT = 92
+PLANET_SMALL_SPACING = 17
+
+png_cache = LRUCache(
+    "kundali_png",
+    maxsize=int(os.environ.get("KUNDALI_CACHE_SIZE", 256)),
+)
+
+_fonts = None
+_frame = None
+_frame_lock = threading.Lock()
+
+
+def _load_fonts():
+    """Return {"title", "house", "sign", "planet"} fonts, falling back to Pillow's default."""
+    try:
+        return {
+            "title": ImageFont.truetype("arial.ttf", 20),
+            "house": ImageFont.truetype("arial.ttf", 12),
+            "sign": ImageFont.truetype("arial.ttf", 14),
+            "planet": ImageFont.truetype("arial.ttf", 16),
+            "planet_small": ImageFont.truetype("arial.ttf", 13),
+        }
+    except OSError:
+        default = ImageFont.load_default()
+        return {"title": default, "house": default, "sign": default, "planet": default, "planet_small": default}
+
+def planet_slots(count):
+    """
+    (centre_x, top_y, font role) within a cell for each of `count` >= 2
+    planets: two or three stacked, four to nine in two columns filled row
+    by row in the smaller "planet_small" font.
+    """
+    if count <= 3:
+        top, spacing = (35, 25) if count == 2 else (25, 20)
+        return [(CELL_SIZE / 2, top + i * spacing, "planet") for i in range(count)]
+    rows = (count + 1) // 2
+    top = PLANET_BAND_TOP + (PLANET_BAND_HEIGHT - rows * PLANET_SMALL_SPACING) / 2
+    return [(CELL_SIZE * (1 + 2 * (i % 2)) / 4, top + (i // 2) * PLANET_SMALL_SPACING, "planet_small")
+            for i in range(count)]
+
+@lru_cache(maxsize=256)
+def _text_size(font_name, text):
+    """(width, height) of text in one of the shared fonts."""
+    left, top, right, bottom = ImageDraw.Draw(_frame).textbbox((0, 0), text, font=_fonts[font_name])
+    return right - left, bottom - top
+
+def _build_frame():
+    """Draw everything that does not depend on the chart."""
+    img = Image.new('RGB', (WIDTH, HEIGHT), 'white')
+    draw = ImageDraw.Draw(img)
+    title_bbox = draw.textbbox((0, 0), TITLE, font=_fonts["title"])
+    draw.text(((WIDTH - (title_bbox[2] - title_bbox[0])) // 2, 20), TITLE, fill='black', font=_fonts["title"])
+    for row in range(4):
+        for col in range(4):
+            x = START_X + col * CELL_SIZE
+            y = START_Y + row * CELL_SIZE
+            house_num = HOUSE_LAYOUT[row][col]
+            if house_num == -1:
+                draw.rectangle([x, y, x + CELL_SIZE, y + CELL_SIZE], outline='black', fill='#e9ecef', width=2)
+                continue
+            draw.rectangle([x, y, x + CELL_SIZE, y + CELL_SIZE], outline='black', fill='#f8f9fa', width=2)
+            draw.text((x + 5, y + 5), str(house_num), fill='#aaa', font=_fonts["house"])
+    for i, legend_text in enumerate(STATIC_LEGEND):
+        draw.text((10, LEGEND_Y + i * 15), legend_text, fill='gray', font=_fonts["house"])
+    return img
+
+def _get_frame():
+    """Return the shared static frame, building it (and the fonts) on first use."""
+    global _fonts, _frame
+    if _frame is None:
+        with _frame_lock:
+            if _frame is None:
+                _fonts = _load_fonts()
+                _frame = _build_frame()
+    return _frame
+
+def render_png(ascendant_sign_index, ascendant_sign, planet_houses, user_name=""):
+    """Draw one chart onto a copy of the frame and return the PNG bytes."""
+    img = _get_frame().copy()
+    draw = ImageDraw.Draw(img)
+
+    if user_name:
+        name_width = _text_size("house", user_name)[0]
+        draw.text(((WIDTH - name_width) // 2, 50), user_name, fill='gray', font=_fonts["house"])
+
+    houses_with_planets = {}
+    for planet, house_num in planet_houses:
+        houses_with_planets.setdefault(house_num, []).append(PLANET_ABBR.get(planet, planet[:2]))
+
+    for row in range(4):
+        for col in range(4):
+            house_num = HOUSE_LAYOUT[row][col]
+            if house_num == -1:
+                continue
+            x = START_X + col * CELL_SIZE
+            y = START_Y + row * CELL_SIZE
+
+            # Sign number (top-right, blue)
+            sign_text = str((ascendant_sign_index + house_num - 1) % 12 + 1)
+            sign_width = _text_size("sign", sign_text)[0]
+            draw.text((x + CELL_SIZE - sign_width - 5, y + 5), sign_text, fill='#0066cc', font=_fonts["sign"])
+
+            # Planets (center, red): one centred, otherwise placed by planet_slots
+            planet_texts = houses_with_planets.get(house_num)
+            if not planet_texts:
+                continue
+            if len(planet_texts) == 1:
+                planet_width, planet_height = _text_size("planet", planet_texts[0])
+                draw.text((x + (CELL_SIZE - planet_width) // 2, y + (CELL_SIZE - planet_height) // 2),
+                          planet_texts[0], fill='#d63384', font=_fonts["planet"])
+                continue
+            for planet_text, (centre_x, top, font_name) in zip(planet_texts, planet_slots(len(planet_texts))):
+                planet_width = _text_size(font_name, planet_text)[0]
+                draw.text((x + int(centre_x - planet_width / 2), y + int(top)),
+                          planet_text, fill='#d63384', font=_fonts[font_name])
+
+    lagna_text = f"Lagna (Ascendant): House 1 = Sign {ascendant_sign_index + 1} ({ascendant_sign})"
+    draw.text((10, LEGEND_Y + len(STATIC_LEGEND) * 15), lagna_text, fill='gray', font=_fonts["house"])
+
+    img_buffer = io.BytesIO()
+    img.save(img_buffer, format='PNG')
+    return img_buffer.getvalue()
+
+def chart_key(birth_chart_data, user_name=""):
+    """Content hash of everything a rendered chart depends on."""
+    parts = (
+        RENDERER_VERSION,
+        birth_chart_data['ascendant_sign_index'],
+        birth_chart_data['ascendant_sign'],
+        tuple(birth_chart_data['planet_houses'].items()),
+        user_name,
+    )
+    return hashlib.sha256(repr(parts).encode()).hexdigest()
+
+def get_kundali_png(birth_chart_data, user_name=""):
+    """Return the PNG bytes for a chart, rendering it only on a cache miss."""
+    return png_cache.get_or_compute(
+        chart_key(birth_chart_data, user_name),
+        lambda: render_png(
+            birth_chart_data['ascendant_sign_index'],
+            birth_chart_data['ascendant_sign'],
+            tuple(birth_chart_data['planet_houses'].items()),
+            user_name,
+        ),
+    )
+
+
+# === VECTOR RENDERERS ===
+# Text sizes and colours of the PNG, by role
+TEXT_STYLES = {
+    "title": (20, "#000000"),
+    "name": (12, "#808080"),
+    "house": (12, "#aaaaaa"),
+    "sign": (14, "#0066cc"),
+    "planet": (16, "#d63384"),
+    "planet_small": (13, "#d63384"),
+    "legend": (8, "#808080"),
+}
+# Baseline below the top of the text, for the planet roles
+PLANET_BASELINE = {"planet": 14, "planet_small": 11}
+CELL_FILL = "#f8f9fa"
+CENTER_FILL = "#e9ecef"
+
+def chart_layout(birth_chart_data, user_name="", frame_text=True):
+    """
+    Return (rects, texts) for one chart: rects as (x, y, w, h, fill) and
+    texts as (x, baseline_y, text, role, anchor) with anchor "start",
+    "middle" or "end". Coordinates are PNG pixels (origin top-left).
+    frame_text=False leaves out the title, name and legend.
+    """
+    asc_index = birth_chart_data['ascendant_sign_index']
+    houses_with_planets = {}
+    for planet, house_num in birth_chart_data['planet_houses'].items():
+        houses_with_planets.setdefault(house_num, []).append(PLANET_ABBR.get(planet, planet[:2]))
+
+    rects, texts = [], []
+    if frame_text:
+        texts.append((WIDTH / 2, 38, TITLE, "title", "middle"))
+        if user_name:
+            texts.append((WIDTH / 2, 62, user_name, "name", "middle"))
+    for row in range(4):
+        for col in range(4):
+            x = START_X + col * CELL_SIZE
+            y = START_Y + row * CELL_SIZE
+            house_num = HOUSE_LAYOUT[row][col]
+            if house_num == -1:
+                rects.append((x, y, CELL_SIZE, CELL_SIZE, CENTER_FILL))
+                continue
+            rects.append((x, y, CELL_SIZE, CELL_SIZE, CELL_FILL))
+            texts.append((x + 5, y + 16, str(house_num), "house", "start"))
+            texts.append((x + CELL_SIZE - 5, y + 18, str((asc_index + house_num - 1) % 12 + 1), "sign", "end"))
+            planet_texts = houses_with_planets.get(house_num, [])
+            if len(planet_texts) == 1:
+                texts.append((x + CELL_SIZE / 2, y + CELL_SIZE / 2 + 6, planet_texts[0], "planet", "middle"))
+                continue
+            for planet_text, (centre_x, top, role) in zip(planet_texts, planet_slots(len(planet_texts))):
+                texts.append((x + centre_x, y + top + PLANET_BASELINE[role], planet_text, role, "middle"))
+    if frame_text:
+        lagna_text = (f"Lagna (Ascendant): House 1 = Sign {asc_index + 1} "
+                      f"({birth_chart_data['ascendant_sign']})")
+        for i, legend_text in enumerate(STATIC_LEGEND + [lagna_text]):
+            texts.append((10, LEGEND_Y + 10 + i * 15, legend_text, "legend", "start"))
+    return rects, texts
+
+def render_svg(birth_chart_data, user_name="", frame_text=True):
+    """
+    Return the chart as an SVG document string. With frame_text=False the
+    view box is cropped to the grid, for inline use next to HTML captions.
+    """
+    rects, texts = chart_layout(birth_chart_data, user_name, frame_text)
+    if frame_text:
+        view_box = f"0 0 {WIDTH} {HEIGHT}"
+    else:
+        view_box = f"{START_X - 1} {START_Y - 1} {4 * CELL_SIZE + 2} {4 * CELL_SIZE + 2}"
+    parts = [
+        f'<svg xmlns="http://www.w3.org/2000/svg" viewBox="{view_box}" '
+        f'font-family="Helvetica, Arial, sans-serif" role="img" aria-label="{escape(TITLE)}">',
+        '<rect width="100%" height="100%" fill="#ffffff"/>' if frame_text else '',
+        '<g stroke="#000000" stroke-width="2">',
+    ]
+    for x, y, w, h, fill in rects:
+        parts.append(f'<rect x="{x}" y="{y}" width="{w}" height="{h}" fill="{fill}"/>')
+    parts.append('</g>')
+    for x, y, text, role, anchor in texts:
+        size, color = TEXT_STYLES[role]
+        anchor_attr = f' text-anchor="{anchor}"' if anchor != "start" else ''
+        parts.append(f'<text x="{x:g}" y="{y:g}" font-size="{size}" fill="{color}"{anchor_attr}>{escape(text)}</text>')
+    parts.append('</svg>')
+    return ''.join(parts)
+
+def chart_drawing(birth_chart_data, user_name="", width=None):
+    """Return the chart as a ReportLab Drawing (vector), scaled to width points if given."""
+    rects, texts = chart_layout(birth_chart_data, user_name)
+    drawing = Drawing(WIDTH, HEIGHT)
+    # ReportLab's origin is bottom-left
+    for x, y, w, h, fill in rects:
+        drawing.add(Rect(x, HEIGHT - y - h, w, h, fillColor=colors.HexColor(fill),
+                         strokeColor=colors.black, strokeWidth=2))
+    for x, y, text, role, anchor in texts:
+        size, color = TEXT_STYLES[role]
+        drawing.add(String(x, HEIGHT - y, text, fontName="Helvetica", fontSize=size,
+                           fillColor=colors.HexColor(color), textAnchor=anchor))
+    if width:
+        scale = width / WIDTH
+        drawing.scale(scale, scale)
+        drawing.width, drawing.height = WIDTH * scale, HEIGHT * scale
+    return drawing
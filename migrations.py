@@ -0,0 +1,85 @@
+"""
+Schema Migrations
+- Adds columns declared on the models but missing from existing tables
+- Creates indexes declared on the models but missing from existing tables
+- Safe to run on every start; a no-op once the schema is current
+- Reports pending changes without applying them
+
+db.create_all() creates missing tables but never alters existing ones, so a
+database created before a column or index was added to a model gets it
+here: columns as a nullable ALTER TABLE ... ADD COLUMN, indexes by name.
+Data backfills for new columns live next to the models they fill (see
+backfill_birth_charts in app.py).
+
+upgrade_schema runs all three steps. The default database profile runs it
+at startup; the production profile leaves it to `flask migrate-db` so that
+schema changes happen once, at deploy time, and startup only logs
+pending_changes.
+"""
+import logging
+
+from sqlalchemy import inspect, text
+
+
+def add_missing_columns(engine, models):
+    """Add every model column missing from its table. Returns the added "table.column" names."""
+    inspector = inspect(engine)
+    quote = engine.dialect.identifier_preparer.quote
+    added = []
+    with engine.begin() as conn:
+        for model in models:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+            existing = {column["name"] for column in inspector.get_columns(table.name)}
+            for column in table.columns:
+                if column.name in existing:
+                    continue
+                column_type = column.type.compile(dialect=engine.dialect)
+                conn.execute(text(f"ALTER TABLE {quote(table.name)} ADD COLUMN {quote(column.name)} {column_type}"))
+                added.append(f"{table.name}.{column.name}")
+    if added:
+        logging.info(f"Added columns: {', '.join(added)}")
+    return added
+
+
+def create_missing_indexes(engine, models):
+    """Create every model index missing from its table. Returns the created index names."""
+    inspector = inspect(engine)
+    created = []
+    with engine.begin() as conn:
+        for model in models:
+            table = model.__table__
+            if not inspector.has_table(table.name):
+                continue
+            existing = {index["name"] for index in inspector.get_indexes(table.name)}
+            for index in table.indexes:
+                if index.name not in existing:
+                    index.create(conn)
+                    created.append(index.name)
+    if created:
+        logging.info(f"Created indexes: {', '.join(created)}")
+    return created
+
+def pending_changes(engine, models):
+    """Tables, columns and indexes declared on the models but missing from the database."""
+    inspector = inspect(engine)
+    pending = []
+    for model in models:
+        table = model.__table__
+        if not inspector.has_table(table.name):
+            pending.append(f"table {table.name}")
+            continue
+        columns = {column["name"] for column in inspector.get_columns(table.name)}
+        pending += [f"column {table.name}.{column.name}" for column in table.columns if column.name not in columns]
+        indexes = {index["name"] for index in inspector.get_indexes(table.name)}
+        pending += [f"index {index.name}" for index in table.indexes if index.name not in indexes]
+    return pending
+
+def upgrade_schema(engine, metadata, models):
+    """Create missing tables, columns and indexes. Returns what was pending."""
+    pending = pending_changes(engine, models)
+    metadata.create_all(engine)
+    add_missing_columns(engine, models)
+    create_missing_indexes(engine, models)
+    return pending
@@ -0,0 +1,153 @@
+"""
+Muhurta Engine
+- Raahu, Gulika and Yamaganda Kaal
+- Day and night Choghadiya
+- Planetary Hora (12 day + 12 night)
+- Abhijit Muhurta and Brahma Muhurta
+
+Every window is a fixed fraction of the daytime (sunrise → sunset), the night
+(sunset → next sunrise) or the pre-dawn night before sunrise, so one
+sun-times triple yields them all in a single pass over a precomputed table
+per weekday. Adding a window means adding table rows, never ephemeris calls.
+
+Brahma Muhurta is the 14th of the 15 night muhurtas before sunrise. The
+preceding night's length is taken from the following night (from the same
+triple); the two differ by at most a few seconds per muhurta.
+"""
+import datetime
+from collections import namedtuple
+
+from astro_time_windows import (
+    CHOGHADIYA_DAY_TABLE, CHOGHADIYA_NIGHT_TABLE, CHOGHADIYA_QUALITY,
+    RAAHU_INDEX, GULIKA_INDEX, YAMAGANDA_INDEX,
+)
+from sun_times import sun_times, jd_to_ist
+
+# Spans the windows divide
+DAY, NIGHT, PRE_DAWN = 0, 1, 2
+
+# Hora lords cycle in this (Chaldean, descending speed) order; the first day
+# hora belongs to the weekday's lord.
+HORA_SEQUENCE = ("Sun", "Venus", "Mercury", "Moon", "Saturn", "Jupiter", "Mars")
+WEEKDAY_LORDS = ("Moon", "Mars", "Mercury", "Jupiter", "Venus", "Saturn", "Sun")  # Monday=0
+
+# Windows returned as one (start, end) pair; the others are lists of periods
+SINGLE_WINDOWS = ("raahu_kaal", "gulika_kaal", "yamaganda_kaal", "abhijit", "brahma_muhurta")
+
+# One row per window: the window covers [num_start/den, num_end/den] of span
+Segment = namedtuple("Segment", "kind type index name quality span num_start num_end den")
+
+
+def _segment_table(weekday):
+    """Return every Segment for a Python weekday (Monday=0)."""
+    rows = [
+        Segment("raahu_kaal", None, None, None, None, DAY, RAAHU_INDEX[weekday], RAAHU_INDEX[weekday] + 1, 8),
+        Segment("gulika_kaal", None, None, None, None, DAY, GULIKA_INDEX[weekday], GULIKA_INDEX[weekday] + 1, 8),
+        Segment("yamaganda_kaal", None, None, None, None, DAY, YAMAGANDA_INDEX[weekday], YAMAGANDA_INDEX[weekday] + 1, 8),
+        Segment("abhijit", None, None, None, None, DAY, 7, 8, 15),
+        Segment("brahma_muhurta", None, None, None, None, PRE_DAWN, 13, 14, 15),
+    ]
+    # Choghadiya tables are keyed Sunday=0
+    choghadiya_weekday = (weekday + 1) % 7
+    for label, span, table in (("Day", DAY, CHOGHADIYA_DAY_TABLE), ("Night", NIGHT, CHOGHADIYA_NIGHT_TABLE)):
+        for i, name in enumerate(table[choghadiya_weekday]):
+            rows.append(Segment("choghadiya", label, i + 1, name, CHOGHADIYA_QUALITY[name], span, i, i + 1, 7))
+    first_lord = HORA_SEQUENCE.index(WEEKDAY_LORDS[weekday])
+    for label, span, offset in (("Day", DAY, 0), ("Night", NIGHT, 12)):
+        for i in range(12):
+            lord = HORA_SEQUENCE[(first_lord + offset + i) % 7]
+            rows.append(Segment("hora", label, i + 1, lord, None, span, i, i + 1, 12))
+    return tuple(rows)
+
+SEGMENT_TABLES = {weekday: _segment_table(weekday) for weekday in range(7)}
+
+
+def compute_muhurtas(date_obj, sunrise, sunset, next_sunrise):
+    """
+    Return every window for date_obj from its sun-times triple (IST
+    datetimes, any of which may be None):
+    {"sunrise", "sunset", "next_sunrise", "raahu_kaal": (start, end), ...,
+     "choghadiya": [dict, ...], "hora": [dict, ...]}.
+    Windows whose span is unknown are (None, None) or left out of the lists;
+    Choghadiya is all 14 periods or none, as get_choghadiya.
+    """
+    spans = {}
+    if sunrise and sunset and sunset > sunrise:
+        spans[DAY] = (sunrise, sunset - sunrise)
+    if sunset and next_sunrise and next_sunrise > sunset:
+        night = next_sunrise - sunset
+        spans[NIGHT] = (sunset, night)
+        if sunrise:
+            spans[PRE_DAWN] = (sunrise - night, night)
+
+    result = {"sunrise": sunrise, "sunset": sunset, "next_sunrise": next_sunrise,
+              "choghadiya": [], "hora": []}
+    for kind in SINGLE_WINDOWS:
+        result[kind] = (None, None)
+    for seg in SEGMENT_TABLES[date_obj.weekday()]:
+        if seg.span not in spans:
+            continue
+        base, length = spans[seg.span]
+        start = base + length * seg.num_start / seg.den
+        end = base + length * seg.num_end / seg.den
+        if seg.kind in SINGLE_WINDOWS:
+            result[seg.kind] = (start, end)
+        else:
+            period = {"type": seg.type, "index": seg.index, "start": start, "end": end}
+            if seg.kind == "choghadiya":
+                period.update(name=seg.name, quality=seg.quality)
+            else:
+                period["lord"] = seg.name
+            result[seg.kind].append(period)
+    if len(result["choghadiya"]) != 14:
+        result["choghadiya"] = []
+    return result
+
+def get_muhurtas(date_obj, latitude=28.6139, longitude=77.2090, mode=None):
+    """Return compute_muhurtas for one date from a single sun-times lookup (sunrise, sunset, next sunrise)."""
+    sun = sun_times.get_range(date_obj, 1, latitude, longitude, mode)
+    return compute_muhurtas(date_obj, sun.sunrises[0], sun.sunsets[0], sun.next_sunrises[0])
+
+def iter_muhurtas(start_date, days, latitude=28.6139, longitude=77.2090, mode=None):
+    """Yield (date, compute_muhurtas result) for consecutive dates from one chained sun-times walk."""
+    to_ist = lambda jd: jd_to_ist(jd) if jd is not None else None
+    for date_obj, rise_jd, set_jd, next_rise_jd in sun_times.iter_range_jd(
+            start_date, days, latitude, longitude, mode):
+        yield date_obj, compute_muhurtas(date_obj, to_ist(rise_jd), to_ist(set_jd), to_ist(next_rise_jd))
+
+def iter_muhurtas_bulk(queries, mode=None):
+    """
+    Yield (key, date, muhurtas) for (key, date, lat, lon) queries. Queries are
+    grouped by sun_times.location_key (the cache grid cell, or the exact point
+    in tile mode, which interpolates there) and each run of consecutive dates
+    is one chained walk, so every sunrise is computed once and each query gets
+    what get_muhurtas would return for it. Results come out grouped by
+    location, not in input order.
+    """
+    groups = {}
+    for key, date_obj, lat, lon in queries:
+        loc = sun_times.location_key(lat, lon, mode)
+        groups.setdefault(loc, {}).setdefault(date_obj, []).append(key)
+    for (lat, lon), by_date in groups.items():
+        dates = sorted(by_date)
+        run_start = 0
+        for i in range(1, len(dates) + 1):
+            if i < len(dates) and (dates[i] - dates[i - 1]).days == 1:
+                continue
+            for date_obj, muhurtas in iter_muhurtas(dates[run_start], i - run_start, lat, lon, mode):
+                for key in by_date[date_obj]:
+                    yield key, date_obj, muhurtas
+            run_start = i
+
+
+# Example usage (for testing):
+if __name__ == "__main__":
+    import os
+    import swisseph as swe
+    swe.set_ephe_path(os.path.join(os.path.dirname(__file__), "ephe"))
+    muhurtas = get_muhurtas(datetime.date(2025, 6, 29), 28.5355, 77.3910)
+    for kind in SINGLE_WINDOWS:
+        start, end = muhurtas[kind]
+        print(f"{kind:15s} {start:%H:%M:%S} - {end:%H:%M:%S}")
+    for hora in muhurtas["hora"]:
+        print(f"Hora {hora['type']:5s} {hora['index']:2d}. {hora['lord']:8s} {hora['start']:%H:%M:%S} - {hora['end']:%H:%M:%S}")
@@ -0,0 +1,197 @@
+"""
+Panchang Calculation Module
+- Tithi and Nakshatra indices
+- Transition (boundary) search
+- Memoized Sun/Moon longitude provider
+
+Pure Swiss Ephemeris helpers with no Flask/database dependencies, so they can
+be shared by app.py and standalone scripts such as test.py. Callers are
+expected to have configured the ephemeris path and sidereal mode
+(swe.set_sid_mode(swe.SIDM_LAHIRI)) beforehand.
+"""
+import os
+import logging
+import threading
+from collections import OrderedDict
+import swisseph as swe
+
+NAKSHATRA_SPAN = 360 / 27   # 13°20' per nakshatra
+TITHI_SPAN = 12.0           # 12° of Moon–Sun elongation per tithi
+
+# "newton" (rate-aware, default) or "bisect" (original fixed-window bisection)
+TRANSITION_SOLVER = os.environ.get("TRANSITION_SOLVER", "newton")
+
+ONE_SECOND = 1 / 86400
+SEARCH_WINDOW = 2           # days; same window as the bisection search
+NEWTON_MAX_ITER = 12
+# Once the predicted Newton step is below this, the quadratic error of the
+# estimate is far below a millisecond, so we probe just past the root.
+NEWTON_FINAL_STEP = 120 * ONE_SECOND
+
+# All panchang lookups use the same flags so tithi, nakshatra and the
+# transition solver share memo entries for the same instant.
+PANCHANG_FLAGS = swe.FLG_SIDEREAL | swe.FLG_SPEED
+LONGITUDE_MEMO_SIZE = int(os.environ.get("LONGITUDE_MEMO_SIZE", 4096))
+
+
+class LongitudeProvider:
+    """
+    Bounded LRU memo around swe.calc_ut keyed on (body, jd, flags).
+
+    Every miss is exactly one Swiss Ephemeris call, so `misses` is the real
+    ephemeris cost of a request. Entries assume the global sidereal mode does
+    not change; call clear() if it does.
+    """
+
+    def __init__(self, maxsize=LONGITUDE_MEMO_SIZE):
+        self.maxsize = maxsize
+        self._memo = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def position(self, jd, body, flags=PANCHANG_FLAGS):
+        """Return the swe.calc_ut position tuple (lon, lat, dist, speeds...)."""
+        key = (body, jd, flags)
+        with self._lock:
+            xx = self._memo.get(key)
+            if xx is not None:
+                self._memo.move_to_end(key)
+                self.hits += 1
+                return xx
+        xx = swe.calc_ut(jd, body, flags)[0]
+        with self._lock:
+            self.misses += 1
+            self._memo[key] = xx
+            if len(self._memo) > self.maxsize:
+                self._memo.popitem(last=False)
+        return xx
+
+    def longitude(self, jd, body, flags=PANCHANG_FLAGS):
+        """Return the longitude (degrees) of body at a Julian Day."""
+        return self.position(jd, body, flags)[0]
+
+    def stats(self):
+        """Return hit/miss counters and current memo size."""
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "size": len(self._memo),
+                "maxsize": self.maxsize,
+            }
+
+    def clear(self):
+        """Drop all memoized positions and reset the counters."""
+        with self._lock:
+            self._memo.clear()
+            self.hits = 0
+            self.misses = 0
+
+
+longitudes = LongitudeProvider()
+
+
+def moon_angle(jd):
+    """Return the Moon's sidereal longitude and its daily speed at a Julian Day."""
+    moon = longitudes.position(jd, swe.MOON)
+    return moon[0], moon[3]
+
+def tithi_angle(jd):
+    """Return the Moon–Sun elongation (0..360) and its daily rate at a Julian Day."""
+    sun = longitudes.position(jd, swe.SUN)
+    moon = longitudes.position(jd, swe.MOON)
+    return (moon[0] - sun[0]) % 360, moon[3] - sun[3]
+
+def get_tithi(jd):
+    """Return the 0-based tithi index at a given Julian Day."""
+    sun_long = longitudes.longitude(jd, swe.SUN)
+    moon_long = longitudes.longitude(jd, swe.MOON)
+    angle = (moon_long - sun_long) % 360
+    return int(angle // 12)
+
+def get_nakshatra(jd):
+    """Return the 0-based nakshatra index (0..26) at a given Julian Day."""
+    moon_long = longitudes.longitude(jd, swe.MOON)
+    return int(moon_long // NAKSHATRA_SPAN)
+
+# Value function → (angle function, degrees per index). Only functions listed
+# here can use the rate-aware solver; anything else is bisected.
+RATE_FUNCS = {
+    get_tithi: (tithi_angle, TITHI_SPAN),
+    get_nakshatra: (moon_angle, NAKSHATRA_SPAN),
+}
+
+def bisect_transition_jd(jd_start, get_value_func):
+    """Binary-search for JD when get_value_func transitions to new value."""
+    current_val = get_value_func(jd_start)
+    lower = jd_start
+    upper = jd_start + SEARCH_WINDOW  # search window of up to 2 days
+    while upper - lower > ONE_SECOND:  # precision of 1 second
+        mid = (lower + upper) / 2
+        if get_value_func(mid) != current_val:
+            upper = mid
+        else:
+            lower = mid
+    return upper
+
+def newton_transition_jd(jd_start, angle_func, span):
+    """
+    Find the next boundary of an angle that advances monotonically through
+    segments of `span` degrees, using its angular speed to predict the crossing.
+
+    Every evaluated point tightens a [lower, upper] bracket and Newton steps
+    that leave the bracket fall back to bisection. Once the step is small the
+    solver probes half a second past the predicted root, so the returned JD is
+    verified to lie in the new segment and is at most 1 second after the
+    true crossing (the same guarantee as bisect_transition_jd).
+    Returns None if no crossing is found within the search window.
+    """
+    angle, rate = angle_func(jd_start)
+    target = (int(angle // span) + 1) * span
+
+    def residual(a):
+        # Signed distance to the target boundary, wrapped into [-180, 180)
+        return (a - target + 180) % 360 - 180
+
+    lower, upper = jd_start, jd_start + SEARCH_WINDOW
+    upper_known = False
+    jd, f = jd_start, residual(angle)
+    for _ in range(NEWTON_MAX_ITER):
+        step = -f / rate if rate > 0 else None
+        if step is not None and f >= 0 and -step <= ONE_SECOND:
+            return jd
+        if step is None:
+            nxt = (lower + upper) / 2
+        elif abs(step) <= NEWTON_FINAL_STEP:
+            nxt = jd + step + 0.5 * ONE_SECOND
+        else:
+            nxt = jd + step
+        if not lower < nxt < upper:
+            nxt = (lower + upper) / 2
+        angle, rate = angle_func(nxt)
+        jd, f = nxt, residual(angle)
+        if f >= 0:
+            upper, upper_known = jd, True
+        else:
+            lower = jd
+        if upper_known and upper - lower <= ONE_SECOND:
+            return upper
+    logging.warning(f"Newton transition search did not converge from JD {jd_start}")
+    return None
+
+def find_transition_jd(jd_start, get_value_func, method=None):
+    """
+    Return the JD (to within 1 second) at which get_value_func changes value.
+
+    Uses the rate-aware Newton solver for functions registered in RATE_FUNCS
+    and bisection otherwise. Pass method="bisect" (or set TRANSITION_SOLVER)
+    to force the original bisection, e.g. to verify the fast path.
+    """
+    method = method or TRANSITION_SOLVER
+    if method != "bisect" and get_value_func in RATE_FUNCS:
+        angle_func, span = RATE_FUNCS[get_value_func]
+        result = newton_transition_jd(jd_start, angle_func, span)
+        if result is not None:
+            return result
+    return bisect_transition_jd(jd_start, get_value_func)
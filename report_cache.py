@@ -0,0 +1,213 @@
+"""
+Report Cache Module
+- Content-addressed PDF reports stored on local disk
+- Size-bounded eviction, least recently served first
+- Background generation with in-flight deduplication
+- Per-user invalidation
+
+Files are named <user_id>-<key>.pdf, where key is a hash of everything
+the report shows (see report_key in app.py). Changing any input changes the
+key, so stale reports are never served; invalidate_user only reclaims
+their space early. Serving a file refreshes its mtime, and eviction removes
+the oldest mtimes first until the directory fits in max_bytes.
+
+Prefetched reports are built on a single background thread, so ahead-of-time
+generation never takes more than one core from page views. A request that
+needs a report nobody has built yet builds it inline; a request for a report
+that is already being built waits for that build instead of starting another,
+and builds it inline if that build fails.
+Eviction can remove a file another request is about to send, so use_or_build
+retries when the file is gone before it could be opened.
+"""
+import os
+import glob
+import logging
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+
+REPORT_CACHE_DIR = os.environ.get(
+    "REPORT_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "instance", "reports")
+)
+REPORT_CACHE_MAX_BYTES = int(os.environ.get("REPORT_CACHE_MAX_BYTES", 256 * 1024 * 1024))
+
+
+class ReportCache:
+    """Directory of generated reports with LRU-by-mtime eviction."""
+
+    def __init__(self, directory, max_bytes):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._in_flight = {}  # filename → Future
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="report-cache")
+        self.hits = 0
+        self.misses = 0
+        self.builds = 0
+        self.evictions = 0
+
+    def _filename(self, user_id, key):
+        return f"{user_id}-{key}.pdf"
+
+    def path(self, user_id, key):
+        """Path of the report file (which may not exist yet)."""
+        return os.path.join(self.directory, self._filename(user_id, key))
+
+    def get(self, user_id, key):
+        """Return the report path if cached, refreshing its recency; otherwise None."""
+        path = self.path(user_id, key)
+        try:
+            os.utime(path)
+        except FileNotFoundError:
+            return None
+        return path
+
+    def _store(self, user_id, key, build):
+        """Run build() → bytes and write the report atomically."""
+        data = build()
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(user_id, key)
+        tmp_path = f"{path}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "wb") as fh:
+            fh.write(data)
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.builds += 1
+        self._evict(keep=path)
+        return path
+
+    def _run(self, filename, user_id, key, build):
+        try:
+            return self._store(user_id, key, build)
+        finally:
+            with self._lock:
+                self._in_flight.pop(filename, None)
+
+    def get_or_build(self, user_id, key, build):
+        """
+        Return the report path on a hit. On a miss, wait for an in-flight build
+        of the same report, or build it inline if there is none or it fails.
+        """
+        path = self.get(user_id, key)
+        if path is not None:
+            with self._lock:
+                self.hits += 1
+            return path
+        filename = self._filename(user_id, key)
+        with self._lock:
+            self.misses += 1
+            future = self._in_flight.get(filename)
+        if future is not None:
+            try:
+                return future.result()
+            except Exception as e:
+                logging.warning(f"Build of report {filename} failed ({e}); building it inline")
+        with self._lock:
+            future = self._in_flight.get(filename)
+            # A finished future still listed belongs to a build that is just ending (the one that failed)
+            owner = future is None or future.done()
+            if owner:
+                future = self._in_flight[filename] = Future()
+        if not owner:
+            return future.result()
+        try:
+            path = self._store(user_id, key, build)
+            future.set_result(path)
+            return path
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._in_flight.pop(filename, None)
+
+    def use_or_build(self, user_id, key, build, use, attempts=3):
+        """
+        Return use(path) for the report, building it on a miss. Another
+        request's eviction can delete the file between the lookup and use();
+        use() then raises FileNotFoundError and the report is looked up (or
+        rebuilt) again. use() must open the file before it returns.
+        """
+        for attempt in range(attempts):
+            path = self.get_or_build(user_id, key, build)
+            try:
+                return use(path)
+            except FileNotFoundError:
+                if attempt == attempts - 1:
+                    raise
+                logging.info(f"Report {os.path.basename(path)} was evicted before it was opened; retrying")
+
+    def prefetch(self, user_id, key, build):
+        """Queue a background build unless the report is cached or already being built."""
+        filename = self._filename(user_id, key)
+        with self._lock:
+            if filename in self._in_flight or os.path.exists(self.path(user_id, key)):
+                return
+            future = self._executor.submit(self._run, filename, user_id, key, build)
+            self._in_flight[filename] = future
+        future.add_done_callback(self._log_failure)
+
+    @staticmethod
+    def _log_failure(future):
+        if future.exception() is not None:
+            logging.error(f"Background report build failed: {future.exception()}")
+
+    def invalidate_user(self, user_id):
+        """Delete every cached report of one user."""
+        for path in glob.glob(os.path.join(glob.escape(self.directory), f"{int(user_id)}-*.pdf")):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self):
+        """(mtime, size, path) of every cached report."""
+        entries = []
+        try:
+            with os.scandir(self.directory) as it:
+                for entry in it:
+                    if entry.name.endswith(".pdf"):
+                        try:
+                            stat = entry.stat()
+                        except FileNotFoundError:
+                            continue
+                        entries.append((stat.st_mtime, stat.st_size, entry.path))
+        except FileNotFoundError:
+            pass
+        return entries
+
+    def _evict(self, keep=None):
+        """Remove the least recently served reports (never keep) until the total fits max_bytes."""
+        entries = sorted(self._entries())
+        total = sum(size for _, size, _ in entries)
+        for _, size, path in entries:
+            if total <= self.max_bytes:
+                break
+            if path == keep:
+                continue
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            total -= size
+            with self._lock:
+                self.evictions += 1
+
+    def stats(self):
+        """Return counters and disk usage for monitoring."""
+        entries = self._entries()
+        with self._lock:
+            return {
+                "name": "pdf_reports",
+                "files": len(entries),
+                "bytes": sum(size for _, size, _ in entries),
+                "max_bytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "builds": self.builds,
+                "evictions": self.evictions,
+                "in_flight": len(self._in_flight),
+            }
+
+
+report_cache = ReportCache(REPORT_CACHE_DIR, REPORT_CACHE_MAX_BYTES)
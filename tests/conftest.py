@@ -0,0 +1,55 @@
+"""
+Shared fixtures. The app reads its database URL and result directories at
+import time, so they are pointed at a throwaway directory before any test
+imports it; the tracked instance/astrology.db is never opened.
+"""
+import os
+import sys
+import shutil
+import datetime
+import tempfile
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+TMP_DIR = tempfile.mkdtemp(prefix="astrology-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{os.path.join(TMP_DIR, 'test.db')}"
+os.environ["JOB_RESULTS_DIR"] = os.path.join(TMP_DIR, "jobs")
+os.environ["REPORT_CACHE_DIR"] = os.path.join(TMP_DIR, "reports")
+
+
+@pytest.fixture(scope="session")
+def app_module():
+    import app as app_module
+    yield app_module
+    shutil.rmtree(TMP_DIR, ignore_errors=True)
+
+@pytest.fixture
+def client(app_module):
+    return app_module.app.test_client()
+
+@pytest.fixture
+def app_context(app_module):
+    """App context with empty user, chart and job tables."""
+    with app_module.app.app_context():
+        yield
+        db = app_module.db
+        db.session.rollback()
+        for model in (app_module.BirthChart, app_module.User, app_module.Job):
+            model.query.delete()
+        db.session.commit()
+
+@pytest.fixture
+def make_user(app_module, app_context):
+    """Insert a user row without a birth chart and return its id."""
+    def make(full_name="Test User", created_at=None):
+        user = app_module.User(
+            full_name=full_name, birth_date=datetime.datetime(1990, 5, 17), birth_time="10:30:00",
+            birth_nakshatra="Ashwini", created_at=created_at or datetime.datetime(2025, 1, 1),
+        )
+        app_module.db.session.add(user)
+        app_module.db.session.commit()
+        return user.id
+    return make
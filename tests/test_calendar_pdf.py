@@ -0,0 +1,84 @@
+"""Streaming calendar PDF: structure of iter_pdf output and the download route."""
+import re
+import zlib
+
+from calendar_pdf import PageCanvas, iter_pdf
+
+
+def parse_pdf(data):
+    """{object number: body} read through the trailer's xref table, plus the trailer."""
+    startxref = int(re.search(rb"startxref\n(\d+)\n%%EOF\n$", data).group(1))
+    assert data[startxref:].startswith(b"xref\n")
+    header, _, rest = data[startxref + 5:].partition(b"\n")
+    first, count = map(int, header.split())
+    entries = rest[:20 * count]
+    trailer = rest[20 * count:]
+    objects = {}
+    for i in range(count):
+        entry = entries[20 * i:20 * (i + 1)]
+        assert entry.endswith(b" \n")
+        offset, generation, kind = entry[:18].split()
+        if kind == b"f":
+            continue
+        number = first + i
+        offset = int(offset)
+        prefix = b"%d %d obj\n" % (number, int(generation))
+        assert data[offset:offset + len(prefix)] == prefix, f"xref offset of object {number} is wrong"
+        objects[number] = data[offset + len(prefix):data.index(b"\nendobj\n", offset)]
+    return objects, trailer
+
+def page_objects(objects, trailer):
+    """Object numbers of the pages, checked against the page tree's /Count."""
+    root = int(re.search(rb"/Root (\d+) 0 R", trailer).group(1))
+    pages_obj = int(re.search(rb"/Pages (\d+) 0 R", objects[root]).group(1))
+    kids = [int(n) for n in re.findall(rb"(\d+) 0 R", re.search(rb"/Kids \[(.*?)\]", objects[pages_obj]).group(1))]
+    assert int(re.search(rb"/Count (\d+)", objects[pages_obj]).group(1)) == len(kids)
+    return kids
+
+def make_pages(count):
+    for i in range(count):
+        canvas = PageCanvas()
+        canvas.text(36, 800, f"Page text {i + 1} (with parentheses)", bold=i % 2 == 1)
+        canvas.rect(36, 700, 100, 20, (0.9, 0.9, 0.9))
+        canvas.line(36, 690, 136, 690)
+        yield canvas
+
+def test_xref_offsets_point_at_every_object():
+    data = b"".join(iter_pdf(make_pages(3), title="Test calendar"))
+    assert data.startswith(b"%PDF-1.4\n")
+    objects, trailer = parse_pdf(data)
+    size = int(re.search(rb"/Size (\d+)", trailer).group(1))
+    assert sorted(objects) == list(range(1, size))
+
+def test_page_tree_and_content_streams():
+    data = b"".join(iter_pdf(make_pages(3), title="Test calendar"))
+    objects, trailer = parse_pdf(data)
+    kids = page_objects(objects, trailer)
+    assert len(kids) == 3
+    for i, kid in enumerate(kids):
+        contents = int(re.search(rb"/Contents (\d+) 0 R", objects[kid]).group(1))
+        body = objects[contents]
+        length = int(re.search(rb"/Length (\d+)", body).group(1))
+        stream = body[body.index(b"stream\n") + 7:]
+        assert stream.endswith(b"\nendstream")
+        assert len(stream) - len(b"\nendstream") == length
+        text = zlib.decompress(stream[:length])
+        assert b"(Page text %d \\(with parentheses\\)) Tj" % (i + 1) in text
+
+def test_info_has_title_and_utc_creation_date():
+    objects, trailer = parse_pdf(b"".join(iter_pdf(make_pages(1), title="Test calendar")))
+    info = objects[int(re.search(rb"/Info (\d+) 0 R", trailer).group(1))]
+    assert b"/Title (Test calendar)" in info
+    assert re.search(rb"/CreationDate \(D:\d{14}Z\)", info)
+
+def test_calendar_download_is_a_complete_pdf(client, make_user):
+    user_id = make_user()
+    response = client.get(f"/download_calendar/{user_id}?year=2025&month=2&months=2")
+    assert response.status_code == 200
+    assert len(page_objects(*parse_pdf(response.data))) >= 2
+
+def test_calendar_download_rejects_years_it_cannot_draw(client, make_user):
+    user_id = make_user()
+    for query in ("year=10000&month=1", "year=9999&month=12", "year=9999&month=11&months=2"):
+        response = client.get(f"/download_calendar/{user_id}?{query}")
+        assert response.status_code == 302, query
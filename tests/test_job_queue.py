@@ -0,0 +1,157 @@
+"""Background job queue: deduplication, retries, permanent failures and pruning."""
+import time
+import datetime
+import threading
+
+import pytest
+
+from job_queue import JobQueue, PermanentJobError, DONE, FAILED, QUEUED, RUNNING
+
+
+@pytest.fixture
+def jobs(app_module, app_context, tmp_path):
+    """A queue of its own on the app's Job table, with one worker."""
+    return JobQueue(app_module.app, app_module.db, app_module.Job, str(tmp_path), workers=1)
+
+def wait_for(queue, job_id, states=(DONE, FAILED), timeout=10):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        queue.db.session.expire_all()
+        job = queue.get(job_id)
+        if job.status in states:
+            return job
+        time.sleep(0.05)
+    raise AssertionError(f"job {job_id} still {job.status}")
+
+def test_identical_jobs_are_deduplicated(jobs):
+    release = threading.Event()
+
+    def handler(n):
+        release.wait(5)
+        return str(n).encode(), 'text/plain', 'n.txt'
+
+    jobs.register('slow', handler)
+    first = jobs.submit('slow', {'n': 1})
+    second = jobs.submit('slow', {'n': 1})
+    other = jobs.submit('slow', {'n': 2})
+    assert second.id == first.id
+    assert other.id != first.id
+    assert jobs.deduplicated == 1
+    release.set()
+    job = wait_for(jobs, first.id)
+    assert job.status == DONE
+    with open(jobs.result_path(job), 'rb') as fh:
+        assert fh.read() == b'1'
+    assert (job.result_mimetype, job.result_name, job.result_size) == ('text/plain', 'n.txt', 1)
+
+    # A finished job no longer absorbs new submissions
+    wait_for(jobs, other.id)
+    assert jobs.submit('slow', {'n': 1}).id != first.id
+
+def test_failed_attempt_is_retried(jobs):
+    calls = []
+
+    def flaky():
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            raise OSError("disk hiccup")
+        return b'ok', 'text/plain', 'ok.txt'
+
+    jobs.register('flaky', flaky)
+    job = wait_for(jobs, jobs.submit('flaky', {}).id)
+    assert job.status == DONE
+    assert job.attempts == 2
+    assert job.error is None
+    assert jobs.retried == 1
+    assert calls[1] - calls[0] >= 2  # 2 ** attempts seconds of backoff
+
+def test_job_fails_after_max_attempts(jobs):
+    def broken():
+        raise ValueError("always broken")
+
+    jobs.register('broken', broken, max_attempts=1)
+    job = wait_for(jobs, jobs.submit('broken', {}).id)
+    assert job.status == FAILED
+    assert job.attempts == 1
+    assert job.error == "ValueError: always broken"
+    assert job.finished_at is not None
+    assert jobs.failed == 1
+
+def test_permanent_error_is_not_retried(jobs):
+    def missing():
+        raise PermanentJobError("User 42 not found")
+
+    jobs.register('missing', missing, max_attempts=3)
+    job = wait_for(jobs, jobs.submit('missing', {}).id)
+    assert job.status == FAILED
+    assert job.attempts == 1
+    assert jobs.retried == 0
+
+def test_export_job_for_deleted_user_fails_at_once(app_module, make_user):
+    user_id = make_user()
+    app_module.db.session.delete(app_module.db.session.get(app_module.User, user_id))
+    app_module.db.session.commit()
+    job = wait_for(app_module.job_queue, app_module.job_queue.submit('kundali_png', {'user_id': user_id}).id)
+    assert job.status == FAILED
+    assert job.attempts == 1
+    assert job.error == f"PermanentJobError: User {user_id} not found"
+
+def test_unknown_kind_is_rejected(jobs):
+    with pytest.raises(ValueError):
+        jobs.submit('nope', {})
+
+def test_workers_prune_expired_jobs(app_module, jobs):
+    jobs.register('ok', lambda: (b'', 'text/plain', 'empty.txt'))
+    jobs.start()  # prunes once at startup; the expired row is added after that
+    expired = datetime.datetime(2020, 1, 1)
+    app_module.db.session.add(app_module.Job(id='expired', kind='ok', params='{}', status=DONE, attempts=1,
+                                             max_attempts=3, created_at=expired, finished_at=expired))
+    app_module.db.session.commit()
+    jobs._last_prune = expired  # interval long past: the next finished job triggers a prune
+    job = wait_for(jobs, jobs.submit('ok', {}).id)
+    deadline = time.monotonic() + 5
+    while jobs.get('expired') is not None and time.monotonic() < deadline:
+        app_module.db.session.expire_all()
+        time.sleep(0.05)
+    assert jobs.get('expired') is None
+    assert jobs.get(job.id) is not None
+
+def test_queued_jobs_are_requeued_on_start(app_module, jobs):
+    jobs.register('ok', lambda: (b'done', 'text/plain', 'done.txt'))
+    app_module.db.session.add(app_module.Job(
+        id='left-over', kind='ok', params='{}', status=QUEUED, attempts=0, max_attempts=3,
+        created_at=datetime.datetime(2025, 1, 1)))
+    app_module.db.session.commit()
+    jobs.start()
+    assert wait_for(jobs, 'left-over').status == DONE
+
+def test_running_job_out_of_attempts_fails_on_start(app_module, jobs):
+    calls = []
+    jobs.register('ok', lambda: calls.append(1) or (b'done', 'text/plain', 'done.txt'), max_attempts=1)
+    app_module.db.session.add(app_module.Job(
+        id='interrupted', kind='ok', params='{}', status=RUNNING, attempts=1, max_attempts=1,
+        created_at=datetime.datetime(2025, 1, 1)))
+    app_module.db.session.add(app_module.Job(
+        id='interrupted-early', kind='ok', params='{}', status=RUNNING, attempts=1, max_attempts=3,
+        created_at=datetime.datetime(2025, 1, 1)))
+    app_module.db.session.commit()
+    jobs.start()
+    job = wait_for(jobs, 'interrupted')
+    assert job.status == FAILED
+    assert job.attempts == 1
+    assert job.error.startswith("Interrupted")
+    job = wait_for(jobs, 'interrupted-early')
+    assert job.status == DONE
+    assert job.attempts == 2
+    assert len(calls) == 1
+
+def test_queued_job_out_of_attempts_is_not_run(app_module, jobs):
+    jobs.register('ok', lambda: (b'done', 'text/plain', 'done.txt'), max_attempts=1)
+    app_module.db.session.add(app_module.Job(
+        id='spent', kind='ok', params='{}', status=QUEUED, attempts=1, max_attempts=1,
+        created_at=datetime.datetime(2025, 1, 1)))
+    app_module.db.session.commit()
+    jobs.start()
+    job = wait_for(jobs, 'spent')
+    assert job.status == FAILED
+    assert job.attempts == 1
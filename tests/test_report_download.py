@@ -0,0 +1,85 @@
+"""Birth chart PDF download: ETag, 304 and Range answers from the report cache."""
+import time
+
+import pytest
+
+from report_cache import ReportCache
+
+
+@pytest.fixture
+def user_id(client, app_context):
+    response = client.post('/create_user', data={
+        'full_name': 'Report User', 'birth_date': '1990-05-17', 'birth_time': '10:30',
+    })
+    assert response.status_code == 302
+    return int(response.location.rsplit('/', 1)[1])
+
+def test_download_sets_report_key_etag(app_module, client, user_id):
+    response = client.get(f'/download_birth_chart/{user_id}')
+    assert response.status_code == 200
+    assert response.mimetype == 'application/pdf'
+    assert response.data.startswith(b'%PDF')
+    user = app_module.db.session.get(app_module.User, user_id)
+    assert response.headers['ETag'] == f'"{app_module.report_key(user)}"'
+
+def test_if_none_match_returns_304(client, user_id):
+    etag = client.get(f'/download_birth_chart/{user_id}').headers['ETag']
+    response = client.get(f'/download_birth_chart/{user_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+    assert response.headers['ETag'] == etag
+
+def test_range_returns_partial_content(client, user_id):
+    full = client.get(f'/download_birth_chart/{user_id}')
+    response = client.get(f'/download_birth_chart/{user_id}', headers={
+        'Range': 'bytes=10-99', 'If-Range': full.headers['ETag'],
+    })
+    assert response.status_code == 206
+    assert response.data == full.data[10:100]
+    assert response.headers['Content-Range'] == f'bytes 10-99/{len(full.data)}'
+
+def test_rebuilt_report_has_same_bytes(app_module, client, user_id):
+    first = client.get(f'/download_birth_chart/{user_id}').data
+    app_module.report_cache.invalidate_user(user_id)
+    assert client.get(f'/download_birth_chart/{user_id}').data == first
+
+def test_remarks_change_etag(client, user_id):
+    etag = client.get(f'/download_birth_chart/{user_id}').headers['ETag']
+    client.post(f'/update_remarks/{user_id}', data={'remarks': 'New note'})
+    response = client.get(f'/download_birth_chart/{user_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.headers['ETag'] != etag
+
+def test_evicted_file_is_rebuilt(app_module, client, user_id, monkeypatch):
+    cache = app_module.report_cache
+    get_or_build = cache.get_or_build
+    paths = []
+
+    def evicted_once(*args):
+        path = get_or_build(*args)
+        paths.append(path)
+        if len(paths) == 1:
+            app_module.os.remove(path)
+        return path
+
+    monkeypatch.setattr(cache, 'get_or_build', evicted_once)
+    response = client.get(f'/download_birth_chart/{user_id}')
+    assert response.status_code == 200
+    assert response.data.startswith(b'%PDF')
+    assert len(paths) == 2
+
+def test_failed_prefetch_is_rebuilt_by_the_waiting_request(tmp_path):
+    cache = ReportCache(str(tmp_path), 1024 * 1024)
+
+    def failing_build():
+        # Fail only once the request has counted its miss, which is when it picks up this build's future
+        deadline = time.monotonic() + 5
+        while cache.misses == 0 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        raise OSError("renderer crashed")
+
+    cache.prefetch(1, 'key', failing_build)
+    path = cache.get_or_build(1, 'key', lambda: b'%PDF inline')
+    with open(path, 'rb') as fh:
+        assert fh.read() == b'%PDF inline'
+    assert cache.stats()['in_flight'] == 0
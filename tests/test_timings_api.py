@@ -0,0 +1,38 @@
+"""Timings API: the bulk endpoint answers each row as /api/timings would."""
+import json
+
+import pytest
+
+import sun_tiles
+from sun_times import local_midnight_jd
+
+
+@pytest.fixture
+def point_tiles(monkeypatch):
+    """Stand-in tile table whose sun times vary within a sun-times grid cell, as interpolation does."""
+    def lookup_jd(date_obj, latitude, longitude):
+        midnight = local_midnight_jd(date_obj)
+        return midnight + 0.25 + latitude / 1000, midnight + 0.75 + longitude / 10000
+    monkeypatch.setattr(sun_tiles, 'lookup_jd', lookup_jd)
+
+def bulk_records(client, rows):
+    response = client.post('/api/timings/bulk', json={'rows': rows, 'mode': 'tile'})
+    assert response.status_code == 200
+    records = [json.loads(line) for line in response.data.decode().splitlines()]
+    return {record['i']: record for record in records[:-1]}, records[-1]
+
+@pytest.mark.parametrize("order", [1, -1])
+def test_bulk_tile_rows_match_single_lookups(app_module, client, point_tiles, order):
+    assert app_module.TIMINGS_SUN_MODE == 'tile'
+    # Same 0.01° cell, different points inside it
+    rows = [{'date': '2025-06-29', 'lat': 28.6111, 'lon': 77.2088},
+            {'date': '2025-06-29', 'lat': 28.6139, 'lon': 77.2090},
+            {'date': '2025-06-30', 'lat': 28.6139, 'lon': 77.2090}][::order]
+    records, trailer = bulk_records(client, rows)
+    for i, row in enumerate(rows):
+        single = client.get(f"/api/timings?date={row['date']}&lat={row['lat']}&lon={row['lon']}").get_json()
+        for key in ('sunrise', 'sunset', 'raahu_kaal', 'hora'):
+            assert records[i][key] == single[key], (i, key)
+    same_day = [records[i]['sunrise'] for i, row in enumerate(rows) if row['date'] == '2025-06-29']
+    assert len(set(same_day)) == 2
+    assert trailer['locations'] == 2
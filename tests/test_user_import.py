@@ -0,0 +1,61 @@
+"""Bulk user import: per-row errors, stored rows and the background import job."""
+import io
+import os
+import time
+import datetime
+
+from job_queue import JobQueue, FAILED, RUNNING
+
+CSV = (
+    "full_name,birth_date,birth_time,birth_city\n"
+    "Asha Rao,1988-02-14,06:45,Pune\n"
+    "Bad Date,1988-02-30,06:45,Pune\n"
+    "Dev Menon,1975-11-03,23:10:30,\n"
+)
+
+
+def stored_users(app_module):
+    User = app_module.User
+    return {user.full_name: user for user in User.query.order_by(User.id)}
+
+def test_import_reports_bad_rows_and_stores_the_rest(app_module, app_context):
+    report = app_module.import_users(io.StringIO(CSV), 'csv', workers=1, chunk_size=1)
+    assert (report['rows'], report['imported'], report['failed']) == (3, 2, 1)
+    assert report['input_error'] is None
+    assert [error['row'] for error in report['errors']] == [2]
+    users = stored_users(app_module)
+    assert sorted(users) == ["Asha Rao", "Dev Menon"]
+    asha, dev = users["Asha Rao"], users["Dev Menon"]
+    assert asha.birth_date.date() == datetime.date(1988, 2, 14)
+    assert (asha.birth_time, asha.birth_city) == ("06:45:00", "Pune")
+    assert (dev.birth_time, dev.birth_city) == ("23:10:30", "Delhi")
+    for user in (asha, dev):
+        chart = app_module.BirthChart.query.filter_by(user_id=user.id).one()
+        assert chart.moon_position is not None
+
+def test_upload_runs_as_a_job_and_removes_the_file(app_module, client, app_context):
+    response = client.post('/api/users/import', data={'file': (io.BytesIO(CSV.encode()), 'people.csv')})
+    assert response.status_code == 202
+    job_id = response.get_json()['id']
+    deadline = time.monotonic() + 30
+    while client.get(f'/jobs/{job_id}').get_json()['status'] not in ('done', 'failed'):
+        assert time.monotonic() < deadline
+        time.sleep(0.05)
+    report = client.get(f'/jobs/{job_id}/result').get_json()
+    assert (report['imported'], report['failed']) == (2, 1)
+    assert sorted(stored_users(app_module)) == ["Asha Rao", "Dev Menon"]
+    assert os.listdir(app_module.IMPORT_UPLOAD_DIR) == []
+
+def test_import_interrupted_by_a_restart_is_not_rerun(app_module, app_context, tmp_path):
+    upload = tmp_path / "left-over.csv"
+    upload.write_text(CSV)
+    jobs = JobQueue(app_module.app, app_module.db, app_module.Job, str(tmp_path / "jobs"), workers=1)
+    jobs.register('user_import', app_module._import_users_job, max_attempts=1)
+    app_module.db.session.add(app_module.Job(
+        id='interrupted-import', kind='user_import', params=f'{{"fmt": "csv", "path": "{upload}"}}',
+        status=RUNNING, attempts=1, max_attempts=1, created_at=datetime.datetime(2025, 1, 1)))
+    app_module.db.session.commit()
+    jobs.start()
+    app_module.db.session.expire_all()
+    assert jobs.get('interrupted-import').status == FAILED
+    assert stored_users(app_module) == {}
@@ -0,0 +1,79 @@
+"""Keyset-paginated user list and type-ahead search."""
+import re
+import datetime
+
+import pytest
+
+from user_search import search_user_ids
+
+
+@pytest.fixture
+def user_ids(make_user):
+    """Eleven users, several sharing a created_at so pages must break ties on id."""
+    base = datetime.datetime(2025, 3, 1, 12, 0, 0)
+    stamps = [base, base, base, base + datetime.timedelta(microseconds=250), base + datetime.timedelta(seconds=1),
+              base + datetime.timedelta(seconds=1), base + datetime.timedelta(days=1), base - datetime.timedelta(days=1),
+              base - datetime.timedelta(days=1), base - datetime.timedelta(days=400), base + datetime.timedelta(days=2)]
+    names = ["Ram Kumar", "Sita Devi", "Ramesh Iyer", "Anil Rao", "Priya Shah", "Ravi Verma",
+             "Meena Pillai", "Arjun Nair", "Kavya Menon", "Rahul Gupta", "Ramya Reddy"]
+    return {make_user(name, created_at): created_at for name, created_at in zip(names, stamps)}
+
+@pytest.mark.parametrize("limit", [1, 3, 4, 11, 50])
+def test_keyset_walk_returns_every_user_once(app_module, user_ids, limit):
+    seen, cursor, pages = [], None, 0
+    while True:
+        users, cursor = app_module.list_users_page(cursor, limit=limit)
+        assert len(users) <= limit
+        seen += [user.id for user in users]
+        pages += 1
+        if cursor is None:
+            break
+    assert sorted(seen) == sorted(user_ids)
+    assert len(seen) == len(set(seen))
+    assert seen == sorted(user_ids, key=lambda user_id: (user_ids[user_id], user_id), reverse=True)
+    assert pages == -(-len(user_ids) // limit)
+
+def test_cursor_round_trip(app_module, user_ids):
+    users, cursor = app_module.list_users_page(limit=2)
+    assert app_module.decode_user_cursor(cursor) == (users[-1].created_at, users[-1].id)
+    with pytest.raises(ValueError):
+        app_module.decode_user_cursor("not-a-cursor")
+
+def test_index_pages_follow_older_links(app_module, client, user_ids, monkeypatch):
+    monkeypatch.setattr(app_module.list_users_page, '__defaults__', (None, 4))
+    seen, url = [], '/'
+    while url:
+        page = client.get(url).data.decode()
+        seen += [int(user_id) for user_id in re.findall(r'href="/user/(\d+)"', page)]
+        older = re.search(r'href="(/\?cursor=[^"]+)"', page)
+        url = older.group(1).replace('&amp;', '&') if older else None
+    assert sorted(set(seen)) == sorted(user_ids)
+
+def test_bad_cursor_redirects_to_first_page(client, user_ids):
+    response = client.get('/?cursor=garbage')
+    assert response.status_code == 302
+    assert response.location.endswith('/')
+
+def test_type_ahead_matches_word_prefixes(client, user_ids):
+    names = {result['full_name'] for result in client.get('/api/users/search?q=ram').get_json()['results']}
+    assert names == {"Ram Kumar", "Ramesh Iyer", "Ramya Reddy"}
+    names = [result['full_name'] for result in client.get('/api/users/search?q=ram ku').get_json()['results']]
+    assert names == ["Ram Kumar"]
+    assert client.get('/api/users/search?q="*').get_json()['results'] == []
+
+def test_search_index_follows_updates_and_deletes(app_module, user_ids):
+    db, User = app_module.db, app_module.User
+    user = User.query.filter_by(full_name="Sita Devi").one()
+    user.full_name = "Sita Raman"
+    db.session.commit()
+    assert [u.full_name for u in app_module.search_users("raman")] == ["Sita Raman"]
+    db.session.delete(user)
+    db.session.commit()
+    assert app_module.search_users("raman") == []
+
+def test_like_fallback_finds_the_same_users(app_module, user_ids):
+    session = app_module.db.session
+    fts = set(search_user_ids(session, "ram", limit=20, use_fts=app_module.user_search_fts))
+    like = set(search_user_ids(session, "ram", limit=20, use_fts=False))
+    # LIKE also matches inside words, so it finds at least the prefix matches
+    assert fts <= like
@@ -0,0 +1,242 @@
+"""
+Transition Index Module
+- Precomputed tithi/nakshatra transition JDs stored as float64 arrays
+- Memory-mapped O(log n) lookups with live fallback outside the indexed span
+- Build and verification tool
+
+Tithi and nakshatra boundaries do not depend on location, so they can be
+computed once for a long span and shared by every request. Each boundary is
+the JD returned by panchang.find_transition_jd (at most 1 second after the
+true crossing, already in the new segment).
+
+Usage:
+    python transition_index.py build [--start-year 1900] [--end-year 2100]
+    python transition_index.py verify [--samples 500] [--method bisect]
+"""
+import os
+import sys
+import mmap
+import time
+import random
+import struct
+import bisect
+import logging
+import argparse
+import threading
+from array import array
+
+import swisseph as swe
+
+from panchang import get_tithi, get_nakshatra, find_transition_jd, ONE_SECOND
+
+INDEX_PATH = os.environ.get(
+    "TRANSITION_INDEX_PATH",
+    os.path.join(os.path.dirname(__file__), "instance", "transitions.bin")
+)
+
+# kind → (value function, number of distinct values). Arrays are stored in this order.
+KINDS = {
+    "tithi": (get_tithi, 30),
+    "nakshatra": (get_nakshatra, 27),
+}
+
+# File layout (little-endian): header, then one float64 array per kind.
+# Header: magic, format version, sidereal mode, span start JD, span end JD,
+# then (value before the first transition, transition count) per kind.
+MAGIC = b"PTIX"
+FORMAT_VERSION = 1
+HEADER = struct.Struct("<4sIIdd" + "iQ" * len(KINDS))
+HEADER_SIZE = 64  # header is padded so the arrays are 8-byte aligned
+
+
+class TransitionIndex:
+    """Read-only, memory-mapped view of a transition index file."""
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Transition index files are little-endian only")
+        self.path = path
+        with open(path, "rb") as fh:
+            self._mm = mmap.mmap(fh.fileno(), 0, access=mmap.ACCESS_READ)
+        fields = HEADER.unpack_from(self._mm, 0)
+        magic, version, self.sid_mode, self.span_start, self.span_end = fields[:5]
+        if magic != MAGIC or version != FORMAT_VERSION:
+            raise ValueError(f"{path} is not a version {FORMAT_VERSION} transition index")
+
+        view = memoryview(self._mm)
+        offset = HEADER_SIZE
+        self._arrays = {}
+        for i, kind in enumerate(KINDS):
+            initial, count = fields[5 + 2 * i], fields[6 + 2 * i]
+            self._arrays[kind] = (initial, view[offset:offset + 8 * count].cast("d"))
+            offset += 8 * count
+
+    def covers(self, kind, jd_start, jd_end):
+        """True if every segment overlapping [jd_start, jd_end] is in the index."""
+        _, jds = self._arrays[kind]
+        return len(jds) > 0 and self.span_start <= jd_start and jd_end <= jds[-1]
+
+    def value_at(self, kind, jd):
+        """Return the tithi/nakshatra index in effect at jd."""
+        initial, jds = self._arrays[kind]
+        modulus = KINDS[kind][1]
+        return (initial + bisect.bisect_right(jds, jd)) % modulus
+
+    def transitions(self, kind, jd_start, jd_end):
+        """Return [(jd, new_value), ...] for all transitions in [jd_start, jd_end)."""
+        initial, jds = self._arrays[kind]
+        modulus = KINDS[kind][1]
+        lo = bisect.bisect_left(jds, jd_start)
+        hi = bisect.bisect_left(jds, jd_end)
+        return [(jds[i], (initial + i + 1) % modulus) for i in range(lo, hi)]
+
+    def next_transition(self, kind, jd):
+        """Return the first transition JD strictly after jd."""
+        _, jds = self._arrays[kind]
+        return jds[bisect.bisect_right(jds, jd)]
+
+
+_index = None
+_index_loaded = False
+_index_lock = threading.Lock()
+
+def get_index():
+    """Return the shared TransitionIndex, or None if no usable index file exists."""
+    global _index, _index_loaded
+    if not _index_loaded:
+        with _index_lock:
+            if not _index_loaded:
+                if os.path.exists(INDEX_PATH):
+                    try:
+                        _index = TransitionIndex(INDEX_PATH)
+                        if _index.sid_mode != swe.SIDM_LAHIRI:
+                            logging.warning(f"Ignoring transition index {INDEX_PATH}: not built for Lahiri")
+                            _index = None
+                        else:
+                            logging.info(f"Loaded transition index {INDEX_PATH}")
+                    except (OSError, ValueError, struct.error) as e:
+                        logging.error(f"Error loading transition index {INDEX_PATH}: {e}")
+                        _index = None
+                _index_loaded = True
+    return _index
+
+def value_at(kind, jd):
+    """Return the tithi/nakshatra index at jd, from the index when it covers jd."""
+    index = get_index()
+    if index and index.covers(kind, jd, jd):
+        return index.value_at(kind, jd)
+    return KINDS[kind][0](jd)
+
+def transitions_between(kind, jd_start, jd_end):
+    """Return [(jd, new_value), ...] for all transitions in [jd_start, jd_end)."""
+    index = get_index()
+    if index and index.covers(kind, jd_start, jd_end):
+        return index.transitions(kind, jd_start, jd_end)
+    value_func = KINDS[kind][0]
+    result = []
+    curr_jd = jd_start
+    while True:
+        curr_jd = find_transition_jd(curr_jd, value_func)
+        if curr_jd >= jd_end:
+            return result
+        result.append((curr_jd, value_func(curr_jd)))
+
+def iter_segments(kind, jd_start, jd_end):
+    """
+    Yield (start_jd, end_jd, value) for consecutive segments starting in
+    [jd_start, jd_end). The first segment starts at jd_start and the last one
+    runs to its own transition, which may lie after jd_end.
+    """
+    index = get_index()
+    if index and index.covers(kind, jd_start, jd_end):
+        curr_jd = jd_start
+        value = index.value_at(kind, curr_jd)
+        modulus = KINDS[kind][1]
+        while curr_jd < jd_end:
+            next_change = index.next_transition(kind, curr_jd)
+            yield curr_jd, next_change, value
+            curr_jd, value = next_change, (value + 1) % modulus
+        return
+
+    # The transition JD is already verified to lie in the next segment, so
+    # each scan restarts exactly there and the value lookup plus the
+    # solver's first evaluation are served from the longitude memo.
+    value_func = KINDS[kind][0]
+    curr_jd = jd_start
+    while curr_jd < jd_end:
+        value = value_func(curr_jd)
+        next_change = find_transition_jd(curr_jd, value_func)
+        yield curr_jd, next_change, value
+        curr_jd = next_change
+
+
+# === BUILD & VERIFY ===
+def build_index(path, start_year, end_year):
+    """Compute all transitions from Jan 1 of start_year through end_year and write them to path."""
+    span_start = swe.julday(start_year, 1, 1, 0.0)
+    span_end = swe.julday(end_year + 1, 1, 1, 0.0)
+    header_fields = []
+    arrays = []
+    for kind, (value_func, _) in KINDS.items():
+        started = time.time()
+        jds = array("d")
+        curr_jd = span_start
+        # Keep one transition past span_end so the last segment has an end
+        while curr_jd < span_end:
+            curr_jd = find_transition_jd(curr_jd, value_func)
+            jds.append(curr_jd)
+        header_fields += [value_func(span_start), len(jds)]
+        arrays.append(jds)
+        print(f"{kind}: {len(jds)} transitions in {time.time() - started:.1f}s")
+
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = path + ".tmp"
+    with open(tmp_path, "wb") as fh:
+        header = HEADER.pack(MAGIC, FORMAT_VERSION, swe.SIDM_LAHIRI, span_start, span_end, *header_fields)
+        fh.write(header.ljust(HEADER_SIZE, b"\0"))
+        for jds in arrays:
+            if sys.byteorder != "little":
+                jds.byteswap()
+            jds.tofile(fh)
+    os.replace(tmp_path, path)
+    print(f"Wrote {path} ({os.path.getsize(path)} bytes)")
+
+def verify_index(path, samples, method):
+    """Recompute sampled transitions live and compare them with the index. Returns True if all match."""
+    index = TransitionIndex(path)
+    failures = 0
+    for kind, (value_func, modulus) in KINDS.items():
+        initial, jds = index._arrays[kind]
+        picks = range(1, len(jds)) if samples <= 0 else random.sample(range(1, len(jds)), min(samples, len(jds) - 1))
+        worst = 0.0
+        for i in picks:
+            live_jd = find_transition_jd(jds[i - 1], value_func, method=method)
+            diff = abs(live_jd - jds[i])
+            worst = max(worst, diff)
+            expected_value = (initial + i + 1) % modulus
+            if diff > ONE_SECOND or value_func(jds[i]) != expected_value:
+                failures += 1
+                print(f"MISMATCH {kind} #{i}: index={jds[i]:.8f} live={live_jd:.8f} diff={diff * 86400:.3f}s")
+        print(f"{kind}: checked {len(picks)} transitions, max difference {worst * 86400:.3f}s")
+    print("OK" if not failures else f"FAILED: {failures} mismatches")
+    return failures == 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Build or verify the tithi/nakshatra transition index.")
+    parser.add_argument("command", choices=["build", "verify"])
+    parser.add_argument("--path", default=INDEX_PATH)
+    parser.add_argument("--start-year", type=int, default=1900)
+    parser.add_argument("--end-year", type=int, default=2100)
+    parser.add_argument("--samples", type=int, default=500, help="transitions to check per kind (0 = all)")
+    parser.add_argument("--method", default="bisect", choices=["bisect", "newton"],
+                        help="solver used for verification")
+    args = parser.parse_args()
+
+    swe.set_ephe_path(os.path.join(os.path.dirname(__file__), "ephe"))
+    swe.set_sid_mode(swe.SIDM_LAHIRI)
+
+    if args.command == "build":
+        build_index(args.path, args.start_year, args.end_year)
+    elif not verify_index(args.path, args.samples, args.method):
+        sys.exit(1)
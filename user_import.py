@@ -0,0 +1,180 @@
+"""
+User Import Module
+- Streaming CSV, JSON array and newline-delimited JSON readers
+- Row validation with the same rules as the /create_user form
+- Chunked pipeline: chart computation in a process pool, writes in the caller
+
+Swiss Ephemeris keeps its ephemeris path and sidereal mode as process-wide
+state, so charts are computed in worker processes rather than threads. A
+forked worker shares the parent's open file offsets, so the caller's
+initializer must reopen the ephemeris (and any other file-backed reader).
+Chunks are submitted through a bounded window, so at most a few chunks are
+in memory at once however long the input is. Results come back in input
+order and are handed to the writer, which stores each chunk in one
+transaction. A chunk whose computation or write raises is recorded in the
+report as failed rows and the import carries on; input that cannot be read
+any further (malformed JSON, bad encoding) stops the import, and the report
+says where in "input_error". Chunks stored before either stay stored.
+
+Rows use the form's field names: full_name, birth_date (YYYY-MM-DD),
+birth_time (HH:MM or HH:MM:SS) and optionally birth_city, birth_country,
+birth_latitude, birth_longitude and birth_timezone.
+"""
+import csv
+import json
+import time
+import logging
+import datetime
+import itertools
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+IMPORT_FORMATS = ("csv", "json", "ndjson")
+MAX_ERRORS_REPORTED = 1000
+
+# Form defaults, as in create_user
+DEFAULTS = {
+    "birth_city": "Delhi",
+    "birth_country": "India",
+    "birth_latitude": 28.6139,
+    "birth_longitude": 77.2090,
+    "birth_timezone": "Asia/Kolkata",
+}
+
+
+def detect_format(filename, fmt=None):
+    """Return the import format from an explicit fmt or the file extension."""
+    if fmt:
+        if fmt not in IMPORT_FORMATS:
+            raise ValueError(f"format must be one of {', '.join(IMPORT_FORMATS)}")
+        return fmt
+    ext = (filename or "").rsplit(".", 1)[-1].lower()
+    if ext in ("ndjson", "jsonl"):
+        return "ndjson"
+    if ext in IMPORT_FORMATS:
+        return ext
+    raise ValueError(f"Cannot tell the format of {filename!r}; pass one of {', '.join(IMPORT_FORMATS)}")
+
+def iter_records(stream, fmt):
+    """
+    Yield (row_number, record) from a text stream. CSV and NDJSON are read
+    line by line; a JSON array is parsed whole. Unparseable NDJSON lines
+    yield (row_number, ValueError).
+    """
+    if fmt == "csv":
+        for number, record in enumerate(csv.DictReader(stream), start=1):
+            yield number, record
+    elif fmt == "json":
+        records = json.load(stream)
+        if not isinstance(records, list):
+            raise ValueError("JSON import must be an array of objects")
+        for number, record in enumerate(records, start=1):
+            yield number, record
+    else:
+        number = 0
+        for line in stream:
+            if not line.strip():
+                continue
+            number += 1
+            try:
+                yield number, json.loads(line)
+            except ValueError as e:
+                yield number, ValueError(f"Invalid JSON: {e}")
+
+def validate_record(record):
+    """Return a normalized row dict, or raise ValueError."""
+    if not isinstance(record, dict):
+        raise ValueError("Row must be an object")
+    row = {key: (value.strip() if isinstance(value, str) else value)
+           for key, value in record.items() if value not in (None, "")}
+    missing = [key for key in ("full_name", "birth_date", "birth_time") if key not in row]
+    if missing:
+        raise ValueError(f"Missing {', '.join(missing)}")
+    birth_date = datetime.datetime.strptime(str(row["birth_date"]), "%Y-%m-%d").date()
+    birth_time = str(row["birth_time"])
+    time_format = "%H:%M:%S" if birth_time.count(":") == 2 else "%H:%M"
+    birth_time = datetime.datetime.strptime(birth_time, time_format).strftime("%H:%M:%S")
+    latitude = float(row.get("birth_latitude", DEFAULTS["birth_latitude"]))
+    longitude = float(row.get("birth_longitude", DEFAULTS["birth_longitude"]))
+    if not (-90 <= latitude <= 90 and -180 <= longitude <= 180):
+        raise ValueError("birth_latitude/birth_longitude out of range")
+    return {
+        "full_name": str(row["full_name"])[:200],
+        "birth_date": birth_date,
+        "birth_time": birth_time,
+        "birth_city": str(row.get("birth_city", DEFAULTS["birth_city"]))[:100],
+        "birth_country": str(row.get("birth_country", DEFAULTS["birth_country"]))[:100],
+        "birth_latitude": latitude,
+        "birth_longitude": longitude,
+        "birth_timezone": str(row.get("birth_timezone", DEFAULTS["birth_timezone"])),
+    }
+
+def iter_validated(records, report):
+    """Yield (row_number, row) for valid records, recording the others in report."""
+    for number, record in records:
+        report["rows"] += 1
+        try:
+            if isinstance(record, Exception):
+                raise record
+            yield number, validate_record(record)
+        except (ValueError, TypeError) as e:
+            add_error(report, number, e)
+
+def add_error(report, number, error):
+    """Count a failed row, keeping the first MAX_ERRORS_REPORTED messages."""
+    report["failed"] += 1
+    if len(report["errors"]) < MAX_ERRORS_REPORTED:
+        report["errors"].append({"row": number, "error": str(error)})
+
+def _chunks(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+def _store_chunk(chunk, compute, write_chunk, report):
+    """Write one chunk's results, recording every row of the chunk as failed if that raises."""
+    try:
+        write_chunk(compute(), report)
+    except Exception as e:
+        logging.error(f"Import chunk starting at row {chunk[0][0]} failed: {e}")
+        for number, _ in chunk:
+            add_error(report, number, f"Chunk failed: {e.__class__.__name__}: {e}")
+
+def run_import(records, compute_chunk, write_chunk, workers=1, chunk_size=500, initializer=None):
+    """
+    Validate records, compute each chunk of valid rows with
+    compute_chunk(rows) → [(row_number, result or Exception), ...] and store
+    the results with write_chunk(results, report). Returns the report:
+    {"rows", "imported", "failed", "errors", "input_error", "seconds",
+    "rows_per_second"}. compute_chunk must be a picklable module-level
+    function when workers > 1; initializer runs once in each worker process.
+    """
+    report = {"rows": 0, "imported": 0, "failed": 0, "errors": [], "input_error": None}
+    started = time.perf_counter()
+    chunks = _chunks(iter_validated(records, report), chunk_size)
+    if workers <= 1:
+        try:
+            for chunk in chunks:
+                _store_chunk(chunk, lambda: compute_chunk(chunk), write_chunk, report)
+        except (ValueError, UnicodeDecodeError) as e:
+            report["input_error"] = f"Stopped reading after row {report['rows']}: {e}"
+    else:
+        with ProcessPoolExecutor(max_workers=workers, initializer=initializer) as pool:
+            pending = deque()
+            try:
+                for chunk in chunks:
+                    pending.append((chunk, pool.submit(compute_chunk, chunk)))
+                    if len(pending) >= 2 * workers:
+                        chunk_done, future = pending.popleft()
+                        _store_chunk(chunk_done, future.result, write_chunk, report)
+            except (ValueError, UnicodeDecodeError) as e:
+                report["input_error"] = f"Stopped reading after row {report['rows']}: {e}"
+            while pending:
+                chunk_done, future = pending.popleft()
+                _store_chunk(chunk_done, future.result, write_chunk, report)
+    report["seconds"] = round(time.perf_counter() - started, 3)
+    report["rows_per_second"] = round(report["rows"] / report["seconds"], 1) if report["seconds"] else None
+    return report
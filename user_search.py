@@ -0,0 +1,113 @@
+"""
+User Search Module
+- SQLite FTS5 index over user full_name and birth_city
+- Kept in sync by triggers, so form, bulk import and delete paths all update it
+- Prefix queries for incremental type-ahead, with a LIKE fallback
+
+The index is an external-content FTS5 table: it stores only the token index
+and reads the text back from the user table by rowid (= user.id), so it adds
+little to the database size. Triggers on the user table write every insert,
+update and delete to the index in the same transaction. The first time the
+index is created it is rebuilt from the rows already in the table.
+
+Typed text is split into words and each word becomes a quoted prefix term,
+so "ram ku" matches "Ram Kumar" and FTS5 query syntax in the input is never
+interpreted. Databases without FTS5 (other engines, or SQLite builds
+without it) fall back to a LIKE scan on full_name and birth_city.
+"""
+import re
+import logging
+
+from sqlalchemy import text
+
+SEARCH_TABLE = "user_search"
+SEARCH_MAX_TERMS = 8
+
+_WORD = re.compile(r"\w+", re.UNICODE)
+
+_TRIGGERS = (
+    f"""CREATE TRIGGER IF NOT EXISTS user_search_ai AFTER INSERT ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}(rowid, full_name, birth_city)
+        VALUES (new.id, new.full_name, new.birth_city);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_search_ad AFTER DELETE ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, full_name, birth_city)
+        VALUES ('delete', old.id, old.full_name, old.birth_city);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS user_search_au AFTER UPDATE OF full_name, birth_city ON "user" BEGIN
+        INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}, rowid, full_name, birth_city)
+        VALUES ('delete', old.id, old.full_name, old.birth_city);
+        INSERT INTO {SEARCH_TABLE}(rowid, full_name, birth_city)
+        VALUES (new.id, new.full_name, new.birth_city);
+    END""",
+)
+
+
+def has_fts5(engine):
+    """True if the database is SQLite compiled with FTS5."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        options = {row[0] for row in conn.execute(text("PRAGMA compile_options"))}
+    return "ENABLE_FTS5" in options
+
+def has_search_index(engine):
+    """True if the FTS5 index exists (created by setup_search_index)."""
+    if engine.dialect.name != "sqlite":
+        return False
+    with engine.connect() as conn:
+        return conn.execute(
+            text("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = :name"),
+            {"name": SEARCH_TABLE}
+        ).first() is not None
+
+def setup_search_index(engine):
+    """Create the FTS5 table and its triggers if missing. Returns True if the index is available."""
+    if not has_fts5(engine):
+        logging.info("FTS5 not available; user search falls back to LIKE")
+        return False
+    exists = has_search_index(engine)
+    with engine.begin() as conn:
+        if not exists:
+            conn.execute(text(
+                f"""CREATE VIRTUAL TABLE {SEARCH_TABLE} USING fts5(
+                    full_name, birth_city,
+                    content='user', content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2', prefix='2 3'
+                )"""
+            ))
+            conn.execute(text(f"INSERT INTO {SEARCH_TABLE}({SEARCH_TABLE}) VALUES ('rebuild')"))
+            logging.info(f"Built {SEARCH_TABLE} full-text index")
+        for trigger in _TRIGGERS:
+            conn.execute(text(trigger))
+    return True
+
+def search_terms(query):
+    """Words of the typed text, at most SEARCH_MAX_TERMS."""
+    return _WORD.findall(query or "")[:SEARCH_MAX_TERMS]
+
+def fts_query(terms):
+    """FTS5 MATCH expression with every term as a quoted prefix."""
+    return " ".join('"{}"*'.format(term.replace('"', '""')) for term in terms)
+
+def search_user_ids(session, query, limit=10, use_fts=True):
+    """Ids of users matching the typed text, best match first."""
+    terms = search_terms(query)
+    if not terms:
+        return []
+    if use_fts:
+        rows = session.execute(
+            text(f"SELECT rowid FROM {SEARCH_TABLE} WHERE {SEARCH_TABLE} MATCH :q ORDER BY rank LIMIT :limit"),
+            {"q": fts_query(terms), "limit": limit}
+        )
+        return [row[0] for row in rows]
+    conditions = []
+    params = {"limit": limit}
+    for i, term in enumerate(terms):
+        conditions.append(f"""(full_name LIKE :t{i} ESCAPE '\\' OR birth_city LIKE :t{i} ESCAPE '\\')""")
+        params[f"t{i}"] = "%" + re.sub(r"([%_\\])", r"\\\1", term) + "%"
+    rows = session.execute(
+        text(f"""SELECT id FROM "user" WHERE {' AND '.join(conditions)} ORDER BY full_name LIMIT :limit"""),
+        params
+    )
+    return [row[0] for row in rows]